@@ -1,51 +1,51 @@
 import streamlit as st
-from login import login_page
-from logout import logout_page
-from predict import predict_page
-from charts import charts_page
-from history import history_page
-from train_model import model_info_page
-from signup import signup_page
+
+import project_path  # noqa: F401
+from metrics import start_exporters
+from page_registry import LazyPage
 
 st.set_page_config(page_title="Diabetes App", layout="centered")
 
+# /metrics endpoint and/or textfile when METRICS_PORT / METRICS_TEXTFILE are set
+start_exporters()
+
 if "logged_in" not in st.session_state:
     st.session_state.logged_in = False
 if "username" not in st.session_state:
     st.session_state.username = ""
 
+def home_page():
+    st.title("🏠 Home")
+    st.write("This is the Diabetes Prediction App homepage.")
+
+def treatment_page():
+    st.title("💊 Treatment Information")
+    st.write("Information about treatments for diabetes.")
+
+# page modules are imported on first navigation, not at startup
+LOGIN_PAGES = {
+    "Login": LazyPage("login", "login_page"),
+    "Sign Up": LazyPage("signup", "signup_page"),
+}
+
+APP_PAGES = {
+    "🏠 Home": home_page,
+    "🩺 Predict Diabetes": LazyPage("predict", "predict_page"),
+    "📦 Bulk Prediction": LazyPage("bulk_predict", "bulk_predict_page"),
+    "💊 Treatment Information": treatment_page,
+    "📊 Model Info": LazyPage("train_model", "model_info_page"),
+    "📈 Charts & Visualization": LazyPage("charts", "charts_page"),
+    "🔓 Logout": LazyPage("logout", "logout_page"),
+}
+
 def main():
     if not st.session_state.logged_in:
-        selected = st.sidebar.radio("🔐 Menu", ["Login", "Sign Up"])
-        if selected == "Login":
-            login_page()
-        elif selected == "Sign Up":
-            signup_page()
+        selected = st.sidebar.radio("🔐 Menu", list(LOGIN_PAGES))
+        LOGIN_PAGES[selected]()
     else:
         st.sidebar.success(f"👋 Welcome, {st.session_state.username}!")
-        selected = st.sidebar.radio("📋 Navigation", [
-            "🏠 Home",
-            "🩺 Predict Diabetes",
-            "💊 Treatment Information",
-            "📊 Model Info",
-            "📈 Charts & Visualization",
-            "🔓 Logout"
-        ])
-
-        if selected == "🏠 Home":
-            st.title("🏠 Home")
-            st.write("This is the Diabetes Prediction App homepage.")
-        elif selected == "🩺 Predict Diabetes":
-            predict_page()
-        elif selected == "💊 Treatment Information":
-            st.title("💊 Treatment Information")
-            st.write("Information about treatments for diabetes.")
-        elif selected == "📊 Model Info":
-            model_info_page()
-        elif selected == "📈 Charts & Visualization":
-            charts_page()
-        elif selected == "🔓 Logout":
-            logout_page()
+        selected = st.sidebar.radio("📋 Navigation", list(APP_PAGES))
+        APP_PAGES[selected]()
 
 if __name__ == "__main__":
     main()
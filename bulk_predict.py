@@ -0,0 +1,65 @@
+import argparse
+import os
+import tempfile
+
+import pandas as pd
+import streamlit as st
+
+from predict import FEATURE_NAMES, predict_batch
+
+CHUNK_SIZE = 10000
+
+
+def score_csv(src, dst, chunksize=CHUNK_SIZE, progress=None):
+    """
+    Stream src (path or file-like CSV) through predict_batch in chunks of
+    `chunksize` rows and append each scored chunk to dst. Only one chunk is
+    held in memory at a time. Returns the number of rows scored.
+    """
+    total = 0
+    header = True
+    for chunk in pd.read_csv(src, chunksize=chunksize):
+        res = predict_batch(chunk)
+        chunk["Prediction"] = res["labels"]
+        if res["proba"] is not None:
+            chunk["Probability"] = res["proba"]
+        chunk.to_csv(dst, mode="w" if header else "a", header=header, index=False)
+        header = False
+        total += len(chunk)
+        if progress is not None:
+            progress(total)
+    return total
+
+
+def bulk_predict_page():
+    st.header("Bulk Prediction (CSV)")
+    st.write(f"Upload a CSV with the columns {', '.join(FEATURE_NAMES)}. "
+             "Extra columns are kept; Prediction and Probability are appended.")
+
+    uploaded = st.file_uploader("Patients CSV", type="csv")
+    chunksize = st.number_input("Rows per chunk", value=CHUNK_SIZE, min_value=100, step=1000)
+
+    if uploaded is not None and st.button("Score file"):
+        status = st.empty()
+        fd, out_path = tempfile.mkstemp(suffix=".csv")
+        os.close(fd)
+        try:
+            n = score_csv(uploaded, out_path, chunksize=int(chunksize),
+                          progress=lambda done: status.write(f"Scored {done:,} rows..."))
+            status.success(f"Scored {n:,} rows.")
+            with open(out_path, "rb") as f:
+                st.download_button("Download predictions", f, file_name="predictions.csv", mime="text/csv")
+        except Exception as e:
+            st.error(f"Prediction error: {e}")
+        finally:
+            os.remove(out_path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score a patients CSV in fixed-size chunks.")
+    parser.add_argument("src", help="input CSV with the FEATURE_NAMES columns")
+    parser.add_argument("dst", help="output CSV (input columns + Prediction, Probability)")
+    parser.add_argument("--chunksize", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+    n = score_csv(args.src, args.dst, chunksize=args.chunksize)
+    print(f"✅ Scored {n} rows into {args.dst}")
@@ -1,55 +1,77 @@
 import streamlit as st
-from login import login_page
-from logout import logout_page
-from predict import predict_page
-from charts import charts_page
-from history import history_page
-from train_model import model_info_page
-from signup import signup_page
+from auth import validate_session
+from metrics import start_exporters
+from page_registry import LazyPage
 
 # Set page config
 st.set_page_config(page_title="Diabetes App", layout="centered")
 
+# /metrics endpoint and/or textfile when METRICS_PORT / METRICS_TEXTFILE are set
+start_exporters()
+
 # Initialize session state
 if "logged_in" not in st.session_state:
     st.session_state.logged_in = False
 if "username" not in st.session_state:
     st.session_state.username = ""
 
+# Reruns and reconnects are authenticated by the signed session token
+# (an HMAC check), never by re-running bcrypt. The token lives only in
+# session state; one found in the URL is dropped unread, so a shared or
+# logged link never carries a login.
+st.query_params.pop("session", None)
+token = st.session_state.get("session_token")
+if token:
+    session_user = validate_session(token)
+    if session_user:
+        st.session_state.logged_in = True
+        st.session_state.username = session_user
+        st.session_state.session_token = token
+    else:
+        st.session_state.pop("session_token", None)
+        st.session_state.logged_in = False
+        st.session_state.username = ""
+
+
+def home_page():
+    st.title("🏠 Home")
+    st.write("This is the Diabetes Prediction App homepage.")
+
+
+def treatment_page():
+    st.title("💊 Treatment Information")
+    st.write("Information about treatments for diabetes.")
+
+
+# Sidebar entries -> pages. Page modules (and the pandas/sklearn/matplotlib
+# they pull in) are only imported when the page is first opened.
+LOGIN_PAGES = {
+    "Login": LazyPage("login", "login"),
+    "Sign Up": LazyPage("signup", "signup"),
+}
+
+APP_PAGES = {
+    "🏠 Home": home_page,
+    "🩺 Predict Diabetes": LazyPage("predict"),
+    "💊 Treatment Information": treatment_page,
+    "📊 Model Info": LazyPage("model_info", "model_info_page"),
+    "📜 Prediction History": LazyPage("history", "history"),
+    "📈 Charts & Visualization": LazyPage("charts", "charts"),
+    "🔓 Logout": LazyPage("logout", "logout"),
+}
+
+
 def main():
     if not st.session_state.logged_in:
         # Show Login or Sign Up
-        selected = st.sidebar.radio("🔐 Menu", ["Login", "Sign Up"])
-        if selected == "Login":
-            login_page()
-        elif selected == "Sign Up":
-            signup_page()
+        selected = st.sidebar.radio("🔐 Menu", list(LOGIN_PAGES))
+        LOGIN_PAGES[selected]()
     else:
         # Show the main app
         st.sidebar.success(f"👋 Welcome, {st.session_state.username}!")
-        selected = st.sidebar.radio("📋 Navigation", [
-            "🏠 Home",
-            "🩺 Predict Diabetes",
-            "💊 Treatment Information",
-            "📊 Model Info",
-            "📈 Charts & Visualization",
-            "🔓 Logout"
-        ])
-
-        if selected == "🏠 Home":
-            st.title("🏠 Home")
-            st.write("This is the Diabetes Prediction App homepage.")
-        elif selected == "🩺 Predict Diabetes":
-            predict_page()
-        elif selected == "💊 Treatment Information":
-            st.title("💊 Treatment Information")
-            st.write("Information about treatments for diabetes.")
-        elif selected == "📊 Model Info":
-            model_info_page()
-        elif selected == "📈 Charts & Visualization":
-            charts_page()
-        elif selected == "🔓 Logout":
-            logout_page()
+        selected = st.sidebar.radio("📋 Navigation", list(APP_PAGES))
+        APP_PAGES[selected]()
+
 
 if __name__ == "__main__":
     main()
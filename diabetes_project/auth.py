@@ -0,0 +1,180 @@
+# auth.py
+import hashlib
+import hmac
+import os
+import secrets
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+import bcrypt
+
+from db_pool import DB_PATH, get_connection
+
+# bcrypt cost factor for new hashes (existing hashes keep their own cost)
+BCRYPT_ROUNDS = int(os.environ.get('BCRYPT_ROUNDS', 12))
+# Hashing threads; bcrypt releases the GIL, so these run on separate cores
+AUTH_WORKERS = int(os.environ.get('AUTH_WORKERS', 2))
+# Hash/verify requests allowed to wait for a worker before we shed load
+AUTH_MAX_PENDING = int(os.environ.get('AUTH_MAX_PENDING', 32))
+AUTH_TIMEOUT = 30
+
+SESSION_TTL = int(os.environ.get('SESSION_TTL', 12 * 3600))
+SECRET_PATH = os.path.join(os.path.dirname(DB_PATH), 'session_secret')
+
+_executor = ThreadPoolExecutor(max_workers=AUTH_WORKERS, thread_name_prefix='bcrypt')
+_pending = threading.BoundedSemaphore(AUTH_MAX_PENDING)
+
+# session id -> time of the next table check, for sessions already checked;
+# entries past that time are swept out at most once per _SESSION_RECHECK
+_valid_sessions = {}
+_SESSION_RECHECK = 60
+_last_sweep = 0.0
+
+
+class AuthBusyError(RuntimeError):
+    """Raised when too many password checks are already queued"""
+
+
+def _submit(fn, *args):
+    if not _pending.acquire(blocking=False):
+        raise AuthBusyError("Too many login attempts right now, please try again in a moment")
+    try:
+        future = _executor.submit(fn, *args)
+    except BaseException:
+        _pending.release()
+        raise
+    future.add_done_callback(lambda _: _pending.release())
+    try:
+        return future.result(timeout=AUTH_TIMEOUT)
+    except FutureTimeoutError:
+        # Still queued behind other checks: drop it rather than hash for nobody
+        future.cancel()
+        raise AuthBusyError("Login is taking too long right now, please try again in a moment") from None
+
+
+def hash_password(password):
+    """bcrypt-hash a password on the auth worker pool"""
+    return _submit(lambda: bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds=BCRYPT_ROUNDS)))
+
+
+def verify_password(password, stored_hash):
+    """Check a password against a stored bcrypt hash on the auth worker pool"""
+    if isinstance(stored_hash, str):
+        stored_hash = stored_hash.encode()
+    return _submit(bcrypt.checkpw, password.encode(), stored_hash)
+
+
+def create_sessions_table(c):
+    """Create the sessions table on a cursor/connection"""
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS sessions (
+            id TEXT PRIMARY KEY,
+            username TEXT NOT NULL,
+            created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            expires INTEGER NOT NULL,
+            FOREIGN KEY (username) REFERENCES users (username)
+        )
+    ''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_sessions_username ON sessions (username)")
+
+
+def _load_secret():
+    secret = os.environ.get('SESSION_SECRET')
+    if secret:
+        return secret.encode()
+    try:
+        with open(SECRET_PATH, 'rb') as f:
+            return f.read()
+    except FileNotFoundError:
+        os.makedirs(os.path.dirname(SECRET_PATH), exist_ok=True)
+        secret = secrets.token_bytes(32)
+        # O_EXCL: if two processes race, the loser re-reads the winner's key
+        try:
+            fd = os.open(SECRET_PATH, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        except FileExistsError:
+            with open(SECRET_PATH, 'rb') as f:
+                return f.read()
+        with os.fdopen(fd, 'wb') as f:
+            f.write(secret)
+        return secret
+
+
+_secret = None
+
+
+def _sign(payload):
+    global _secret
+    if _secret is None:
+        _secret = _load_secret()
+    return hmac.new(_secret, payload.encode(), hashlib.sha256).hexdigest()
+
+
+def issue_session(username, ttl=SESSION_TTL):
+    """Create a session row and return its signed token: '<id>.<username>.<expires>.<mac>'"""
+    session_id = secrets.token_urlsafe(16)
+    expires = int(time.time()) + ttl
+    with get_connection() as conn:
+        create_sessions_table(conn)
+        conn.execute("INSERT INTO sessions (id, username, expires) VALUES (?, ?, ?)",
+                     (session_id, username, expires))
+    payload = f"{session_id}.{username}.{expires}"
+    return f"{payload}.{_sign(payload)}"
+
+
+def validate_session(token):
+    """Return the username for a valid, unexpired, unrevoked token, else None
+
+    The signature and expiry are checked first, with no database access;
+    the sessions table is only consulted once a minute per session, to
+    pick up logouts.
+    """
+    if not token:
+        return None
+    try:
+        payload, mac = token.rsplit('.', 1)
+        session_id, rest = payload.split('.', 1)
+        username, expires = rest.rsplit('.', 1)
+        expires = int(expires)
+    except ValueError:
+        return None
+    if not hmac.compare_digest(mac, _sign(payload)):
+        return None
+    now = time.time()
+    if expires < now:
+        return None
+
+    checked = _valid_sessions.get(session_id)
+    if checked is None or checked < now:
+        with get_connection() as conn:
+            row = conn.execute("SELECT username FROM sessions WHERE id=? AND expires>=?",
+                               (session_id, int(now))).fetchone()
+        if row is None or row[0] != username:
+            _valid_sessions.pop(session_id, None)
+            return None
+        _remember_session(session_id, now)
+    return username
+
+
+def _remember_session(session_id, now):
+    global _last_sweep
+    if now - _last_sweep >= _SESSION_RECHECK:
+        _last_sweep = now
+        for stale in [sid for sid, until in list(_valid_sessions.items()) if until < now]:
+            _valid_sessions.pop(stale, None)
+    _valid_sessions[session_id] = now + _SESSION_RECHECK
+
+
+def revoke_session(token):
+    """Delete the session behind a token (logout)"""
+    if not token:
+        return
+    session_id = token.split('.', 1)[0]
+    _valid_sessions.pop(session_id, None)
+    with get_connection() as conn:
+        conn.execute("DELETE FROM sessions WHERE id=?", (session_id,))
+
+
+def purge_expired_sessions(path=DB_PATH):
+    with get_connection(path) as conn:
+        conn.execute("DELETE FROM sessions WHERE expires<?", (int(time.time()),))
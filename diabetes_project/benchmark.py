@@ -0,0 +1,246 @@
+# benchmark.py
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from db_pool import get_connection, get_pool
+from model_registry import PROJECT_DIR
+
+ROOT_DIR = os.path.dirname(PROJECT_DIR)
+BENCH_DIR = os.path.join(PROJECT_DIR, 'cache', 'bench')
+RESULTS_PATH = os.path.join(PROJECT_DIR, 'data', 'benchmark_results.json')
+BASELINE_PATH = os.path.join(PROJECT_DIR, 'data', 'benchmark_baseline.json')
+
+DB_SIZES = (1_000, 100_000, 1_000_000)
+BATCH_SIZE = 10_000
+BENCH_USER = 'bench'
+# A slowdown is only reported when it is also larger than this, so
+# microsecond-scale timings do not flag on scheduler noise
+NOISE_FLOOR_MS = 0.05
+
+SAMPLE_ROW = [2, 140, 70, 30, 100, 32.5, 0.5, 45]
+
+
+def measure(fn, budget=1.0, min_runs=3, max_runs=10_000, warmup=True):
+    """Time fn() (after one warm-up call); repeat until budget seconds or max_runs
+
+    Returns a dict of timing statistics in milliseconds.
+    """
+    if warmup:
+        fn()
+    times = []
+    start = time.perf_counter()
+    while len(times) < max_runs and (len(times) < min_runs or time.perf_counter() - start < budget):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    ms = np.array(times) * 1000
+    return {
+        'runs': len(ms),
+        'min_ms': float(ms.min()),
+        'median_ms': float(np.median(ms)),
+        'p95_ms': float(np.percentile(ms, 95)),
+        'mean_ms': float(ms.mean()),
+    }
+
+
+@contextlib.contextmanager
+def _chdir(path):
+    old = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(old)
+
+
+def _root_predict():
+    """Import the root app's predict.py (diabetes_project/predict.py is a page script)"""
+    if ROOT_DIR not in sys.path:
+        sys.path.append(ROOT_DIR)
+    spec = importlib.util.spec_from_file_location('root_predict', os.path.join(ROOT_DIR, 'predict.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def bench_predict(budget):
+    """Single-row latency of both predict paths and batch throughput"""
+    import utils
+    from prediction_cache import prediction_cache
+
+    def uncached(fn):
+        # Cold path: the memoized result is dropped before every call
+        return lambda: (prediction_cache.clear(), fn(SAMPLE_ROW))
+
+    results = {}
+    root_predict = _root_predict()
+    # Root predict.py resolves model.pkl relative to the repository root
+    with _chdir(ROOT_DIR):
+        results['predict.predict'] = measure(uncached(root_predict.predict), budget)
+        results['predict.predict[cached]'] = measure(lambda: root_predict.predict(SAMPLE_ROW), budget)
+
+        # Both sides of COMPILED_MAX_ROWS: compiled arrays below it, sklearn above
+        X = np.random.default_rng(0).normal(SAMPLE_ROW, np.abs(SAMPLE_ROW) * 0.2 + 1, (BATCH_SIZE, 8))
+        for n in (100, BATCH_SIZE):
+            stats = measure(lambda: root_predict.predict_batch(X[:n]), budget)
+            stats['rows_per_second'] = n / stats['median_ms'] * 1000
+            results[f'predict.predict_batch[{n}]'] = stats
+
+    results['utils.predict_diabetes'] = measure(uncached(utils.predict_diabetes), budget)
+    results['utils.predict_diabetes[cached]'] = measure(lambda: utils.predict_diabetes(SAMPLE_ROW), budget)
+    return results
+
+
+def seed_database(n_rows, bench_dir=BENCH_DIR):
+    """Return the path of a SQLite database holding n_rows predictions for BENCH_USER
+
+    Seeded databases are kept in bench_dir and reused while the schema
+    (migration count) is unchanged; synthetic_data is seeded, so every
+    copy is identical.
+    """
+    from init_db import MIGRATIONS
+    from synthetic_data import write_sqlite
+
+    path = os.path.join(bench_dir, f'seed-{n_rows}-v{len(MIGRATIONS)}.db')
+    if os.path.exists(path):
+        return path
+
+    os.makedirs(bench_dir, exist_ok=True)
+    tmp_path = f'{path}.tmp-{os.getpid()}'
+    write_sqlite(tmp_path, n_rows, usernames=[BENCH_USER])
+
+    # Closing the last connection checkpoints the WAL into the file
+    get_pool(tmp_path).close()
+    os.replace(tmp_path, path)
+    return path
+
+
+def bench_database(n_rows, budget):
+    """History/charts queries and chart rendering against a seeded database"""
+    from charts import get_data_version, load_chart_data, render_figures
+    from history import PAGE_SIZE, get_page, get_summary
+
+    path = seed_database(n_rows)
+    with get_connection(path) as conn:
+        # Cursor halfway down the history, as if the user paged that far back
+        middle = conn.execute(
+            "SELECT date, id FROM predictions WHERE username=? ORDER BY date DESC, id DESC LIMIT 1 OFFSET ?",
+            (BENCH_USER, n_rows // 2),
+        ).fetchone()
+
+    def query(fn, *args):
+        def run():
+            with get_connection(path) as conn:
+                return fn(conn, BENCH_USER, *args)
+        return run
+
+    results = {
+        f'history.get_summary@{n_rows}': measure(query(get_summary), budget),
+        f'history.get_page@{n_rows}': measure(query(get_page, None, PAGE_SIZE + 1), budget),
+        f'history.get_page_deep@{n_rows}': measure(query(get_page, tuple(middle), PAGE_SIZE + 1), budget),
+        f'charts.get_data_version@{n_rows}': measure(query(get_data_version), budget),
+        f'charts.load_chart_data@{n_rows}': measure(query(load_chart_data), budget),
+    }
+    df = query(load_chart_data)()
+    results[f'charts.render_figures@{n_rows}'] = measure(lambda: render_figures(df), budget)
+    return results
+
+
+def bench_training():
+    """Wall time of train_model.train_and_save_model, run in a scratch directory"""
+    from train_model import train_and_save_model
+
+    with tempfile.TemporaryDirectory() as tmp, _chdir(tmp), contextlib.redirect_stdout(io.StringIO()):
+        return {'train_model.train_and_save_model': measure(train_and_save_model, budget=0, min_runs=1, warmup=False)}
+
+
+def run(sizes=DB_SIZES, budget=1.0, only=None):
+    """Run every benchmark (or those whose group matches only) and return the results document"""
+    groups = [('predict', lambda: bench_predict(budget))]
+    groups += [(f'db@{n}', lambda n=n: bench_database(n, budget)) for n in sizes]
+    groups.append(('train', bench_training))
+
+    results = {}
+    for group, bench in groups:
+        if only and not any(o in group for o in only):
+            continue
+        print(f"Running {group}...", file=sys.stderr)
+        results.update(bench())
+
+    import sklearn
+    return {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'sklearn': sklearn.__version__,
+            'machine': platform.machine(),
+            'cpu_count': os.cpu_count(),
+        },
+        'results': results,
+    }
+
+
+def compare(current, baseline, threshold=0.25):
+    """Print current vs baseline medians; return the names slower by more than threshold"""
+    regressions = []
+    print(f"{'benchmark':45} {'baseline':>11} {'current':>11} {'change':>8}")
+    for name, stats in current['results'].items():
+        base = baseline['results'].get(name)
+        if base is None:
+            print(f"{name:45} {'-':>11} {stats['median_ms']:9.3f}ms {'new':>8}")
+            continue
+        change = stats['median_ms'] / base['median_ms'] - 1
+        flag = ''
+        if change > threshold and stats['median_ms'] - base['median_ms'] > NOISE_FLOOR_MS:
+            regressions.append(name)
+            flag = '  REGRESSION'
+        print(f"{name:45} {base['median_ms']:9.3f}ms {stats['median_ms']:9.3f}ms {change:+8.1%}{flag}")
+    return regressions
+
+
+def _write_json(path, doc):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(doc, f, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Headless benchmarks for prediction, database, chart and training paths.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DB_SIZES),
+                        help="seeded database sizes (rows) for the history/charts benchmarks")
+    parser.add_argument('--budget', type=float, default=1.0, help="seconds spent repeating each benchmark")
+    parser.add_argument('--only', nargs='+', help="run only groups containing these strings (predict, db@1000, train)")
+    parser.add_argument('--out', default=RESULTS_PATH, help="where to write the JSON results")
+    parser.add_argument('--baseline', default=BASELINE_PATH, help="baseline JSON to compare against")
+    parser.add_argument('--save-baseline', action='store_true', help="store these results as the new baseline")
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help="fractional slowdown of a median that counts as a regression")
+    args = parser.parse_args()
+
+    doc = run(args.sizes, args.budget, args.only)
+    _write_json(args.out, doc)
+    print(f"Results written to {args.out}")
+
+    if args.save_baseline:
+        _write_json(args.baseline, doc)
+        print(f"Baseline saved to {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            regressions = compare(doc, json.load(f), args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+    else:
+        for name, stats in doc['results'].items():
+            print(f"{name:45} {stats['median_ms']:9.3f}ms")
@@ -1,9 +1,138 @@
 # charts.py
 import streamlit as st
 import sqlite3
+import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
+from matplotlib.figure import Figure
+
+from db_pool import get_connection
+from downsample import downsample_series, needs_binning
+from metrics import timed
+from plot_utils import to_png
+
+# Rendered chart sets kept per process (one per user and data version)
+CACHE_ENTRIES = 256
+
+
+@timed('db.charts.get_data_version')
+def get_data_version(conn, username):
+    """Cheap marker that changes whenever the user's predictions change"""
+    try:
+        row = conn.execute(
+            "SELECT version FROM prediction_summary WHERE username=?", (username,)
+        ).fetchone()
+        return row[0] if row else 0
+    except sqlite3.OperationalError:
+        # Database created before the summary table migrations
+        return conn.execute(
+            "SELECT MAX(id) || ':' || COUNT(*) FROM predictions WHERE username=?", (username,)
+        ).fetchone()[0]
+
+
+def _scatter(ax, x, y, prediction):
+    """Scatter small histories; aggregate large ones into hexagonal bins"""
+    if needs_binning(len(x)):
+        # Colour is the share of high-risk predictions in each bin
+        ax.hexbin(x, y, C=prediction, reduce_C_function=np.mean, gridsize=40,
+                  cmap='RdYlGn_r', mincnt=1)
+    else:
+        ax.scatter(x, y, c=prediction, cmap='RdYlGn_r', alpha=0.7)
+
+
+def render_figures(df):
+    """Build the analytics figures for a user's predictions, as PNG bytes"""
+    images = {}
+
+    # Risk distribution pie chart
+    fig = Figure(figsize=(8, 6))
+    ax = fig.subplots()
+    risk_counts = df["Risk Level"].value_counts()
+    colors = ['#90EE90', '#FFB6C1']  # Light green for low risk, light red for high risk
+    ax.pie(risk_counts.values, labels=risk_counts.index, autopct='%1.1f%%', colors=colors)
+    ax.set_title("Distribution of Diabetes Risk Predictions")
+    images["pie"] = to_png(fig)
+
+    # Probability trend over time
+    if len(df) > 1:
+        fig = Figure(figsize=(10, 6))
+        ax = fig.subplots()
+        idx = downsample_series(df["Date"].to_numpy().astype(np.int64), df["Probability"].to_numpy())
+        if len(idx) < len(df):
+            ax.plot(df["Date"].iloc[idx], df["Probability"].iloc[idx], linewidth=1)
+            ax.text(0.01, 0.99, f"{len(idx):,} of {len(df):,} points shown (LTTB)",
+                    transform=ax.transAxes, va='top', fontsize=8, color='gray')
+        else:
+            ax.plot(df["Date"], df["Probability"], marker='o', linewidth=2, markersize=6)
+        ax.set_xlabel("Date")
+        ax.set_ylabel("Diabetes Probability (%)")
+        ax.set_title("Diabetes Risk Probability Over Time")
+        ax.grid(True, alpha=0.3)
+        ax.tick_params(axis='x', labelrotation=45)
+        images["trend"] = to_png(fig)
+
+    # Health metrics correlation
+    fig = Figure(figsize=(12, 10))
+    ((ax1, ax2), (ax3, ax4)) = fig.subplots(2, 2)
+
+    # Glucose vs Probability
+    _scatter(ax1, df["Glucose"], df["Probability"], df["Prediction"])
+    ax1.set_xlabel("Glucose Level")
+    ax1.set_ylabel("Probability (%)")
+    ax1.set_title("Glucose vs Diabetes Probability")
+
+    # BMI vs Probability
+    _scatter(ax2, df["BMI"], df["Probability"], df["Prediction"])
+    ax2.set_xlabel("BMI")
+    ax2.set_ylabel("Probability (%)")
+    ax2.set_title("BMI vs Diabetes Probability")
+
+    # Age vs Probability
+    _scatter(ax3, df["Age"], df["Probability"], df["Prediction"])
+    ax3.set_xlabel("Age")
+    ax3.set_ylabel("Probability (%)")
+    ax3.set_title("Age vs Diabetes Probability")
+
+    # Risk level histogram
+    ax4.hist(df["Probability"], bins=10, alpha=0.7, color='skyblue', edgecolor='black')
+    ax4.set_xlabel("Probability (%)")
+    ax4.set_ylabel("Frequency")
+    ax4.set_title("Probability Distribution")
+
+    fig.tight_layout()
+    images["metrics"] = to_png(fig)
+
+    return images
+
+
+@timed('db.charts.load_chart_data')
+def load_chart_data(conn, username):
+    """A user's predictions in date order as a chart DataFrame, or None if there are none"""
+    rows = conn.execute('''
+        SELECT prediction, probability, glucose, bmi, age, date
+        FROM predictions
+        WHERE username=?
+        ORDER BY date
+    ''', (username,)).fetchall()
+
+    if not rows:
+        return None
+
+    df = pd.DataFrame(rows, columns=["Prediction", "Probability", "Glucose", "BMI", "Age", "Date"])
+    df["Date"] = pd.to_datetime(df["Date"])
+    df["Risk Level"] = df["Prediction"].map({0: "Low Risk", 1: "High Risk"})
+    return df
+
+
+@st.cache_data(max_entries=CACHE_ENTRIES, show_spinner="Rendering charts...")
+def render_charts(username, version):
+    """Query and render a user's charts; cached until their data version changes
+
+    Returns None when the user has no predictions.
+    """
+    with get_connection() as conn:
+        df = load_chart_data(conn, username)
+
+    return None if df is None else render_figures(df)
 
 
 def charts():
@@ -14,83 +143,27 @@ def charts():
         st.warning("Please login first to view charts.")
         return
 
-    conn = sqlite3.connect('db/diabetes_app.db')
-    c = conn.cursor()
+    username = st.session_state["username"]
 
     try:
-        c.execute('''
-            SELECT prediction, probability, glucose, bmi, age, date 
-            FROM predictions 
-            WHERE username=? 
-            ORDER BY date
-        ''', (st.session_state["username"],))
-
-        rows = c.fetchall()
+        with get_connection() as conn:
+            version = get_data_version(conn, username)
 
-        if rows:
-            df = pd.DataFrame(rows, columns=["Prediction", "Probability", "Glucose", "BMI", "Age", "Date"])
-            df["Date"] = pd.to_datetime(df["Date"])
-            df["Risk Level"] = df["Prediction"].map({0: "Low Risk", 1: "High Risk"})
+        images = render_charts(username, version)
 
-            # Risk distribution pie chart
+        if images:
             st.subheader("Risk Distribution")
-            fig, ax = plt.subplots(figsize=(8, 6))
-            risk_counts = df["Risk Level"].value_counts()
-            colors = ['#90EE90', '#FFB6C1']  # Light green for low risk, light red for high risk
-            ax.pie(risk_counts.values, labels=risk_counts.index, autopct='%1.1f%%', colors=colors)
-            ax.set_title("Distribution of Diabetes Risk Predictions")
-            st.pyplot(fig)
-
-            # Probability trend over time
-            if len(df) > 1:
+            st.image(images["pie"])
+
+            if "trend" in images:
                 st.subheader("Probability Trend Over Time")
-                fig, ax = plt.subplots(figsize=(10, 6))
-                ax.plot(df["Date"], df["Probability"], marker='o', linewidth=2, markersize=6)
-                ax.set_xlabel("Date")
-                ax.set_ylabel("Diabetes Probability (%)")
-                ax.set_title("Diabetes Risk Probability Over Time")
-                ax.grid(True, alpha=0.3)
-                plt.xticks(rotation=45)
-                st.pyplot(fig)
-
-            # Health metrics correlation
+                st.image(images["trend"])
+
             st.subheader("Health Metrics Analysis")
-            fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(12, 10))
-
-            # Glucose vs Probability
-            scatter = ax1.scatter(df["Glucose"], df["Probability"],
-                                  c=df["Prediction"], cmap='RdYlGn_r', alpha=0.7)
-            ax1.set_xlabel("Glucose Level")
-            ax1.set_ylabel("Probability (%)")
-            ax1.set_title("Glucose vs Diabetes Probability")
-
-            # BMI vs Probability
-            ax2.scatter(df["BMI"], df["Probability"],
-                        c=df["Prediction"], cmap='RdYlGn_r', alpha=0.7)
-            ax2.set_xlabel("BMI")
-            ax2.set_ylabel("Probability (%)")
-            ax2.set_title("BMI vs Diabetes Probability")
-
-            # Age vs Probability
-            ax3.scatter(df["Age"], df["Probability"],
-                        c=df["Prediction"], cmap='RdYlGn_r', alpha=0.7)
-            ax3.set_xlabel("Age")
-            ax3.set_ylabel("Probability (%)")
-            ax3.set_title("Age vs Diabetes Probability")
-
-            # Risk level histogram
-            ax4.hist(df["Probability"], bins=10, alpha=0.7, color='skyblue', edgecolor='black')
-            ax4.set_xlabel("Probability (%)")
-            ax4.set_ylabel("Frequency")
-            ax4.set_title("Probability Distribution")
-
-            plt.tight_layout()
-            st.pyplot(fig)
+            st.image(images["metrics"])
 
         else:
             st.info("No data available for charts. Make some predictions first!")
 
     except sqlite3.Error as e:
         st.error(f"Database error: {e}")
-    finally:
-        conn.close()
\ No newline at end of file
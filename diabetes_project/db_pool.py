@@ -0,0 +1,114 @@
+# db_pool.py
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from model_registry import PROJECT_DIR
+
+# DIABETES_DB_PATH points the app at another database file (load tests, staging copies)
+DB_PATH = os.environ.get('DIABETES_DB_PATH') or os.path.join(PROJECT_DIR, 'db', 'diabetes_app.db')
+
+PRAGMAS = (
+    # Readers keep reading while a writer appends to the WAL
+    "PRAGMA journal_mode=WAL",
+    # Safe with WAL; only the checkpoint fsyncs
+    "PRAGMA synchronous=NORMAL",
+    # Wait for a competing writer instead of failing with 'database is locked'
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA foreign_keys=ON",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-16000",
+    "PRAGMA mmap_size=268435456",
+)
+
+
+class ConnectionPool:
+    """A small pool of SQLite connections shared by all Streamlit sessions.
+
+    Connections are created lazily up to `size` and handed to one thread at
+    a time, so they are opened with check_same_thread=False. A connection
+    that comes back with an open transaction is rolled back before reuse.
+    """
+
+    def __init__(self, path=DB_PATH, size=8, timeout=30):
+        self.path = path
+        self.size = size
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    def _connect(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=self.timeout, check_same_thread=False)
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def acquire(self):
+        if os.getpid() != self._pid:
+            # Forked child: never share the parent's connections
+            self.__init__(self.path, self.size, self.timeout)
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                try:
+                    return self._connect()
+                except Exception:
+                    self._created -= 1
+                    raise
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            # Surface it like a lock timeout so callers handle both the same way
+            raise sqlite3.OperationalError("connection pool exhausted") from None
+
+    def release(self, conn):
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put(conn)
+
+    def close(self):
+        """Close every idle connection"""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+        with self._lock:
+            self._created = 0
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(path=DB_PATH):
+    """Return the process-wide pool for a database file"""
+    key = os.path.abspath(path)
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = ConnectionPool(key)
+        return _pools[key]
+
+
+@contextmanager
+def get_connection(path=DB_PATH):
+    """Borrow a pooled connection; commit on success, roll back on error"""
+    pool = get_pool(path)
+    conn = pool.acquire()
+    try:
+        yield conn
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        pool.release(conn)
@@ -0,0 +1,55 @@
+# downsample.py
+import numpy as np
+
+# Above this many rows the charts plot a reduced series instead of raw points
+MAX_POINTS = 2000
+
+
+def lttb(x, y, n_out):
+    """Largest-Triangle-Three-Buckets downsampling of a time series.
+
+    Keeps the first and last points and, for each of the n_out - 2 buckets
+    in between, the point forming the largest triangle with the previously
+    kept point and the mean of the next bucket. Returns the kept indices,
+    so callers can take any other columns along with x and y.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    # Bucket boundaries over the points strictly between first and last
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.intp)
+
+    # Mean of every bucket at once; bucket i uses the mean of bucket i + 1
+    sums_x = np.add.reduceat(x[1:n - 1], edges[:-1] - 1)
+    sums_y = np.add.reduceat(y[1:n - 1], edges[:-1] - 1)
+    counts = np.diff(edges)
+    mean_x = np.append(sums_x / counts, x[-1])
+    mean_y = np.append(sums_y / counts, y[-1])
+
+    kept = np.empty(n_out, dtype=np.intp)
+    kept[0] = 0
+    kept[-1] = n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        bx, by = x[lo:hi], y[lo:hi]
+        # Twice the triangle area, vectorised over the bucket
+        area = np.abs((x[a] - mean_x[i + 1]) * (by - y[a]) - (x[a] - bx) * (mean_y[i + 1] - y[a]))
+        a = lo + int(np.argmax(area))
+        kept[i + 1] = a
+    return kept
+
+
+def downsample_series(x, y, max_points=MAX_POINTS):
+    """Indices to plot for a line chart: everything when small, LTTB otherwise"""
+    if len(x) <= max_points:
+        return np.arange(len(x))
+    return lttb(x, y, max_points)
+
+
+def needs_binning(n, max_points=MAX_POINTS):
+    """True when a scatter of n points should be drawn as aggregated bins"""
+    return n > max_points
@@ -0,0 +1,310 @@
+# drift_monitor.py
+import argparse
+import json
+import math
+import os
+import sys
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from db_pool import DB_PATH, get_connection
+from model_registry import PROJECT_DIR, file_sha256
+
+REFERENCE_CSV = os.path.join(PROJECT_DIR, 'diabetes.csv')
+
+# Monitored name -> predictions column
+COLUMNS = {
+    'Pregnancies': 'pregnancies',
+    'Glucose': 'glucose',
+    'BloodPressure': 'blood_pressure',
+    'SkinThickness': 'skin_thickness',
+    'Insulin': 'insulin',
+    'BMI': 'bmi',
+    'DiabetesPedigreeFunction': 'dpf',
+    'Age': 'age',
+    'Probability': 'probability',
+}
+FEATURES = list(COLUMNS)[:-1]
+
+# Feature bins sit at reference quantiles (2% apart); probability (0-100) has fixed bins
+QUANTILE_STEP = 0.02
+PROBABILITY_EDGES = np.linspace(0, 100, 51)
+# Most new rows folded in per update() call, so one call never scans the whole backlog
+UPDATE_LIMIT = 10_000
+# PSI rule of thumb: below 0.1 stable, above 0.25 a real shift
+PSI_WARN = 0.1
+PSI_ALERT = 0.25
+
+
+def create_drift_tables(c):
+    """Sketch state for the training reference and the live predictions"""
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS drift_sketches (
+            source TEXT NOT NULL,
+            name TEXT NOT NULL,
+            count INTEGER NOT NULL,
+            mean REAL NOT NULL,
+            m2 REAL NOT NULL,
+            min REAL,
+            max REAL,
+            edges TEXT NOT NULL,
+            counts TEXT NOT NULL,
+            PRIMARY KEY (source, name)
+        )
+    ''')
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS drift_state (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        )
+    ''')
+
+
+class Sketch:
+    """Running moments (Welford/Chan) plus a fixed-bin histogram of one column.
+
+    The bins are fixed when the sketch is created, so adding a value costs
+    one binary search over ~50 edges and the state stays a few hundred
+    numbers however many rows are folded in. counts has len(edges) + 1
+    bins: below edges[0], between consecutive edges, and above edges[-1].
+    """
+
+    def __init__(self, edges, counts=None, count=0, mean=0.0, m2=0.0, lo=None, hi=None):
+        self.edges = np.asarray(edges, dtype=np.float64)
+        self.counts = np.zeros(len(self.edges) + 1, dtype=np.int64) if counts is None \
+            else np.asarray(counts, dtype=np.int64)
+        self.count = count
+        self.mean = mean
+        self.m2 = m2
+        self.min = lo
+        self.max = hi
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        n = len(values)
+        if n == 0:
+            return
+        self.counts += np.bincount(np.searchsorted(self.edges, values, side='right'),
+                                   minlength=len(self.counts))
+        # Chan et al.'s pairwise combination of (count, mean, M2)
+        batch_mean = values.mean()
+        batch_m2 = float(((values - batch_mean) ** 2).sum())
+        total = self.count + n
+        delta = batch_mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += batch_m2 + delta ** 2 * self.count * n / total
+        self.count = total
+        lo, hi = float(values.min()), float(values.max())
+        self.min = lo if self.min is None else min(self.min, lo)
+        self.max = hi if self.max is None else max(self.max, hi)
+
+    @property
+    def std(self):
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+    def _bounds(self):
+        """Lower/upper value of every bin, with the open ends closed at min/max"""
+        lo = np.concatenate([[min(self.min, self.edges[0])], self.edges])
+        hi = np.concatenate([self.edges, [max(self.max, self.edges[-1])]])
+        return lo, hi
+
+    def quantile(self, q):
+        """Approximate quantile, interpolated linearly within its bin"""
+        if self.count == 0:
+            return float('nan')
+        cumulative = np.cumsum(self.counts)
+        rank = q * self.count
+        i = int(np.searchsorted(cumulative, rank, side='left'))
+        i = min(i, len(self.counts) - 1)
+        lo, hi = self._bounds()
+        before = cumulative[i - 1] if i else 0
+        fraction = (rank - before) / self.counts[i] if self.counts[i] else 0.0
+        return float(lo[i] + (hi[i] - lo[i]) * min(max(fraction, 0.0), 1.0))
+
+    def proportions(self):
+        return self.counts / self.count if self.count else np.zeros(len(self.counts))
+
+    def to_row(self, source, name):
+        return (source, name, self.count, self.mean, self.m2, self.min, self.max,
+                json.dumps(self.edges.tolist()), json.dumps(self.counts.tolist()))
+
+    @classmethod
+    def from_row(cls, row):
+        count, mean, m2, lo, hi, edges, counts = row
+        return cls(json.loads(edges), json.loads(counts), count, mean, m2, lo, hi)
+
+
+def psi(reference, live, eps=1e-4):
+    """Population stability index between two sketches with the same bins"""
+    p = np.clip(reference.proportions(), eps, None)
+    q = np.clip(live.proportions(), eps, None)
+    return float(np.sum((q - p) * np.log(q / p)))
+
+
+def ks(reference, live):
+    """Kolmogorov-Smirnov distance evaluated at the shared bin edges"""
+    return float(np.abs(np.cumsum(reference.proportions()) - np.cumsum(live.proportions())).max())
+
+
+def _feature_edges(values):
+    edges = np.unique(np.quantile(values, np.arange(QUANTILE_STEP, 1, QUANTILE_STEP)))
+    return edges if len(edges) else np.array([float(np.median(values))])
+
+
+def _reference_probabilities(X):
+    """The served model's probabilities (percent) on the reference rows, or None without a model
+
+    Scored through utils.predict_proba_batch, the same compiled/fused path
+    that produces the logged probabilities. A missing model is not
+    trained from here.
+    """
+    from utils import MODEL_PATH, SCALER_PATH, predict_proba_batch
+
+    if not (os.path.exists(MODEL_PATH) and os.path.exists(SCALER_PATH)):
+        return None
+    return predict_proba_batch(X) * 100
+
+
+def _read_state(conn):
+    return dict(conn.execute("SELECT key, value FROM drift_state").fetchall())
+
+
+def _write_state(conn, **values):
+    conn.executemany("INSERT OR REPLACE INTO drift_state (key, value) VALUES (?, ?)",
+                     [(k, None if v is None else str(v)) for k, v in values.items()])
+
+
+def _load_sketches(conn, source):
+    rows = conn.execute('''
+        SELECT name, count, mean, m2, min, max, edges, counts FROM drift_sketches WHERE source = ?
+    ''', (source,)).fetchall()
+    return {row[0]: Sketch.from_row(row[1:]) for row in rows}
+
+
+def has_reference(path=DB_PATH):
+    with get_connection(path) as conn:
+        create_drift_tables(conn)
+        return conn.execute("SELECT 1 FROM drift_sketches WHERE source = 'reference'").fetchone() is not None
+
+
+def _save_sketches(conn, source, sketches):
+    conn.executemany("INSERT OR REPLACE INTO drift_sketches VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                     [s.to_row(source, name) for name, s in sketches.items()])
+
+
+def build_reference(csv_path=REFERENCE_CSV, path=DB_PATH):
+    """Sketch the training CSV once and reset the live sketches to its bins.
+
+    Run from the Model Info page or the CLI, never from update(). The live
+    state restarts from the first prediction, so the next update() calls
+    re-fold the existing table (UPDATE_LIMIT rows at a time).
+    """
+    df = pd.read_csv(csv_path)
+    reference = {}
+    for name in FEATURES:
+        values = df[name].to_numpy(dtype=np.float64)
+        reference[name] = Sketch(_feature_edges(values))
+        reference[name].update(values)
+    reference['Probability'] = Sketch(PROBABILITY_EDGES)
+    probabilities = _reference_probabilities(df[FEATURES].to_numpy(dtype=np.float64))
+    if probabilities is not None:
+        reference['Probability'].update(probabilities)
+
+    with get_connection(path) as conn:
+        create_drift_tables(conn)
+        conn.execute("DELETE FROM drift_sketches")
+        _save_sketches(conn, 'reference', reference)
+        _save_sketches(conn, 'live', {name: Sketch(s.edges) for name, s in reference.items()})
+        _write_state(conn, reference_sha256=file_sha256(csv_path), reference_path=os.path.abspath(csv_path),
+                     reference_rows=len(df), last_id=0,
+                     built=datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+    return reference
+
+
+def update(path=DB_PATH, limit=UPDATE_LIMIT):
+    """Fold predictions added since the last call into the live sketches.
+
+    Rows are read by primary key after the stored watermark, so the cost
+    depends only on how many rows are new (at most limit), never on the
+    size of the table. Until a reference has been built this does nothing:
+    it runs on the prediction logger's thread, which must never read the
+    training CSV or load a model. Returns the number of rows folded in.
+    """
+    with get_connection(path) as conn:
+        create_drift_tables(conn)
+        # Take the write lock first so two updaters never fold the same rows
+        conn.execute("BEGIN IMMEDIATE")
+        if not conn.execute("SELECT 1 FROM drift_sketches WHERE source = 'reference'").fetchone():
+            return 0
+        last_id = int(_read_state(conn).get('last_id') or 0)
+        rows = conn.execute(f'''
+            SELECT id, {', '.join(COLUMNS.values())} FROM predictions
+            WHERE id > ? ORDER BY id LIMIT ?
+        ''', (last_id, limit)).fetchall()
+        if not rows:
+            return 0
+        data = np.array([row[1:] for row in rows], dtype=np.float64)  # NULL -> nan
+        live = _load_sketches(conn, 'live')
+        for i, name in enumerate(COLUMNS):
+            live[name].update(data[:, i])
+        _save_sketches(conn, 'live', live)
+        _write_state(conn, last_id=rows[-1][0], updated=datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+    return len(rows)
+
+
+def catch_up(path=DB_PATH, limit=UPDATE_LIMIT):
+    """Run update() until every existing prediction has been folded in"""
+    total = 0
+    while n := update(path, limit):
+        total += n
+    return total
+
+
+def drift_report(path=DB_PATH):
+    """Per-column comparison of live predictions against the training reference"""
+    with get_connection(path) as conn:
+        create_drift_tables(conn)
+        reference = _load_sketches(conn, 'reference')
+        live = _load_sketches(conn, 'live')
+        state = _read_state(conn)
+
+    rows = []
+    for name in COLUMNS:
+        ref, cur = reference.get(name), live.get(name)
+        if ref is None or cur is None or ref.count == 0 or cur.count == 0:
+            continue
+        score = psi(ref, cur)
+        rows.append({
+            'name': name,
+            'live_rows': cur.count,
+            'reference_mean': ref.mean,
+            'live_mean': cur.mean,
+            'mean_shift_sd': (cur.mean - ref.mean) / ref.std if ref.std else 0.0,
+            'reference_median': ref.quantile(0.5),
+            'live_median': cur.quantile(0.5),
+            'live_p05': cur.quantile(0.05),
+            'live_p95': cur.quantile(0.95),
+            'psi': score,
+            'ks': ks(ref, cur),
+            'status': 'drift' if score >= PSI_ALERT else 'watch' if score >= PSI_WARN else 'stable',
+        })
+    return {'state': state, 'columns': rows}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Input/probability drift of logged predictions vs the training data.")
+    parser.add_argument('--rebuild-reference', action='store_true',
+                        help="re-sketch the training CSV (resets the live sketches); done anyway when there is none")
+    parser.add_argument('--csv', default=REFERENCE_CSV, help="training CSV used as the reference")
+    parser.add_argument('--db', default=DB_PATH)
+    args = parser.parse_args()
+
+    if args.rebuild_reference or not has_reference(args.db):
+        build_reference(args.csv, args.db)
+    n = catch_up(args.db)
+    print(f"Folded in {n:,} new prediction(s)", file=sys.stderr)
+    report = drift_report(args.db)
+    print(pd.DataFrame(report['columns']).to_string(index=False, float_format=lambda v: f"{v:.3f}"))
@@ -0,0 +1,114 @@
+# ensemble.py
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from compiled_forest import CompiledForest, compile_forest, is_forest
+from mmap_model import load_artifact
+from model_registry import MODEL_DIR, registry
+from utils import FEATURE_NAMES, fused_model, load_model_entries
+
+# name -> (artifact, whether it was trained on scaler.pkl output).
+# diabetes_model.pkl comes from train_model.py (scaled arrays); the other
+# three were fitted on the raw feature DataFrame.
+ENSEMBLE_MODELS = {
+    'Random Forest (scaled)': ('diabetes_model.pkl', True),
+    'Logistic Regression': ('logistic_regression.pkl', False),
+    'Random Forest': ('random_forest.pkl', False),
+    'SVM': ('svm.pkl', False),
+}
+
+METHODS = ('soft', 'hard')
+
+_executor = ThreadPoolExecutor(max_workers=len(ENSEMBLE_MODELS), thread_name_prefix='ensemble')
+
+
+def _predictor(entry, scaler_entry):
+    """(predictor, input kind) for one zoo model; kind is 'raw', 'scaled' or 'frame'
+
+    Forests run as compiled flat arrays. Linear and kernel models run fused
+    (fused_model.py): scaler.pkl folded in for the model trained on it,
+    plain numpy for the ones trained on the raw DataFrame; either way they
+    take the raw feature row and skip sklearn's per-call validation. Only
+    what cannot be compiled or fused goes through sklearn.
+    """
+    model = entry.obj
+    if isinstance(model, CompiledForest) or is_forest(model):
+        compiled = model if isinstance(model, CompiledForest) else entry.derive('compiled_forest', compile_forest)
+        return compiled, 'raw' if scaler_entry is None else 'scaled'
+    fused = fused_model(entry, scaler_entry)
+    if fused is not None:
+        return fused, 'raw'
+    return model, 'frame' if scaler_entry is None else 'scaled'
+
+
+def _score(predictor, X):
+    """Positive-class probability and label from one model, plus its wall time"""
+    start = time.perf_counter()
+    proba = predictor.predict_proba(X)[0]
+    if isinstance(predictor, CompiledForest):
+        label = predictor.classes_[proba.argmax()]
+    else:
+        # An SVC's label follows its decision function, not always its Platt probability
+        label = predictor.predict(X)[0]
+    return int(label), float(proba[-1]), time.perf_counter() - start
+
+
+def ensemble_predict(input_data, method='soft', weights=None, models=None):
+    """Score one patient with every model in the zoo concurrently.
+
+    method='soft' averages the positive-class probabilities, 'hard' takes
+    the (weighted) majority of the labels. weights maps model name to
+    weight and defaults to 1 for every model.
+    """
+    if method not in METHODS:
+        raise ValueError(f"method must be one of {METHODS}, got {method!r}")
+    models = models or ENSEMBLE_MODELS
+    start = time.perf_counter()
+
+    # The served model and scaler come as a pair promoted together
+    model_entry, scaler_entry = load_model_entries()
+    predictors = {}
+    for name, (artifact, needs_scaling) in models.items():
+        path = os.path.join(MODEL_DIR, artifact)
+        entry = model_entry if os.path.abspath(path) == model_entry.path else registry.get_entry(
+            path, loader=load_artifact)
+        predictors[name] = _predictor(entry, scaler_entry if needs_scaling else None)
+
+    inputs = {'raw': np.asarray(input_data, dtype=float).reshape(1, -1)}
+    kinds = {kind for _, kind in predictors.values()}
+    if kinds & {'frame', 'scaled'}:
+        inputs['frame'] = pd.DataFrame(inputs['raw'], columns=FEATURE_NAMES)
+    if 'scaled' in kinds:
+        # The shared scaler runs once; every model that still needs it reuses the result
+        inputs['scaled'] = scaler_entry.obj.transform(inputs['frame'])
+
+    futures = {
+        name: _executor.submit(_score, predictor, inputs[kind])
+        for name, (predictor, kind) in predictors.items()
+    }
+    results = {}
+    for name, future in futures.items():
+        label, probability, seconds = future.result()
+        results[name] = {'prediction': label, 'probability': round(probability * 100, 2), 'seconds': seconds}
+
+    w = np.array([(weights or {}).get(name, 1.0) for name in results], dtype=float)
+    if method == 'soft':
+        probs = np.array([r['probability'] for r in results.values()])
+        probability = float(np.average(probs, weights=w))
+        prediction = int(probability >= 50)
+    else:
+        labels = np.array([r['prediction'] for r in results.values()])
+        probability = float(np.average(labels, weights=w) * 100)
+        prediction = int(probability > 50)
+
+    return {
+        'prediction': prediction,
+        'probability': round(probability, 2),
+        'method': method,
+        'models': results,
+        'seconds': time.perf_counter() - start,
+    }
@@ -0,0 +1,151 @@
+# fused_model.py
+import argparse
+
+import numpy as np
+
+from mmap_model import MappedLinear, MappedSVC
+
+# Largest allowed |fused - unfused| on probabilities and decision values
+TOLERANCE = 1e-9
+
+
+def _scaler_terms(scaler, n_features):
+    """(mean, scale) of a StandardScaler-like object; identity when scaler is None"""
+    mean = getattr(scaler, 'mean_', None)
+    scale = getattr(scaler, 'scale_', None)
+    mean = np.zeros(n_features) if mean is None else np.asarray(mean, dtype=np.float64)
+    scale = np.ones(n_features) if scale is None else np.asarray(scale, dtype=np.float64)
+    return mean, scale
+
+
+def fuse_linear(model, scaler=None):
+    """Fold (x - mean) / scale into a logistic model: w' = w / scale, b' = b - w' . mean"""
+    coef = np.asarray(model.coef_, dtype=np.float64)
+    mean, scale = _scaler_terms(scaler, coef.shape[1])
+    fused_coef = coef / scale
+    fused_intercept = np.asarray(model.intercept_, dtype=np.float64) - fused_coef @ mean
+    return MappedLinear(np.ascontiguousarray(fused_coef), fused_intercept, np.asarray(model.classes_))
+
+
+class FusedSVC(MappedSVC):
+    """Binary SVC whose kernel terms absorb the scaler, so it takes raw features.
+
+    With z = (x - mean) / scale, each support vector v maps back to raw
+    space as c = mean + scale * v, and
+        z . v       = x . (v / scale) - mean . (v / scale)
+        |z - v|^2   = x' D x - 2 x' D c + c' D c,   D = diag(1 / scale^2)
+    so one matmul against precomputed columns replaces transform + kernel.
+    """
+
+    def __init__(self, model, scaler=None):
+        gamma = getattr(model, '_gamma', None)
+        # sklearn leaves probA_ empty when the SVC was fit with probability=False
+        prob_a, prob_b = getattr(model, 'probA_', None), getattr(model, 'probB_', None)
+        if prob_a is not None and len(prob_a) == 0:
+            prob_a = prob_b = None
+        super().__init__(
+            np.asarray(model.support_vectors_, dtype=np.float64), np.asarray(model.dual_coef_),
+            np.asarray(model.intercept_), np.asarray(model.classes_), model.kernel,
+            float(model.gamma if gamma is None else gamma), float(model.coef0), int(model.degree),
+            prob_a, prob_b,
+        )
+        sv = self.support_vectors_
+        mean, scale = _scaler_terms(scaler, sv.shape[1])
+        self._inv_var = 1 / scale ** 2
+        if self.kernel == 'rbf':
+            centres = mean + scale * sv
+            self._columns = np.ascontiguousarray((centres * self._inv_var).T)
+            self._offset = np.einsum('ij,ij->i', centres * self._inv_var, centres)
+        else:
+            self._columns = np.ascontiguousarray((sv / scale).T)
+            self._offset = -(mean @ self._columns)
+
+    def _kernel(self, X):
+        dot = X @ self._columns
+        if self.kernel == 'rbf':
+            sq_dist = (X * X) @ self._inv_var
+            sq_dist = sq_dist[:, None] + self._offset - 2 * dot
+            return np.exp(-self.gamma * np.maximum(sq_dist, 0))
+        dot = dot + self._offset
+        if self.kernel == 'linear':
+            return dot
+        if self.kernel == 'poly':
+            return (self.gamma * dot + self.coef0) ** self.degree
+        return np.tanh(self.gamma * dot + self.coef0)
+
+
+def _probe(scaler, model, n=512, seed=0):
+    """Inputs for the equivalence check, spread like the data the model sees"""
+    rng = np.random.default_rng(seed)
+    n_features = len(model.coef_[0]) if hasattr(model, 'coef_') else model.support_vectors_.shape[1]
+    if scaler is not None:
+        mean, scale = _scaler_terms(scaler, n_features)
+        return mean + scale * rng.normal(0, 1.5, (n, n_features))
+    if hasattr(model, 'support_vectors_'):
+        sv = np.asarray(model.support_vectors_, dtype=np.float64)
+        return sv[rng.integers(0, len(sv), n)] * rng.normal(1, 0.1, (n, n_features))
+    return rng.normal(0, 10, (n, n_features))
+
+
+def check_fused(model, scaler, fused, X):
+    """Raise AssertionError unless fused(X) matches model(scaler.transform(X))"""
+    X = np.asarray(X, dtype=np.float64)
+    Z = X if scaler is None else scaler.transform(X)
+    Z = np.asarray(Z, dtype=np.float64)
+    expected_labels = model.predict(Z)
+    if not np.array_equal(expected_labels, fused.predict(X)):
+        raise AssertionError("Fused model predicts different labels")
+    if hasattr(model, 'decision_function'):
+        diff = np.abs(np.asarray(model.decision_function(Z)) - fused.decision_function(X)).max()
+        if diff > TOLERANCE * max(1.0, np.abs(model.decision_function(Z)).max()):
+            raise AssertionError(f"Decision values differ by {diff}")
+    if getattr(fused, 'probA_', True) is not None:
+        diff = np.abs(model.predict_proba(Z) - fused.predict_proba(X)).max()
+        if diff > TOLERANCE:
+            raise AssertionError(f"Probabilities differ by {diff}")
+
+
+def compile_fused(model, scaler=None, X_check=None):
+    """Fused predictor taking raw features, or None if model is not fusable.
+
+    Handles logistic-link linear models and binary kernel SVCs (sklearn or
+    memory-mapped). The result is checked against model + scaler on
+    X_check (or generated probe rows); a failed check raises.
+    """
+    name = type(model).__name__
+    is_logistic = (name in ('LogisticRegression', 'MappedLinear')
+                   or (name == 'SGDClassifier' and model.loss == 'log_loss'))
+    if is_logistic and len(model.classes_) == 2:
+        fused = fuse_linear(model, scaler)
+    elif hasattr(model, 'support_vectors_') and hasattr(model, 'dual_coef_') and len(model.classes_) == 2 \
+            and model.kernel in ('linear', 'rbf', 'poly', 'sigmoid'):
+        fused = FusedSVC(model, scaler)
+    else:
+        return None
+    check_fused(model, scaler, fused, _probe(scaler, model) if X_check is None else X_check)
+    return fused
+
+
+if __name__ == "__main__":
+    import os
+
+    import joblib
+    import pandas as pd
+
+    parser = argparse.ArgumentParser(description="Fuse a scaler into a linear/SVC model and check equivalence.")
+    parser.add_argument('model', help="pickled LogisticRegression / SGDClassifier / SVC")
+    parser.add_argument('--scaler', help="pickled StandardScaler applied before the model (default: none)")
+    parser.add_argument('--check-csv', default=os.path.join(os.path.dirname(__file__), '..', 'diabetes.csv'))
+    args = parser.parse_args()
+
+    model = joblib.load(args.model)
+    scaler = joblib.load(args.scaler) if args.scaler else None
+    X = None
+    if os.path.exists(args.check_csv):
+        X = pd.read_csv(args.check_csv).drop(columns='Outcome', errors='ignore').to_numpy(dtype=np.float64)
+    fused = compile_fused(model, scaler, X)
+    if fused is None:
+        print(f"{type(model).__name__} cannot be fused")
+    else:
+        print(f"Fused {type(model).__name__} -> {type(fused).__name__}, equivalent on "
+              f"{len(X) if X is not None else 'probe'} rows")
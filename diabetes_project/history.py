@@ -2,6 +2,80 @@ import streamlit as st
 import sqlite3
 import pandas as pd
 
+from db_pool import get_connection
+from history_export import export_file
+from metrics import timed
+
+PAGE_SIZE = 50
+
+COLUMNS = [
+    "Pregnancies", "Glucose", "Blood Pressure", "Skin Thickness",
+    "Insulin", "BMI", "DPF", "Age", "Prediction", "Probability", "Date"
+]
+
+
+@timed('db.history.get_summary')
+def get_summary(conn, username):
+    """Return (total, high_risk) for a user without scanning their predictions"""
+    try:
+        row = conn.execute(
+            "SELECT total, high_risk FROM prediction_summary WHERE username=?", (username,)
+        ).fetchone()
+        return row if row else (0, 0)
+    except sqlite3.OperationalError:
+        # Database created before the summary table migration
+        return conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(prediction IS 1), 0) FROM predictions WHERE username=?",
+            (username,)
+        ).fetchone()
+
+
+@timed('db.history.get_page')
+def get_page(conn, username, after=None, limit=PAGE_SIZE):
+    """Fetch one page of a user's predictions, newest first.
+
+    after is the (date, id) of the last row of the previous page. Seeking
+    past it on the (username, date, id) index keeps every page as cheap as
+    the first one, however long the history is.
+    """
+    query = '''
+        SELECT pregnancies, glucose, blood_pressure, skin_thickness, insulin,
+               bmi, dpf, age,
+               CASE prediction WHEN 1 THEN 'High Risk' WHEN 0 THEN 'Low Risk' END,
+               probability, date, id
+        FROM predictions
+        WHERE username=?
+    '''
+    params = [username]
+    if after is not None:
+        query += " AND (date, id) < (?, ?)"
+        params += list(after)
+    query += " ORDER BY date DESC, id DESC LIMIT ?"
+    params.append(limit)
+    return conn.execute(query, params).fetchall()
+
+
+def export_section(username):
+    """Download the user's full history (optionally one date range) without loading it into a dataframe"""
+    st.subheader("Export")
+    col_format, col_range = st.columns([1, 2])
+    with col_format:
+        fmt = st.radio("Format", ["CSV", "Parquet"], horizontal=True, key="export_format")
+    with col_range:
+        days = st.date_input("Date range (optional)", value=(), key="export_range")
+    start = days[0] if len(days) > 0 else None
+    end = days[1] if len(days) > 1 else None
+
+    ext = fmt.lower()
+    # Generated only when clicked, streamed from SQLite into a temporary file
+    st.download_button(
+        f"Download {fmt}",
+        data=lambda: export_file(ext, username, start, end),
+        file_name=f"predictions_{username}.{ext}",
+        mime="text/csv" if ext == "csv" else "application/vnd.apache.parquet",
+        on_click="ignore",
+    )
+
 
 def history():
     """Prediction history page"""
@@ -11,37 +85,48 @@ def history():
         st.warning("Please login first to view history.")
         return
 
-    conn = sqlite3.connect('db/diabetes_app.db')
-    c = conn.cursor()
+    username = st.session_state["username"]
+    # Keys of the last row of every page before the current one
+    if st.session_state.get("history_user") != username:
+        st.session_state["history_user"] = username
+        st.session_state["history_cursors"] = []
+    cursors = st.session_state["history_cursors"]
 
     try:
-        c.execute('''
-            SELECT pregnancies, glucose, blood_pressure, skin_thickness, insulin, 
-                   bmi, dpf, age, prediction, probability, date 
-            FROM predictions 
-            WHERE username=? 
-            ORDER BY date DESC
-        ''', (st.session_state["username"],))
+        with get_connection() as conn:
+            total_predictions, high_risk_count = get_summary(conn, username)
+            # One extra row tells us whether there is a next page
+            rows = get_page(conn, username, cursors[-1] if cursors else None, PAGE_SIZE + 1)
 
-        rows = c.fetchall()
+        if total_predictions:
+            has_next = len(rows) > PAGE_SIZE
+            rows = rows[:PAGE_SIZE]
 
-        if rows:
-            df = pd.DataFrame(rows, columns=[
-                "Pregnancies", "Glucose", "Blood Pressure", "Skin Thickness",
-                "Insulin", "BMI", "DPF", "Age", "Prediction", "Probability", "Date"
-            ])
+            df = pd.DataFrame([row[:-1] for row in rows], columns=COLUMNS)
+            st.dataframe(
+                df,
+                use_container_width=True,
+                column_config={"Probability": st.column_config.NumberColumn(format="%.1f%%")},
+            )
 
-            # Format prediction column
-            df["Prediction"] = df["Prediction"].map({0: "Low Risk", 1: "High Risk"})
-            df["Probability"] = df["Probability"].round(1).astype(str) + "%"
-
-            st.dataframe(df, use_container_width=True)
+            # Pagination
+            page = len(cursors) + 1
+            pages = max(1, -(-total_predictions // PAGE_SIZE))
+            col_prev, col_page, col_next = st.columns([1, 2, 1])
+            with col_prev:
+                if st.button("← Newer", disabled=not cursors):
+                    cursors.pop()
+                    st.rerun()
+            with col_page:
+                st.caption(f"Page {page} of {pages}")
+            with col_next:
+                if st.button("Older →", disabled=not has_next):
+                    last = rows[-1]
+                    cursors.append((last[10], last[11]))
+                    st.rerun()
 
             # Summary statistics
             st.subheader("Summary")
-            total_predictions = len(df)
-            high_risk_count = sum(df["Prediction"] == "High Risk")
-
             col1, col2, col3 = st.columns(3)
             with col1:
                 st.metric("Total Predictions", total_predictions)
@@ -50,10 +135,10 @@ def history():
             with col3:
                 st.metric("Low Risk Predictions", total_predictions - high_risk_count)
 
+            export_section(username)
+
         else:
             st.info("No prediction history found. Make your first prediction!")
 
     except sqlite3.Error as e:
         st.error(f"Database error: {e}")
-    finally:
-        conn.close()
\ No newline at end of file
@@ -0,0 +1,156 @@
+# history_export.py
+import argparse
+import csv
+import os
+import sys
+import tempfile
+from datetime import date, datetime, timedelta
+
+from db_pool import DB_PATH, get_connection
+
+BATCH_SIZE = 10_000
+
+# Same headers as prediction_history.csv, so an export can be re-imported
+# with prediction_logger.import_history_csv
+HEADERS = [
+    'Id', 'Username', 'Date', 'Pregnancies', 'Glucose', 'BloodPressure', 'SkinThickness',
+    'Insulin', 'BMI', 'DiabetesPedigreeFunction', 'Age', 'Prediction', 'Probability',
+]
+SELECT = '''
+    SELECT id, username, date, pregnancies, glucose, blood_pressure, skin_thickness,
+           insulin, bmi, dpf, age, prediction, probability
+    FROM predictions
+'''
+
+
+def _day(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(value)
+
+
+def export_query(username=None, start=None, end=None):
+    """SQL and parameters for the rows to export, oldest first.
+
+    start and end are dates (or 'YYYY-MM-DD'), both inclusive. With a
+    username the scan runs on idx_predictions_user_date; a date range
+    alone uses idx_predictions_date; with neither the table is read in
+    rowid order.
+    """
+    where, params = [], []
+    if username is not None:
+        where.append("username = ?")
+        params.append(username)
+    if start is not None:
+        where.append("date >= ?")
+        params.append(_day(start).isoformat())
+    if end is not None:
+        where.append("date < ?")
+        params.append((_day(end) + timedelta(days=1)).isoformat())
+    query = SELECT
+    if where:
+        query += " WHERE " + " AND ".join(where)
+    query += " ORDER BY date, id" if where else " ORDER BY id"
+    return query, params
+
+
+def iter_batches(conn, username=None, start=None, end=None, batch_size=BATCH_SIZE):
+    """Yield lists of up to batch_size rows from one cursor (fetchmany), never the whole result"""
+    cursor = conn.execute(*export_query(username, start, end))
+    try:
+        while batch := cursor.fetchmany(batch_size):
+            yield batch
+    finally:
+        cursor.close()
+
+
+def write_csv(f, username=None, start=None, end=None, path=DB_PATH, batch_size=BATCH_SIZE):
+    """Stream matching rows to the text file f as CSV; returns the row count"""
+    writer = csv.writer(f)
+    writer.writerow(HEADERS)
+    n = 0
+    with get_connection(path) as conn:
+        for batch in iter_batches(conn, username, start, end, batch_size):
+            writer.writerows(batch)
+            n += len(batch)
+    return n
+
+
+def _parquet_schema():
+    import pyarrow as pa
+
+    types = [pa.int64(), pa.string(), pa.string()] + [pa.float64()] * 8 + [pa.int64(), pa.float64()]
+    return pa.schema(list(zip(HEADERS, types)))
+
+
+def write_parquet(f, username=None, start=None, end=None, path=DB_PATH, batch_size=BATCH_SIZE):
+    """Stream matching rows to f (a path or binary file) as Parquet, one row group per batch"""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Parquet output needs pyarrow (pip install pyarrow)") from None
+
+    schema = _parquet_schema()
+    n = 0
+    with pq.ParquetWriter(f, schema) as writer, get_connection(path) as conn:
+        for batch in iter_batches(conn, username, start, end, batch_size):
+            columns = list(zip(*batch))
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(c, type=t) for c, t in zip(columns, schema.types)], schema=schema))
+            n += len(batch)
+    return n
+
+
+WRITERS = {'csv': write_csv, 'parquet': write_parquet}
+
+
+def export_file(fmt, username=None, start=None, end=None, path=DB_PATH):
+    """Export to a temporary file and return it open for reading at the start (for st.download_button).
+
+    Rows go to disk batch by batch. The result is a plain binary file
+    (io.BufferedReader), one of the types Streamlit's download button
+    accepts; its name is unlinked straight away, so the data goes once the
+    file is closed.
+    """
+    fd, tmp_path = tempfile.mkstemp(prefix='export-', suffix=f'.{fmt}')
+    try:
+        if fmt == 'csv':
+            with open(fd, 'w', encoding='utf-8', newline='') as f:
+                write_csv(f, username, start, end, path)
+        else:
+            with open(fd, 'wb') as f:
+                write_parquet(f, username, start, end, path)
+        return open(tmp_path, 'rb')
+    finally:
+        os.unlink(tmp_path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stream the predictions table to CSV or Parquet.")
+    parser.add_argument('out', help="output file (.csv or .parquet), or - for CSV on stdout")
+    parser.add_argument('--format', choices=sorted(WRITERS), help="output format (default: from the file name)")
+    parser.add_argument('--username', help="only this user's predictions (default: all users)")
+    parser.add_argument('--start', help="first day to include, YYYY-MM-DD")
+    parser.add_argument('--end', help="last day to include, YYYY-MM-DD")
+    parser.add_argument('--db', default=DB_PATH)
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+
+    fmt = args.format or ('csv' if args.out == '-' else
+                          {'.csv': 'csv', '.parquet': 'parquet'}.get(os.path.splitext(args.out)[1].lower()))
+    if fmt is None:
+        parser.error("cannot tell the format from the file name; pass --format")
+
+    kwargs = dict(username=args.username, start=args.start, end=args.end, path=args.db,
+                  batch_size=args.batch_size)
+    if args.out == '-':
+        n = write_csv(sys.stdout, **kwargs)
+    elif fmt == 'csv':
+        with open(args.out, 'w', newline='', encoding='utf-8') as f:
+            n = write_csv(f, **kwargs)
+    else:
+        n = write_parquet(args.out, **kwargs)
+    print(f"Exported {n:,} rows", file=sys.stderr)
@@ -0,0 +1,134 @@
+# hyperparam_search.py
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import accuracy_score, roc_auc_score
+from sklearn.model_selection import ParameterGrid, ParameterSampler, train_test_split
+from sklearn.preprocessing import StandardScaler
+
+from model_registry import PROJECT_DIR, file_sha256
+
+DATA_PATH = os.path.join(PROJECT_DIR, 'diabetes.csv')
+CACHE_DIR = os.path.join(PROJECT_DIR, 'cache', 'search')
+LEADERBOARD_PATH = os.path.join(PROJECT_DIR, 'data', 'search_leaderboard.csv')
+
+PARAM_GRID = {
+    'n_estimators': [100, 200, 400],
+    'max_depth': [None, 8, 16],
+    'min_samples_leaf': [1, 2, 4],
+    'max_features': ['sqrt', 0.5],
+}
+
+ARRAYS = ('X_train', 'X_test', 'y_train', 'y_test')
+
+# Memory-mapped split, opened once per worker process
+_data = None
+
+
+def prepare_split(data_path=DATA_PATH, cache_dir=CACHE_DIR):
+    """Split and scale the dataset once per content hash and return the cache directory
+
+    The arrays are stored as .npy files so every worker can memory-map the
+    same pages instead of receiving its own pickled copy.
+    """
+    split_dir = os.path.join(cache_dir, file_sha256(data_path)[:16])
+    if all(os.path.exists(os.path.join(split_dir, f'{name}.npy')) for name in ARRAYS):
+        return split_dir
+
+    df = pd.read_csv(data_path)
+    X = df.drop('Outcome', axis=1)
+    y = df['Outcome']
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+
+    scaler = StandardScaler()
+    arrays = {
+        'X_train': scaler.fit_transform(X_train),
+        'X_test': scaler.transform(X_test),
+        'y_train': y_train.to_numpy(),
+        'y_test': y_test.to_numpy(),
+    }
+
+    # Write to a temporary directory first so a crashed run never leaves a partial cache
+    tmp_dir = f'{split_dir}.tmp-{os.getpid()}'
+    os.makedirs(tmp_dir, exist_ok=True)
+    for name, array in arrays.items():
+        np.save(os.path.join(tmp_dir, f'{name}.npy'), np.ascontiguousarray(array))
+    try:
+        os.replace(tmp_dir, split_dir)
+    except OSError:
+        # Another run cached the same dataset first
+        for name in ARRAYS:
+            os.remove(os.path.join(tmp_dir, f'{name}.npy'))
+        os.rmdir(tmp_dir)
+    return split_dir
+
+
+def _init_worker(split_dir):
+    global _data
+    _data = {name: np.load(os.path.join(split_dir, f'{name}.npy'), mmap_mode='r') for name in ARRAYS}
+
+
+def evaluate(params):
+    """Fit one configuration on the shared split and score it on the test set"""
+    start = time.perf_counter()
+    model = RandomForestClassifier(random_state=42, n_jobs=1, **params)
+    model.fit(_data['X_train'], _data['y_train'])
+    fit_seconds = time.perf_counter() - start
+
+    proba = model.predict_proba(_data['X_test'])
+    return {
+        **params,
+        'accuracy': accuracy_score(_data['y_test'], model.classes_.take(proba.argmax(axis=1))),
+        'roc_auc': roc_auc_score(_data['y_test'], proba[:, 1]),
+        'fit_seconds': round(fit_seconds, 3),
+    }
+
+
+def search(param_grid=PARAM_GRID, n_iter=None, n_workers=None, data_path=DATA_PATH,
+           leaderboard_path=LEADERBOARD_PATH, seed=42):
+    """Evaluate the full grid (or n_iter random samples of it) across all cores
+
+    Returns the leaderboard DataFrame, best configuration first, and writes it
+    to leaderboard_path.
+    """
+    if n_iter:
+        candidates = list(ParameterSampler(param_grid, n_iter=n_iter, random_state=seed))
+    else:
+        candidates = list(ParameterGrid(param_grid))
+
+    split_dir = prepare_split(data_path)
+    print(f"Evaluating {len(candidates)} configurations on {n_workers or os.cpu_count()} workers...")
+
+    results = []
+    with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker, initargs=(split_dir,)) as pool:
+        futures = [pool.submit(evaluate, params) for params in candidates]
+        for i, future in enumerate(as_completed(futures), 1):
+            result = future.result()
+            results.append(result)
+            print(f"[{i}/{len(candidates)}] roc_auc={result['roc_auc']:.4f} accuracy={result['accuracy']:.3f} {result}")
+
+    leaderboard = pd.DataFrame(results).sort_values(['roc_auc', 'accuracy'], ascending=False, ignore_index=True)
+    leaderboard.insert(0, 'dataset', os.path.basename(split_dir))
+    os.makedirs(os.path.dirname(leaderboard_path), exist_ok=True)
+    leaderboard.to_csv(leaderboard_path, index=False)
+    print(f"Leaderboard saved to {leaderboard_path}")
+    return leaderboard
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parallel RandomForest hyperparameter search.")
+    parser.add_argument('--data', default=DATA_PATH, help="diabetes.csv-shaped training file")
+    parser.add_argument('--n-iter', type=int, default=None,
+                        help="evaluate this many random configurations instead of the full grid")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument('--leaderboard', default=LEADERBOARD_PATH)
+    args = parser.parse_args()
+
+    board = search(n_iter=args.n_iter, n_workers=args.workers, data_path=args.data,
+                   leaderboard_path=args.leaderboard)
+    print(board.head(5).to_string())
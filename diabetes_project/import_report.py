@@ -0,0 +1,74 @@
+# import_report.py
+import argparse
+import subprocess
+import sys
+
+from model_registry import PROJECT_DIR
+
+# What each sidebar entry imports the first time it is opened
+PAGE_MODULES = {
+    'app (login screen)': ['streamlit', 'auth', 'page_registry', 'login', 'signup'],
+    'Predict Diabetes': ['utils', 'ensemble'],
+    'Model Info': ['model_info'],
+    'Prediction History': ['history'],
+    'Charts & Visualization': ['charts'],
+}
+
+
+def measure(modules, cwd=PROJECT_DIR):
+    """Import modules in a fresh interpreter under -X importtime.
+
+    Returns {module: cumulative microseconds} for every module that got
+    imported, plus the total under the key None.
+    """
+    code = '; '.join(f'import {m}' for m in modules) or 'pass'
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=cwd, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"Importing {modules} failed:\n{proc.stderr[-2000:]}")
+
+    times = {}
+    top_level = 0
+    for line in proc.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        name = name.strip()
+        times[name] = int(cumulative)
+        if depth == 0:
+            top_level += int(cumulative)
+    times[None] = top_level
+    return times
+
+
+def report(pages=PAGE_MODULES, top=10, budget_ms=None):
+    """Print per-page import time and the slowest modules; return the pages over budget"""
+    over = []
+    for page, modules in pages.items():
+        times = measure(modules)
+        total_ms = times.pop(None) / 1000
+        flag = ''
+        if budget_ms is not None and total_ms > budget_ms:
+            over.append(page)
+            flag = f'  OVER BUDGET ({budget_ms:.0f} ms)'
+        print(f"\n{page}: {total_ms:.1f} ms{flag}")
+        for name, us in sorted(times.items(), key=lambda kv: kv[1], reverse=True)[:top]:
+            print(f"  {us / 1000:8.1f} ms  {name}")
+    return over
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cold-import time per page (python -X importtime).")
+    parser.add_argument('--top', type=int, default=10, help="slowest modules to list per page")
+    parser.add_argument('--budget-ms', type=float, default=None,
+                        help="exit with status 1 if any page takes longer than this to import")
+    args = parser.parse_args()
+
+    over_budget = report(top=args.top, budget_ms=args.budget_ms)
+    if over_budget:
+        print(f"\nOver budget: {', '.join(over_budget)}")
+        sys.exit(1)
@@ -0,0 +1,142 @@
+# incremental_training.py
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import SGDClassifier
+from sklearn.preprocessing import StandardScaler
+
+from model_registry import MODEL_DIR
+from training_jobs import promote
+from utils import FEATURE_NAMES, MODEL_PATH, SCALER_PATH
+
+CHUNK_SIZE = 100_000
+CLASSES = np.array([0, 1])
+# Every HOLDOUT_EVERY-th row (by position in the file) is held out for evaluation
+HOLDOUT_EVERY = 10
+
+
+def iter_csv(path, chunksize=CHUNK_SIZE):
+    """Yield (row offsets, X, y) for each chunk of a diabetes.csv-shaped file"""
+    offset = 0
+    for chunk in pd.read_csv(path, chunksize=chunksize, usecols=FEATURE_NAMES + ['Outcome']):
+        rows = np.arange(offset, offset + len(chunk))
+        offset += len(chunk)
+        yield rows, chunk[FEATURE_NAMES].to_numpy(dtype=np.float64), chunk['Outcome'].to_numpy()
+
+
+def _load_warm_start(model_dir):
+    model = joblib.load(os.path.join(model_dir, os.path.basename(MODEL_PATH)))
+    scaler = joblib.load(os.path.join(model_dir, os.path.basename(SCALER_PATH)))
+    if not hasattr(model, 'partial_fit'):
+        raise ValueError(f"Cannot warm-start from {type(model).__name__}: it has no partial_fit. "
+                         "Train once without --warm-start first.")
+    return model, scaler
+
+
+def train_incremental(csv_path, out_dir=MODEL_DIR, chunksize=CHUNK_SIZE, epochs=1,
+                      warm_start=False, seed=42, progress=None):
+    """Train scaler + SGD logistic regression from a CSV that need not fit in memory.
+
+    Only one chunk is held at a time. A first pass fits the StandardScaler
+    with partial_fit; each epoch then streams the file again through
+    SGDClassifier.partial_fit (rows shuffled within their chunk). Rows whose
+    position is a multiple of HOLDOUT_EVERY are never trained on; during the
+    last epoch each chunk's holdout rows are scored once the model has been
+    updated on that chunk (the first chunk included), which costs no extra
+    pass.
+
+    With warm_start the saved model and scaler in out_dir are loaded and
+    training continues from them; the scaler is kept as-is so the model's
+    coefficients stay valid.
+
+    The artifacts replace out_dir's model/scaler files atomically.
+    Returns a dict of row counts, holdout accuracy/log loss and timings.
+    """
+    progress = progress or (lambda fraction, message: None)
+    rng = np.random.default_rng(seed)
+    start = time.perf_counter()
+    total_steps = epochs + (0 if warm_start else 1)
+
+    if warm_start:
+        model, scaler = _load_warm_start(out_dir)
+    else:
+        model = SGDClassifier(loss='log_loss', alpha=1e-4, random_state=seed)
+        scaler = StandardScaler()
+        n = 0
+        for rows, X, _ in iter_csv(csv_path, chunksize):
+            scaler.partial_fit(X[rows % HOLDOUT_EVERY != 0])
+            n += len(rows)
+        progress(1 / total_steps, f"Fitted scaler on {n:,} rows")
+
+    trained = correct = held_out = 0
+    log_loss_sum = 0.0
+    for epoch in range(epochs):
+        last_epoch = epoch == epochs - 1
+        for rows, X, y in iter_csv(csv_path, chunksize):
+            X = scaler.transform(X)
+            holdout = rows % HOLDOUT_EVERY == 0
+
+            train_idx = np.flatnonzero(~holdout)
+            rng.shuffle(train_idx)
+            if len(train_idx):
+                model.partial_fit(X[train_idx], y[train_idx], classes=CLASSES)
+            if epoch == 0:
+                trained += len(train_idx)
+
+            # Held-out rows are never trained on, so scoring them right after
+            # this chunk's update is still an unseen-data estimate
+            if last_epoch and holdout.any() and hasattr(model, 'coef_'):
+                proba = np.clip(model.predict_proba(X[holdout])[:, 1], 1e-15, 1 - 1e-15)
+                y_hold = y[holdout]
+                correct += int(((proba >= 0.5) == y_hold).sum())
+                log_loss_sum -= float(np.sum(y_hold * np.log(proba) + (1 - y_hold) * np.log(1 - proba)))
+                held_out += int(holdout.sum())
+        done = epoch + 1 + (0 if warm_start else 1)
+        progress(done / total_steps, f"Epoch {epoch + 1}/{epochs} done")
+
+    # Stage next to the live files, then swap them in (promote writes the manifest last)
+    os.makedirs(out_dir, exist_ok=True)
+    staging_dir = tempfile.mkdtemp(prefix='.staging-', dir=out_dir)
+    try:
+        joblib.dump(model, os.path.join(staging_dir, os.path.basename(MODEL_PATH)))
+        joblib.dump(scaler, os.path.join(staging_dir, os.path.basename(SCALER_PATH)))
+        promote(staging_dir, out_dir)
+    finally:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+
+    return {
+        'rows_trained': trained,
+        'rows_held_out': held_out,
+        'epochs': epochs,
+        'warm_start': warm_start,
+        'holdout_accuracy': correct / held_out if held_out else None,
+        'holdout_log_loss': log_loss_sum / held_out if held_out else None,
+        'seconds': time.perf_counter() - start,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Out-of-core training (StandardScaler + SGD logistic regression).")
+    parser.add_argument('csv', help="diabetes.csv-shaped training file of any size")
+    parser.add_argument('--out-dir', default=MODEL_DIR, help="where diabetes_model.pkl / scaler.pkl are written")
+    parser.add_argument('--chunksize', type=int, default=CHUNK_SIZE)
+    parser.add_argument('--epochs', type=int, default=1)
+    parser.add_argument('--warm-start', action='store_true',
+                        help="continue training the saved SGD model instead of starting over")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    result = train_incremental(
+        args.csv, args.out_dir, args.chunksize, args.epochs, args.warm_start, args.seed,
+        progress=lambda fraction, message: print(f"[{fraction:4.0%}] {message}"),
+    )
+    accuracy = result['holdout_accuracy']
+    print(f"Trained on {result['rows_trained']:,} rows in {result['seconds']:.1f}s; "
+          f"holdout accuracy {'n/a' if accuracy is None else f'{accuracy:.3f}'} "
+          f"on {result['rows_held_out']:,} rows")
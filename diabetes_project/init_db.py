@@ -1,55 +1,183 @@
-import sqlite3
-import os
+from db_pool import DB_PATH, get_connection
+from auth import create_sessions_table, purge_expired_sessions
+from drift_monitor import create_drift_tables
+from training_jobs import create_jobs_table
 
+# Schema migrations (SQL scripts), applied in order. PRAGMA user_version
+# records how many have run, so init_database() is safe to call on an
+# existing database.
+MIGRATIONS = [
+    # 1: per-user history/chart queries filter on username and sort on date;
+    # (date, id) also gives a unique key for keyset pagination
+    '''
+    CREATE INDEX IF NOT EXISTS idx_predictions_user_date
+        ON predictions (username, date, id)
+    ''',
+    # 2: covering index for the charts query and the per-user summary counts,
+    # so they never touch the table itself
+    '''
+    CREATE INDEX IF NOT EXISTS idx_predictions_user_charts
+        ON predictions (username, date, prediction, probability, glucose, bmi, age)
+    ''',
+    # 3: per-user totals kept up to date by triggers, so the history summary
+    # is a primary-key lookup instead of a count over every prediction
+    '''
+    CREATE TABLE IF NOT EXISTS prediction_summary (
+        username TEXT PRIMARY KEY,
+        total INTEGER NOT NULL DEFAULT 0,
+        high_risk INTEGER NOT NULL DEFAULT 0
+    );
 
-def init_database():
+    INSERT OR REPLACE INTO prediction_summary (username, total, high_risk)
+        SELECT username, COUNT(*), SUM(prediction IS 1) FROM predictions GROUP BY username;
+
+    CREATE TRIGGER IF NOT EXISTS trg_prediction_summary_insert AFTER INSERT ON predictions
+    BEGIN
+        INSERT INTO prediction_summary (username, total, high_risk)
+            VALUES (NEW.username, 1, NEW.prediction IS 1)
+            ON CONFLICT (username) DO UPDATE SET
+                total = total + 1,
+                high_risk = high_risk + (NEW.prediction IS 1);
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS trg_prediction_summary_delete AFTER DELETE ON predictions
+    BEGIN
+        UPDATE prediction_summary
+            SET total = total - 1, high_risk = high_risk - (OLD.prediction IS 1)
+            WHERE username = OLD.username;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS trg_prediction_summary_update
+        AFTER UPDATE OF username, prediction ON predictions
+    BEGIN
+        UPDATE prediction_summary
+            SET total = total - 1, high_risk = high_risk - (OLD.prediction IS 1)
+            WHERE username = OLD.username;
+        INSERT INTO prediction_summary (username, total, high_risk)
+            VALUES (NEW.username, 1, NEW.prediction IS 1)
+            ON CONFLICT (username) DO UPDATE SET
+                total = total + 1,
+                high_risk = high_risk + (NEW.prediction IS 1);
+    END;
+    ''',
+    # 4: a per-user change counter, bumped on every insert/update/delete, so
+    # cached pages (charts) can tell whether a user's predictions changed
+    '''
+    ALTER TABLE prediction_summary ADD COLUMN version INTEGER NOT NULL DEFAULT 0;
+    UPDATE prediction_summary SET version = total;
+
+    DROP TRIGGER IF EXISTS trg_prediction_summary_insert;
+    DROP TRIGGER IF EXISTS trg_prediction_summary_delete;
+    DROP TRIGGER IF EXISTS trg_prediction_summary_update;
+
+    CREATE TRIGGER trg_prediction_summary_insert AFTER INSERT ON predictions
+    BEGIN
+        INSERT INTO prediction_summary (username, total, high_risk, version)
+            VALUES (NEW.username, 1, NEW.prediction IS 1, 1)
+            ON CONFLICT (username) DO UPDATE SET
+                total = total + 1,
+                high_risk = high_risk + (NEW.prediction IS 1),
+                version = version + 1;
+    END;
+
+    CREATE TRIGGER trg_prediction_summary_delete AFTER DELETE ON predictions
+    BEGIN
+        UPDATE prediction_summary
+            SET total = total - 1, high_risk = high_risk - (OLD.prediction IS 1), version = version + 1
+            WHERE username = OLD.username;
+    END;
+
+    CREATE TRIGGER trg_prediction_summary_update AFTER UPDATE ON predictions
+    BEGIN
+        UPDATE prediction_summary
+            SET total = total - 1, high_risk = high_risk - (OLD.prediction IS 1), version = version + 1
+            WHERE username = OLD.username;
+        INSERT INTO prediction_summary (username, total, high_risk, version)
+            VALUES (NEW.username, 1, NEW.prediction IS 1, 1)
+            ON CONFLICT (username) DO UPDATE SET
+                total = total + 1,
+                high_risk = high_risk + (NEW.prediction IS 1),
+                version = version + 1;
+    END;
+    ''',
+    # 5: all-user date-range exports (history_export.py) seek on date
+    '''
+    CREATE INDEX IF NOT EXISTS idx_predictions_date
+        ON predictions (date, id)
+    ''',
+]
+
+
+def migrate(conn):
+    """Apply any migrations newer than the database's user_version"""
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    for number, script in enumerate(MIGRATIONS[version:], start=version + 1):
+        conn.executescript(f"BEGIN; {script}; PRAGMA user_version = {number}; COMMIT;")
+    return len(MIGRATIONS) - version
+
+
+def init_database(path=DB_PATH):
     """Initialize the database with required tables"""
-    # Create db directory if it doesn't exist
-    os.makedirs('db', exist_ok=True)
-
-    # Connect to database
-    conn = sqlite3.connect('db/diabetes_app.db')
-    c = conn.cursor()
-
-    # Create users table
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT UNIQUE NOT NULL,
-            password TEXT NOT NULL,
-            created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-
-    # Create predictions table
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS predictions (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT NOT NULL,
-            pregnancies INTEGER,
-            glucose REAL,
-            blood_pressure REAL,
-            skin_thickness REAL,
-            insulin REAL,
-            bmi REAL,
-            dpf REAL,
-            age INTEGER,
-            prediction INTEGER,
-            probability REAL,
-            date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (username) REFERENCES users (username)
-        )
-    ''')
-
-    # Commit changes and close connection
-    conn.commit()
-    conn.close()
+    # Connect to database (the pool creates the db directory and enables WAL)
+    with get_connection(path) as conn:
+        c = conn.cursor()
+
+        # Create users table
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS users (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                username TEXT UNIQUE NOT NULL,
+                password TEXT NOT NULL,
+                created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+
+        # Create predictions table
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS predictions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                username TEXT NOT NULL,
+                pregnancies INTEGER,
+                glucose REAL,
+                blood_pressure REAL,
+                skin_thickness REAL,
+                insulin REAL,
+                bmi REAL,
+                dpf REAL,
+                age INTEGER,
+                prediction INTEGER,
+                probability REAL,
+                date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (username) REFERENCES users (username)
+            )
+        ''')
+
+        # Create background training jobs table
+        create_jobs_table(c)
+
+        # Create login sessions table
+        create_sessions_table(c)
+
+        # Create drift monitor tables
+        create_drift_tables(c)
+
+        # Add indexes and other schema changes
+        applied = migrate(conn)
+        c.execute("ANALYZE")
+
+    purge_expired_sessions(path)
 
     print("✅ Database initialized successfully!")
+    print(f"Database: {path}")
     print("Created tables:")
     print("- users")
     print("- predictions")
+    print("- prediction_summary")
+    print("- training_jobs")
+    print("- sessions")
+    print("- drift_sketches, drift_state")
+    print(f"Applied {applied} migration(s)")
 
 
 if __name__ == "__main__":
-    init_database()
\ No newline at end of file
+    init_database()
@@ -0,0 +1,330 @@
+# load_test.py
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+from model_registry import PROJECT_DIR
+
+APP_PATH = os.path.join(PROJECT_DIR, 'app.py')
+SEED_DIR = os.path.join(PROJECT_DIR, 'cache', 'loadtest')
+RESULTS_PATH = os.path.join(PROJECT_DIR, 'data', 'load_test_results.json')
+
+# Action -> sidebar entry in app.py
+PAGES = {
+    'predict': "🩺 Predict Diabetes",
+    'history': "📜 Prediction History",
+    'charts': "📈 Charts & Visualization",
+}
+ACTIONS = ('login',) + tuple(PAGES)
+DEFAULT_MIX = {'login': 1, 'predict': 5, 'history': 3, 'charts': 2}
+DEFAULT_SESSIONS = (10, 50, 200)
+
+SAMPLE_ROW = [2, 140, 70, 30, 100, 32.5, 0.5, 45]
+
+
+class Session:
+    """One simulated browser session: an AppTest driving app.py like a clinician would.
+
+    Every AppTest has its own session state and runs the script on its
+    own thread, exactly as the Streamlit server does for each browser
+    tab, so N sessions in one process share the model, caches and
+    connection pool the way N real users share one server.
+    """
+
+    def __init__(self, username, password, rng, timeout=60):
+        self.username = username
+        self.password = password
+        self.rng = rng
+        self.timeout = timeout
+        self.at = None
+
+    def login(self):
+        from streamlit.testing.v1 import AppTest
+
+        # A fresh AppTest is a new browser session with no token
+        self.at = AppTest.from_file(APP_PATH, default_timeout=self.timeout)
+        self.at.run()
+        self.at.text_input[0].input(self.username)
+        self.at.text_input[1].input(self.password)
+        self.at.button[0].click().run()
+        return self._problems()
+
+    def open(self, action):
+        self.at.sidebar.radio[0].set_value(PAGES[action]).run()
+        problems = self._problems()
+        if action == 'predict' and not problems:
+            values = np.array(SAMPLE_ROW) * self.rng.uniform(0.7, 1.3, len(SAMPLE_ROW))
+            for widget, value in zip(self.at.number_input, values):
+                widget.set_value(round(float(value)) if isinstance(widget.value, int) else round(float(value), 2))
+            next(b for b in self.at.button if b.label == "Predict").click().run()
+            problems = self._problems()
+        return problems
+
+    def run(self, action):
+        if action == 'login' or self.at is None:
+            problems = self.login()
+            if not problems and not self.at.session_state['logged_in']:
+                problems = ['error: login did not complete']
+            return problems
+        return self.open(action)
+
+    def _problems(self):
+        """Failures shown on the page: exceptions, error boxes and auth back-pressure"""
+        problems = [f"exception: {e.message}" for e in self.at.exception]
+        # A positive prediction is rendered with st.error too; that is a result, not a failure
+        problems += [f"error: {e.value}" for e in self.at.error if "predicts that this person" not in e.value]
+        problems += [f"busy: {w.value}" for w in self.at.warning
+                     if "Too many login attempts" in w.value or "taking too long" in w.value]
+        return problems
+
+
+def _share_runtime():
+    """Let many AppTests run at once in this process, sharing what a server shares.
+
+    AppTest assumes one test at a time: every run installs its own mock
+    Runtime as the process-wide singleton (clearing it when done) and
+    compiles the script into a private ScriptCache, with test mode
+    patched into the global config for the duration. Run concurrently,
+    one session's cleanup pulls the runtime (or test mode) out from under
+    another's script, and parallel compiles of app.py trip CPython 3.11's
+    ast.parse. A Streamlit server has exactly one runtime and one script
+    cache for all sessions, so pin one of each, and test mode, for the
+    scenario.
+    """
+    import contextlib
+    from unittest.mock import MagicMock
+
+    import streamlit.testing.v1.app_test as app_test
+    import streamlit.testing.v1.local_script_runner as local_script_runner
+    from streamlit import config
+    from streamlit.testing.v1.util import build_mock_config_get_option
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+    from streamlit.runtime.dataframe_source_manager import DataframeSourceManager
+    from streamlit.runtime.media_file_manager import MediaFileManager
+    from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+
+    runtime = MagicMock(spec=Runtime)
+    runtime.media_file_mgr = MediaFileManager(MemoryMediaFileStorage('/mock/media'))
+    runtime.dataframe_source_mgr = DataframeSourceManager()
+    runtime.cache_storage_manager = MemoryCacheStorageManager()
+    Runtime.instance = classmethod(lambda cls: runtime)
+    Runtime.exists = classmethod(lambda cls: True)
+
+    script_cache = ScriptCache()
+    local_script_runner.ScriptCache = lambda: script_cache
+
+    config.get_option = build_mock_config_get_option({'global.appTest': True})
+    app_test.patch_config_options = lambda overrides: contextlib.nullcontext()
+
+
+def _classify(problem):
+    text = problem.lower()
+    if 'locked' in text or 'database is busy' in text or 'pool exhausted' in text:
+        return 'db_lock'
+    if problem.startswith('busy:'):
+        return 'auth_busy'
+    return 'other'
+
+
+def parse_mix(text):
+    """'predict=5,history=3' -> {'predict': 5.0, 'history': 3.0}"""
+    mix = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in ACTIONS:
+            raise ValueError(f"Unknown action {name!r}; choose from {', '.join(ACTIONS)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def seed_database(n_rows, n_users, seed_dir=SEED_DIR):
+    """Path of a cached database with n_users loadtest users sharing n_rows predictions"""
+    from db_pool import get_pool
+    from init_db import MIGRATIONS
+    from synthetic_data import write_sqlite
+
+    path = os.path.join(seed_dir, f'seed-{n_rows}-{n_users}-v{len(MIGRATIONS)}.db')
+    if os.path.exists(path):
+        return path
+
+    os.makedirs(seed_dir, exist_ok=True)
+    tmp_path = f'{path}.tmp-{os.getpid()}'
+    write_sqlite(tmp_path, n_rows, n_users=n_users)
+    # Closing the last connection checkpoints the WAL into the file
+    get_pool(tmp_path).close()
+    os.replace(tmp_path, path)
+    return path
+
+
+def _percentiles(seconds):
+    ms = np.array(seconds) * 1000
+    if not len(ms):
+        return {'count': 0}
+    return {
+        'count': len(ms),
+        'p50_ms': float(np.percentile(ms, 50)),
+        'p95_ms': float(np.percentile(ms, 95)),
+        'p99_ms': float(np.percentile(ms, 99)),
+        'max_ms': float(ms.max()),
+    }
+
+
+def run_scenario(db_path, sessions, mix, duration, think_time=0.0, seed=0, timeout=60):
+    """Run sessions concurrent sessions for duration seconds against a copy of db_path.
+
+    Meant to run in a fresh process (see run()): it points the app at a
+    scratch copy of the database through DIABETES_DB_PATH, and the
+    process's peak RSS is the scenario's.
+    """
+    work_dir = tempfile.mkdtemp(prefix='loadtest-')
+    scratch = os.path.join(work_dir, 'diabetes_app.db')
+    shutil.copyfile(db_path, scratch)
+    os.environ['DIABETES_DB_PATH'] = scratch
+    import db_pool
+    if os.path.abspath(db_pool.DB_PATH) != os.path.abspath(scratch):
+        raise RuntimeError("db_pool was imported before DIABETES_DB_PATH was set; run scenarios in a fresh process")
+    from prediction_logger import get_logger
+    from synthetic_data import LOADTEST_PASSWORD
+
+    _share_runtime()
+
+    with db_pool.get_connection() as conn:
+        usernames = [row[0] for row in conn.execute(
+            "SELECT username FROM users WHERE username LIKE 'user%' ORDER BY username LIMIT ?", (sessions,))]
+    if not usernames:
+        raise RuntimeError(f"{db_path} has no loadtest users")
+
+    names = list(mix)
+    weights = np.array([mix[n] for n in names], dtype=np.float64)
+    weights /= weights.sum()
+
+    # Warm up once (model load, page imports, chart fonts) so the clock measures steady state
+    warm = Session(usernames[0], LOADTEST_PASSWORD, np.random.default_rng(seed), timeout)
+    for action in ACTIONS:
+        warm.run(action)
+
+    records = []
+    lock = threading.Lock()
+    start = time.monotonic()
+    deadline = start + duration
+
+    def worker(index):
+        rng = np.random.default_rng(seed + 1 + index)
+        # Stagger first logins over the think time, like users arriving
+        time.sleep(rng.uniform(0, think_time))
+        session = Session(usernames[index % len(usernames)], LOADTEST_PASSWORD, rng, timeout)
+        action = 'login'
+        while time.monotonic() < deadline:
+            t0 = time.perf_counter()
+            try:
+                problems = session.run(action)
+            except Exception as e:
+                problems = [f"exception: {type(e).__name__}: {e}"]
+                session.at = None  # log in again on the next action
+            elapsed = time.perf_counter() - t0
+            with lock:
+                records.append((action, elapsed, problems))
+            if problems and action == 'login':
+                session.at = None
+            action = str(rng.choice(names, p=weights))
+            if think_time:
+                time.sleep(rng.exponential(think_time))
+
+    with ThreadPoolExecutor(max_workers=sessions, thread_name_prefix='session') as pool:
+        list(pool.map(worker, range(sessions)))
+    wall = time.monotonic() - start
+
+    logger = get_logger()
+    logger.flush()
+    shutil.rmtree(work_dir, ignore_errors=True)
+
+    errors = {'db_lock': 0, 'auth_busy': 0, 'other': 0}
+    samples = []
+    for _, _, problems in records:
+        for problem in problems:
+            errors[_classify(problem)] += 1
+            if len(samples) < 10 and problem not in samples:
+                samples.append(problem)
+    ok = [r for r in records if not r[2]]
+    return {
+        'sessions': sessions,
+        'mix': mix,
+        'duration_s': wall,
+        'actions': len(records),
+        'failed_actions': len(records) - len(ok),
+        'actions_per_second': len(ok) / wall,
+        'latency': {'all': _percentiles([r[1] for r in ok]),
+                    **{a: _percentiles([r[1] for r in ok if r[0] == a]) for a in names}},
+        'errors': errors,
+        'predictions_dropped_by_logger': logger.failed,
+        'error_samples': samples,
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def run(sessions=DEFAULT_SESSIONS, mix=None, duration=30.0, rows=100_000, think_time=0.0, seed=0, timeout=60):
+    """Run one scenario per session count, each in its own process, and return the results document"""
+    mix = mix or DEFAULT_MIX
+    db_path = seed_database(rows, max(sessions))
+    results = []
+    # spawn: every scenario starts with a clean interpreter, so its RSS and caches are its own
+    context = multiprocessing.get_context('spawn')
+    for n in sessions:
+        print(f"Running {n} sessions for {duration:.0f}s...", file=sys.stderr)
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            results.append(pool.submit(run_scenario, db_path, n, mix, duration, think_time, seed, timeout).result())
+    return {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'rows': rows,
+            'think_time_s': think_time,
+            'cpu_count': os.cpu_count(),
+        },
+        'scenarios': results,
+    }
+
+
+def _print_summary(doc):
+    print(f"{'sessions':>8} {'actions/s':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+          f"{'db locks':>9} {'auth busy':>10} {'other':>6} {'peak RSS':>10}")
+    for s in doc['scenarios']:
+        lat = s['latency']['all']
+        print(f"{s['sessions']:>8} {s['actions_per_second']:>10.1f} {lat.get('p50_ms', 0):>9.1f} "
+              f"{lat.get('p95_ms', 0):>9.1f} {lat.get('p99_ms', 0):>9.1f} {s['errors']['db_lock']:>9} "
+              f"{s['errors']['auth_busy']:>10} {s['errors']['other']:>6} {s['peak_rss_mb']:>8.0f}MB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulate concurrent Streamlit sessions against app.py.")
+    parser.add_argument('--sessions', type=int, nargs='+', default=list(DEFAULT_SESSIONS),
+                        help="concurrent sessions; one scenario per value")
+    parser.add_argument('--mix', type=parse_mix, default=DEFAULT_MIX,
+                        help="relative action weights, e.g. login=1,predict=5,history=3,charts=2")
+    parser.add_argument('--duration', type=float, default=30.0, help="seconds per scenario")
+    parser.add_argument('--rows', type=int, default=100_000, help="predictions in the seeded database")
+    parser.add_argument('--think-time', type=float, default=0.0,
+                        help="mean pause between a session's actions, in seconds")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--timeout', type=float, default=60, help="seconds one page run may take")
+    parser.add_argument('--out', default=RESULTS_PATH, help="where to write the JSON results")
+    args = parser.parse_args()
+
+    doc = run(args.sessions, args.mix, args.duration, args.rows, args.think_time, args.seed, args.timeout)
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    with open(args.out, 'w') as f:
+        json.dump(doc, f, indent=2)
+    _print_summary(doc)
+    print(f"Results written to {args.out}")
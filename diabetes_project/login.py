@@ -1,6 +1,8 @@
 import streamlit as st
 import sqlite3
-import bcrypt
+
+from auth import AuthBusyError, issue_session, verify_password
+from db_pool import get_connection
 
 
 def login():
@@ -17,26 +19,32 @@ def login():
                 st.error("Please enter username and password")
                 return
 
-            conn = sqlite3.connect('db/diabetes_app.db')
-            c = conn.cursor()
-
             try:
-                c.execute("SELECT password FROM users WHERE username=?", (username,))
-                data = c.fetchone()
+                # Only hold the pooled connection for the lookup, not for bcrypt
+                with get_connection() as conn:
+                    c = conn.cursor()
+                    c.execute("SELECT password FROM users WHERE username=?", (username,))
+                    data = c.fetchone()
 
                 if data:
                     stored_password = data[0]
-                    if bcrypt.checkpw(password.encode(), stored_password):
+                    # bcrypt runs on the auth worker pool; after this the
+                    # signed session token stands in for the password
+                    if verify_password(password, stored_password):
+                        token = issue_session(username)
                         st.success(f"Welcome back, {username}!")
                         st.session_state["logged_in"] = True
                         st.session_state["username"] = username
+                        # Kept server-side only: a bearer token in the URL would
+                        # end up in browser history, referrers and proxy logs
+                        st.session_state["session_token"] = token
                         st.rerun()
                     else:
                         st.error("Incorrect password")
                 else:
                     st.error("User not found")
 
+            except AuthBusyError as e:
+                st.warning(str(e))
             except sqlite3.Error as e:
-                st.error(f"Database error: {e}")
-            finally:
-                conn.close()
\ No newline at end of file
+                st.error(f"Database error: {e}")
\ No newline at end of file
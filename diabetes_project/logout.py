@@ -1,6 +1,12 @@
 import streamlit as st
 
+from auth import revoke_session
+
+
 def logout():
+    revoke_session(st.session_state.pop("session_token", None))
+    st.session_state.logged_in = False
+    st.session_state.username = ""
     st.session_state.user = None
     st.session_state.page = 'login'
     st.success("You have been logged out.")
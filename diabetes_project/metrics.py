@@ -0,0 +1,220 @@
+# metrics.py
+import bisect
+import os
+import threading
+import time
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Bucket upper bounds in seconds: 10us to ~60s, a factor of sqrt(2) apart.
+# Fixed buckets keep an observation to one bisect and one increment.
+BUCKETS = tuple(1e-5 * 2 ** (i / 2) for i in range(46))
+
+METRIC_NAME = 'diabetes_app_stage_seconds'
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class Histogram:
+    """Latency histogram over BUCKETS with exact count, sum, min and max"""
+
+    __slots__ = ('counts', 'count', 'sum', 'min', 'max', '_lock')
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.min = float('inf')
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        i = bisect.bisect_left(BUCKETS, seconds)
+        with self._lock:
+            self.counts[i] += 1
+            self.count += 1
+            self.sum += seconds
+            if seconds < self.min:
+                self.min = seconds
+            if seconds > self.max:
+                self.max = seconds
+
+    def quantile(self, q):
+        """Estimate the q-quantile by interpolating inside its bucket"""
+        with self._lock:
+            counts, count, lo_seen, hi_seen = list(self.counts), self.count, self.min, self.max
+        if not count:
+            return None
+        rank = q * count
+        seen = 0
+        for i, n in enumerate(counts):
+            if n and seen + n >= rank:
+                lower = BUCKETS[i - 1] if i > 0 else 0.0
+                upper = BUCKETS[i] if i < len(BUCKETS) else hi_seen
+                value = lower + (upper - lower) * (rank - seen) / n
+                return min(max(value, lo_seen), hi_seen)
+            seen += n
+        return hi_seen
+
+
+class MetricsRegistry:
+    """Named stage histograms for the current process"""
+
+    def __init__(self):
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, name):
+        try:
+            return self._histograms[name]
+        except KeyError:
+            with self._lock:
+                return self._histograms.setdefault(name, Histogram())
+
+    def observe(self, name, seconds):
+        self.histogram(name).observe(seconds)
+
+    def _items(self):
+        with self._lock:
+            return sorted(self._histograms.items())
+
+    def snapshot(self):
+        """One dict per stage: count, total/mean/max and p50/p95/p99, in seconds"""
+        rows = []
+        for name, h in self._items():
+            if not h.count:
+                continue
+            row = {'stage': name, 'count': h.count, 'sum': h.sum, 'mean': h.sum / h.count, 'max': h.max}
+            for q in QUANTILES:
+                row[f'p{round(q * 100)}'] = h.quantile(q)
+            rows.append(row)
+        return rows
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+    def to_prometheus(self):
+        """Render every histogram in the Prometheus text exposition format"""
+        lines = [
+            f'# HELP {METRIC_NAME} Time spent in each instrumented stage.',
+            f'# TYPE {METRIC_NAME} histogram',
+        ]
+        for name, h in self._items():
+            with h._lock:
+                counts, count, total = list(h.counts), h.count, h.sum
+            label = name.replace('\\', '\\\\').replace('"', '\\"')
+            cumulative = 0
+            for bound, n in zip(BUCKETS, counts):
+                cumulative += n
+                lines.append(f'{METRIC_NAME}_bucket{{stage="{label}",le="{bound:.6g}"}} {cumulative}')
+            lines.append(f'{METRIC_NAME}_bucket{{stage="{label}",le="+Inf"}} {count}')
+            lines.append(f'{METRIC_NAME}_sum{{stage="{label}"}} {total:.9g}')
+            lines.append(f'{METRIC_NAME}_count{{stage="{label}"}} {count}')
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path):
+        """Write the Prometheus text to path atomically (node_exporter textfile collector)"""
+        tmp_path = f'{path}.tmp-{os.getpid()}'
+        with open(tmp_path, 'w') as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp_path, path)
+
+
+# Shared by every instrumented stage in the process
+metrics = MetricsRegistry()
+
+
+class timed:
+    """Record the time spent in a block or function under a stage name
+
+        with timed('predict.transform'):
+            ...
+
+        @timed('db.history.get_page')
+        def get_page(...):
+    """
+
+    __slots__ = ('name', '_start')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        metrics.observe(self.name, time.perf_counter() - self._start)
+        return False
+
+    def __call__(self, fn):
+        name = self.name
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                metrics.observe(name, time.perf_counter() - start)
+        return wrapper
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = metrics.to_prometheus().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def start_http_server(port, addr='127.0.0.1'):
+    """Serve /metrics from a daemon thread; later calls reuse the running server"""
+    global _server
+    with _server_lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((addr, port), _MetricsHandler)
+            threading.Thread(target=_server.serve_forever, name='metrics-http', daemon=True).start()
+        return _server
+
+
+_writer = None
+
+
+def start_textfile_writer(path, interval=15.0):
+    """Rewrite path with the Prometheus text every interval seconds from a daemon thread"""
+    global _writer
+    with _server_lock:
+        if _writer is None:
+            def run():
+                while True:
+                    time.sleep(interval)
+                    try:
+                        metrics.write_prometheus(path)
+                    except OSError:
+                        pass
+            _writer = threading.Thread(target=run, name='metrics-textfile', daemon=True)
+            _writer.start()
+        return _writer
+
+
+def start_exporters():
+    """Start the exporters configured by METRICS_PORT / METRICS_TEXTFILE, if any"""
+    port = os.environ.get('METRICS_PORT')
+    if port:
+        start_http_server(int(port), os.environ.get('METRICS_ADDR', '127.0.0.1'))
+    path = os.environ.get('METRICS_TEXTFILE')
+    if path:
+        start_textfile_writer(path)
@@ -0,0 +1,327 @@
+# mmap_model.py
+import argparse
+import json
+import os
+import shutil
+
+import joblib
+import numpy as np
+from scipy.special import expit, softmax
+
+from compiled_forest import CompiledForest, compile_forest, is_forest
+from model_registry import file_sha256
+
+# Export layout: <artifact>.mmap/header.json plus one .npy file per array.
+# Arrays are opened with np.load(mmap_mode='r'), so every worker process
+# maps the same page-cache pages instead of holding its own unpickled copy.
+EXPORT_SUFFIX = '.mmap'
+HEADER_NAME = 'header.json'
+FORMAT_VERSION = 1
+
+FOREST_ARRAYS = ('feature', 'threshold', 'left', 'right', 'missing_left', 'value', 'roots', 'classes')
+
+
+def _as_array(X, feature_names):
+    """2D float array from an array or DataFrame (columns reordered to the fitted order)"""
+    if feature_names is not None and hasattr(X, 'columns'):
+        X = X[list(feature_names)]
+    X = np.asarray(X, dtype=np.float64)
+    return X.reshape(1, -1) if X.ndim == 1 else X
+
+
+class MappedLinear:
+    """Logistic-link linear classifier (LogisticRegression, SGDClassifier(loss='log_loss'))"""
+
+    def __init__(self, coef, intercept, classes, feature_names=None):
+        self.coef_ = coef
+        self.intercept_ = intercept
+        self.classes_ = classes
+        self.feature_names_in_ = feature_names
+
+    def decision_function(self, X):
+        scores = _as_array(X, self.feature_names_in_) @ self.coef_.T + self.intercept_
+        return scores.reshape(-1) if scores.shape[1] == 1 else scores
+
+    def predict_proba(self, X):
+        decision = self.decision_function(X)
+        if decision.ndim == 1:
+            prob = expit(decision)
+            return np.stack([1 - prob, prob], axis=1)
+        return softmax(decision, axis=1)
+
+    def predict(self, X):
+        decision = self.decision_function(X)
+        if decision.ndim == 1:
+            return self.classes_.take((decision > 0).astype(int), axis=0)
+        return self.classes_.take(decision.argmax(axis=1), axis=0)
+
+
+class MappedSVC:
+    """Binary kernel SVC with Platt-scaled probabilities, as libsvm computes them"""
+
+    def __init__(self, support_vectors, dual_coef, intercept, classes, kernel, gamma,
+                 coef0, degree, prob_a=None, prob_b=None, feature_names=None):
+        self.support_vectors_ = support_vectors
+        self.dual_coef_ = dual_coef
+        self.intercept_ = intercept
+        self.classes_ = classes
+        self.kernel = kernel
+        self.gamma = gamma
+        self.coef0 = coef0
+        self.degree = degree
+        self.probA_ = prob_a
+        self.probB_ = prob_b
+        self.feature_names_in_ = feature_names
+        # ||sv||^2 is fixed per model, so the RBF kernel needs one matmul per call
+        self._sv_sq = np.einsum('ij,ij->i', support_vectors, support_vectors)
+
+    def _kernel(self, X):
+        dot = X @ self.support_vectors_.T
+        if self.kernel == 'linear':
+            return dot
+        if self.kernel == 'rbf':
+            sq_dist = np.einsum('ij,ij->i', X, X)[:, None] + self._sv_sq - 2 * dot
+            return np.exp(-self.gamma * np.maximum(sq_dist, 0))
+        if self.kernel == 'poly':
+            return (self.gamma * dot + self.coef0) ** self.degree
+        return np.tanh(self.gamma * dot + self.coef0)
+
+    def decision_function(self, X):
+        K = self._kernel(_as_array(X, self.feature_names_in_))
+        return (K @ self.dual_coef_[0] + self.intercept_[0]).reshape(-1)
+
+    def predict(self, X):
+        return self.classes_.take((self.decision_function(X) > 0).astype(int), axis=0)
+
+    def predict_proba(self, X):
+        if self.probA_ is None:
+            raise AttributeError("predict_proba is not available when probability=False")
+        # libsvm's sigmoid_predict on its own decision value (sign-flipped
+        # relative to sklearn's): r = P(classes_[0]) for the one class pair
+        f = -self.decision_function(X) * self.probA_[0] + self.probB_[0]
+        r = np.where(f >= 0, np.exp(-np.abs(f)) / (1 + np.exp(-np.abs(f))), 1 / (1 + np.exp(-np.abs(f))))
+        r = np.clip(r, 1e-7, 1 - 1e-7)
+        return _couple_pairwise(r)
+
+
+def _couple_pairwise(r, max_iter=100, eps=0.005 / 2):
+    """libsvm's multiclass_probability for two classes, vectorized over rows
+
+    sklearn's libsvm runs this fixed-point iteration even for binary
+    problems and stops at a loose tolerance, so its probabilities differ
+    from r by up to ~1e-3; reproducing the loop keeps us identical.
+    """
+    # Q = [[r10^2, -r10*r01], [-r01*r10, r01^2]] with r01 = r, r10 = 1 - r
+    q00, q11 = (1 - r) ** 2, r ** 2
+    q01 = -r * (1 - r)
+    Q = np.stack([np.stack([q00, q01], axis=1), np.stack([q01, q11], axis=1)], axis=1)
+    p = np.full((len(r), 2), 0.5)
+    active = np.ones(len(r), dtype=bool)
+    for _ in range(max_iter):
+        idx = np.flatnonzero(active)
+        if idx.size == 0:
+            break
+        Qa, pa = Q[idx], p[idx]
+        Qp = np.einsum('nij,nj->ni', Qa, pa)
+        pQp = np.einsum('ni,ni->n', pa, Qp)
+        done = np.abs(Qp - pQp[:, None]).max(axis=1) < eps
+        active[idx[done]] = False
+        idx, Qa, pa, Qp, pQp = idx[~done], Qa[~done], pa[~done], Qp[~done], pQp[~done]
+        for t in range(2):
+            diff = (-Qp[:, t] + pQp) / Qa[:, t, t]
+            pa[:, t] += diff
+            pQp = (pQp + diff * (diff * Qa[:, t, t] + 2 * Qp[:, t])) / (1 + diff) / (1 + diff)
+            Qp = (Qp + diff[:, None] * Qa[:, t, :]) / (1 + diff)[:, None]
+            pa /= (1 + diff)[:, None]
+        p[idx] = pa
+    return p
+
+
+class MappedScaler:
+    """StandardScaler.transform from mean_/scale_"""
+
+    def __init__(self, mean=None, scale=None, feature_names=None):
+        self.mean_ = mean
+        self.scale_ = scale
+        self.feature_names_in_ = feature_names
+
+    def transform(self, X):
+        X = _as_array(X, self.feature_names_in_).copy()
+        if self.mean_ is not None:
+            X -= self.mean_
+        if self.scale_ is not None:
+            X /= self.scale_
+        return X
+
+
+def _feature_names(obj):
+    names = getattr(obj, 'feature_names_in_', None)
+    return None if names is None else [str(n) for n in names]
+
+
+def _model_parts(obj):
+    """Return (kind, params, arrays) describing a fitted model, or raise TypeError"""
+    name = type(obj).__name__
+    if is_forest(obj) or isinstance(obj, CompiledForest):
+        forest = obj if isinstance(obj, CompiledForest) else compile_forest(obj)
+        arrays = {n: getattr(forest, 'classes_' if n == 'classes' else n) for n in FOREST_ARRAYS}
+        return 'forest', {'depth': forest.depth}, arrays
+
+    if name == 'StandardScaler':
+        arrays = {k: v for k, v in (('mean', obj.mean_), ('scale', obj.scale_)) if v is not None}
+        return 'scaler', {}, arrays
+
+    if name == 'LogisticRegression' or (name == 'SGDClassifier' and obj.loss == 'log_loss'):
+        if len(obj.classes_) > 2 and name == 'SGDClassifier':
+            raise TypeError("Multiclass SGDClassifier uses one-vs-rest probabilities; not exported")
+        arrays = {'coef': obj.coef_, 'intercept': obj.intercept_, 'classes': obj.classes_}
+        return 'linear', {}, arrays
+
+    if name == 'SVC' and len(obj.classes_) == 2:
+        arrays = {'support_vectors': obj.support_vectors_, 'dual_coef': obj.dual_coef_,
+                  'intercept': obj.intercept_, 'classes': obj.classes_}
+        if obj.probability:
+            arrays.update(prob_a=obj.probA_, prob_b=obj.probB_)
+        params = {'kernel': obj.kernel, 'gamma': float(obj._gamma),
+                  'coef0': float(obj.coef0), 'degree': int(obj.degree)}
+        if params['kernel'] not in ('linear', 'rbf', 'poly', 'sigmoid'):
+            raise TypeError(f"SVC kernel {obj.kernel!r} is not exportable")
+        return 'svc', params, arrays
+
+    raise TypeError(f"Cannot export {name}: no memory-mapped format for this model type")
+
+
+def export_path(path):
+    """Export directory used for the pickle at path"""
+    return os.path.splitext(path)[0] + EXPORT_SUFFIX
+
+
+def export_model(obj, out_dir, source=None):
+    """Write obj as raw .npy arrays plus a JSON header into out_dir.
+
+    source is the pickle the model came from; its content hash goes in
+    the header so stale exports are ignored once the pickle is replaced.
+    The directory is written next to out_dir and swapped in at the end.
+    """
+    kind, params, arrays = _model_parts(obj)
+    header = {
+        'format_version': FORMAT_VERSION,
+        'kind': kind,
+        'model_class': type(obj).__name__,
+        'params': params,
+        'feature_names': _feature_names(obj),
+        'arrays': sorted(arrays),
+        'source_sha256': file_sha256(source) if source else None,
+    }
+
+    tmp_dir = f"{out_dir}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    for name, array in arrays.items():
+        np.save(os.path.join(tmp_dir, name + '.npy'), np.ascontiguousarray(array), allow_pickle=False)
+    with open(os.path.join(tmp_dir, HEADER_NAME), 'w') as f:
+        json.dump(header, f, indent=2)
+
+    old_dir = f"{out_dir}.old-{os.getpid()}"
+    if os.path.exists(out_dir):
+        os.replace(out_dir, old_dir)
+    os.replace(tmp_dir, out_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+    return out_dir
+
+
+def read_header(out_dir):
+    with open(os.path.join(out_dir, HEADER_NAME)) as f:
+        return json.load(f)
+
+
+def load_export(out_dir):
+    """Open an export with every array memory-mapped read-only"""
+    header = read_header(out_dir)
+    if header.get('format_version') != FORMAT_VERSION:
+        raise ValueError(f"{out_dir}: unsupported format version {header.get('format_version')}")
+    a = {name: np.load(os.path.join(out_dir, name + '.npy'), mmap_mode='r', allow_pickle=False)
+         for name in header['arrays']}
+    params = header['params']
+    names = header['feature_names']
+
+    kind = header['kind']
+    if kind == 'forest':
+        return CompiledForest(a['feature'], a['threshold'], a['left'], a['right'], a['missing_left'],
+                              a['value'], a['roots'], params['depth'], a['classes'])
+    if kind == 'scaler':
+        return MappedScaler(a.get('mean'), a.get('scale'), names)
+    if kind == 'linear':
+        return MappedLinear(a['coef'], a['intercept'], a['classes'], names)
+    if kind == 'svc':
+        return MappedSVC(a['support_vectors'], a['dual_coef'], a['intercept'], a['classes'],
+                         params['kernel'], params['gamma'], params['coef0'], params['degree'],
+                         a.get('prob_a'), a.get('prob_b'), names)
+    raise ValueError(f"{out_dir}: unknown model kind {kind!r}")
+
+
+def load_artifact(path, fallback=joblib.load):
+    """Registry loader: the memory-mapped export when it matches path, else fallback(path)
+
+    The export is only used when its recorded source hash equals the
+    pickle's current content, so retraining never serves a stale model.
+    """
+    out_dir = export_path(path)
+    try:
+        header = read_header(out_dir)
+    except (OSError, ValueError):
+        return fallback(path)
+    if header.get('source_sha256') != file_sha256(path):
+        return fallback(path)
+    return load_export(out_dir)
+
+
+def check_roundtrip(model, mapped, X):
+    """Raise AssertionError unless mapped reproduces model on X
+
+    Forests and scalers must match bit for bit; kernel and linear models
+    must give the same labels and probabilities to within 1e-9.
+    """
+    if hasattr(model, 'transform'):
+        expected, actual = model.transform(X), mapped.transform(X)
+        exact = True
+    else:
+        labels, mapped_labels = model.predict(X), mapped.predict(X)
+        if not np.array_equal(labels, mapped_labels):
+            raise AssertionError(f"Labels differ on {int((labels != mapped_labels).sum())} rows")
+        if not hasattr(model, 'predict_proba') or getattr(model, 'probability', True) is False:
+            return
+        expected, actual = model.predict_proba(X), mapped.predict_proba(X)
+        exact = is_forest(model)
+    if exact and not np.array_equal(expected, actual):
+        raise AssertionError(f"Outputs differ (max abs diff {np.abs(expected - actual).max()})")
+    if not np.allclose(expected, actual, rtol=0, atol=1e-9):
+        raise AssertionError(f"Outputs differ (max abs diff {np.abs(expected - actual).max()})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export pickled models to the memory-mapped .mmap format.")
+    parser.add_argument('models', nargs='+', help="pickled artifacts, e.g. model/*.pkl ../model.pkl")
+    parser.add_argument('--check-csv', default=os.path.join(os.path.dirname(__file__), '..', 'diabetes.csv'),
+                        help="CSV whose feature columns are used for the round-trip check")
+    args = parser.parse_args()
+
+    X = None
+    if os.path.exists(args.check_csv):
+        import pandas as pd
+        X = pd.read_csv(args.check_csv).drop(columns='Outcome', errors='ignore')
+
+    for path in args.models:
+        model = joblib.load(path)
+        try:
+            out_dir = export_model(model, export_path(path), source=path)
+        except TypeError as e:
+            print(f"Skipped {path}: {e}")
+            continue
+        if X is not None:
+            # Models fitted on arrays warn when given a DataFrame; match what they saw
+            check_X = X if getattr(model, 'feature_names_in_', None) is not None else X.to_numpy()
+            check_roundtrip(model, load_export(out_dir), check_X)
+        size = sum(os.path.getsize(os.path.join(out_dir, f)) for f in os.listdir(out_dir))
+        checked = f", round-trip checked on {len(X)} rows" if X is not None else ""
+        print(f"{path} -> {out_dir} ({read_header(out_dir)['kind']}, {size / 1024:.0f} KiB{checked})")
@@ -0,0 +1,174 @@
+# model_evaluation.py
+import argparse
+import glob
+import json
+import os
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.calibration import calibration_curve
+from sklearn.metrics import (accuracy_score, brier_score_loss, f1_score, precision_score,
+                             recall_score, roc_auc_score)
+from sklearn.model_selection import train_test_split
+
+from model_registry import MODEL_DIR, PROJECT_DIR, file_sha256
+from utils import SCALER_PATH
+
+DATA_PATH = os.path.join(PROJECT_DIR, 'diabetes.csv')
+ROOT_MODEL_PATH = os.path.join(os.path.dirname(PROJECT_DIR), 'model.pkl')
+CACHE_DIR = os.path.join(PROJECT_DIR, 'cache', 'model_eval')
+# Bump when the stored metrics change shape, so old cache files are ignored
+EVAL_VERSION = 1
+
+CALIBRATION_BINS = 10
+# Single-row calls timed per artifact (on the first rows of the holdout)
+LATENCY_ROWS = 50
+
+
+def artifact_paths():
+    """Every pickled model in model/ plus the root app's model.pkl"""
+    paths = sorted(glob.glob(os.path.join(MODEL_DIR, '*.pkl')))
+    if os.path.exists(ROOT_MODEL_PATH):
+        paths.append(ROOT_MODEL_PATH)
+    return paths
+
+
+def load_holdout(data_path=DATA_PATH):
+    """The 20% test split (random_state=42) that train_model and hyperparam_search hold out"""
+    df = pd.read_csv(data_path)
+    X = df.drop('Outcome', axis=1)
+    y = df['Outcome']
+    _, X_test, _, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    return X_test, y_test.to_numpy()
+
+
+def _needs_scaling(model):
+    # train_model.py fits on scaler.pkl output (plain arrays); the other
+    # artifacts were fitted on the raw feature DataFrame and kept its names
+    return not hasattr(model, 'feature_names_in_')
+
+
+def _calibration_error(y, proba, bins=CALIBRATION_BINS):
+    """Expected calibration error over equal-width probability bins"""
+    idx = np.minimum((proba * bins).astype(int), bins - 1)
+    error = 0.0
+    for b in range(bins):
+        mask = idx == b
+        if mask.any():
+            error += mask.mean() * abs(proba[mask].mean() - y[mask].mean())
+    return float(error)
+
+
+def _inputs(model, X, scaler):
+    if scaler is not None:
+        return scaler.transform(X)
+    return X if hasattr(model, 'feature_names_in_') else X.to_numpy()
+
+
+def evaluate(model, X, y, scaler=None):
+    """Holdout metrics, calibration curve and latency of one fitted classifier.
+
+    The whole holdout is scored in one predict_proba call; latency is
+    reported both per row of that batch and for single-row calls.
+    """
+    X_in = _inputs(model, X, scaler)
+    start = time.perf_counter()
+    proba = model.predict_proba(X_in)[:, list(model.classes_).index(1)]
+    batch_seconds = time.perf_counter() - start
+    pred = (proba >= 0.5).astype(int)
+
+    single = []
+    for i in range(min(LATENCY_ROWS, len(X))):
+        row = X.iloc[[i]]
+        t0 = time.perf_counter()
+        model.predict_proba(_inputs(model, row, scaler))
+        single.append(time.perf_counter() - t0)
+
+    frac_pos, mean_pred = calibration_curve(y, proba, n_bins=CALIBRATION_BINS)
+    return {
+        'rows': len(y),
+        'accuracy': float(accuracy_score(y, pred)),
+        'roc_auc': float(roc_auc_score(y, proba)) if len(np.unique(y)) > 1 else None,
+        'precision': float(precision_score(y, pred, zero_division=0)),
+        'recall': float(recall_score(y, pred, zero_division=0)),
+        'f1': float(f1_score(y, pred, zero_division=0)),
+        'brier': float(brier_score_loss(y, proba)),
+        'calibration_error': _calibration_error(y, proba),
+        'calibration': {'mean_predicted': mean_pred.tolist(), 'fraction_positive': frac_pos.tolist()},
+        'batch_us_per_row': batch_seconds / len(y) * 1e6,
+        'single_row_ms': float(np.median(single) * 1000),
+    }
+
+
+def _scaler_hash():
+    return file_sha256(SCALER_PATH) if os.path.exists(SCALER_PATH) else None
+
+
+def evaluate_artifact(path, data_path=DATA_PATH, cache_dir=CACHE_DIR):
+    """Metrics for the artifact at path, computed once per content hash and cached on disk.
+
+    Results are stored under the artifact's and the dataset's hashes; for
+    models fed through scaler.pkl the scaler's hash is stored too and a
+    different scaler triggers a rescore. Returns None for artifacts that
+    are not classifiers (e.g. scaler.pkl).
+    """
+    model_hash = file_sha256(path)
+    cache_path = os.path.join(cache_dir, f'{model_hash[:16]}-{file_sha256(data_path)[:16]}-v{EVAL_VERSION}.json')
+    if os.path.exists(cache_path):
+        with open(cache_path) as f:
+            cached = json.load(f)
+        if not cached.get('classifier', True):
+            return None
+        if cached['scaler_sha256'] == (_scaler_hash() if cached['needs_scaling'] else None):
+            return cached
+
+    model = joblib.load(path)
+    if not (hasattr(model, 'predict_proba') and hasattr(model, 'classes_')):
+        result = {'classifier': False, 'path': os.path.abspath(path)}
+    else:
+        needs_scaling = _needs_scaling(model)
+        scaler_hash = _scaler_hash() if needs_scaling else None
+        X, y = load_holdout(data_path)
+        result = evaluate(model, X, y, joblib.load(SCALER_PATH) if scaler_hash else None)
+        result.update({
+            'model': type(model).__name__,
+            'path': os.path.abspath(path),
+            'sha256': model_hash,
+            'needs_scaling': needs_scaling,
+            'scaler_sha256': scaler_hash,
+            'evaluated': time.strftime('%Y-%m-%d %H:%M:%S'),
+        })
+
+    # Write then rename, so a concurrent reader never sees half a file
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = f'{cache_path}.tmp-{os.getpid()}'
+    with open(tmp_path, 'w') as f:
+        json.dump(result, f, indent=2)
+    os.replace(tmp_path, cache_path)
+    return result if result.get('classifier', True) else None
+
+
+def compare_models(paths=None, data_path=DATA_PATH, cache_dir=CACHE_DIR):
+    """{artifact name: metrics} for every classifier artifact, from cache where possible"""
+    results = {}
+    for path in paths or artifact_paths():
+        result = evaluate_artifact(path, data_path, cache_dir)
+        if result is not None:
+            name = os.path.relpath(path, os.path.dirname(PROJECT_DIR))
+            results[name] = result
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare every model artifact on the diabetes.csv holdout.")
+    parser.add_argument('paths', nargs='*', help="artifacts to evaluate (default: model/*.pkl and ../model.pkl)")
+    parser.add_argument('--data', default=DATA_PATH, help="diabetes.csv-shaped file to hold rows out from")
+    args = parser.parse_args()
+
+    results = compare_models(args.paths or None, args.data)
+    columns = ['model', 'accuracy', 'roc_auc', 'precision', 'recall', 'brier', 'calibration_error',
+               'batch_us_per_row', 'single_row_ms']
+    table = pd.DataFrame.from_dict(results, orient='index')[columns]
+    print(table.to_string(float_format=lambda v: f"{v:.3f}"))
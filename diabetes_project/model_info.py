@@ -0,0 +1,183 @@
+# model_info.py
+import streamlit as st
+
+from drift_monitor import PSI_ALERT, PSI_WARN, build_reference, drift_report, has_reference, update as update_drift
+from metrics import metrics
+from model_evaluation import compare_models
+from prediction_cache import prediction_cache
+from training_jobs import active_job, list_jobs, submit_job
+
+STATUS_ICONS = {"queued": "⏳", "running": "⚙️", "done": "✅", "failed": "❌"}
+
+
+def training_jobs_section():
+    st.subheader("Retraining")
+    st.write("Training runs in a background process. Predictions keep using the "
+             "current model until the new one has been trained and promoted.")
+
+    job = active_job()
+    if st.button("Retrain model", disabled=job is not None):
+        submit_job()
+        st.rerun()
+
+    jobs = list_jobs()
+    if not jobs:
+        st.info("No training jobs yet.")
+        return
+
+    for job in jobs:
+        icon = STATUS_ICONS.get(job["status"], "")
+        st.write(f"{icon} **Job #{job['id']}** - {job['status']} - {job['message'] or ''} "
+                 f"({job['created_date']})")
+        if job["status"] == "running":
+            st.progress(job["progress"])
+        elif job["status"] == "failed" and job["error"]:
+            with st.expander("Error details"):
+                st.code(job["error"])
+
+    if any(j["status"] in ("queued", "running") for j in jobs) and st.button("Refresh"):
+        st.rerun()
+
+
+def latency_metrics_section():
+    st.subheader("Latency")
+    st.write("Per-stage timings recorded by this server process since it started.")
+
+    rows = metrics.snapshot()
+    if not rows:
+        st.info("No timings recorded yet. Make a prediction or open the history page.")
+        return
+
+    st.dataframe(
+        [{"Stage": r["stage"], "Count": r["count"],
+          "p50 (ms)": r["p50"] * 1000, "p95 (ms)": r["p95"] * 1000,
+          "p99 (ms)": r["p99"] * 1000, "Max (ms)": r["max"] * 1000}
+         for r in rows],
+        use_container_width=True,
+        column_config={c: st.column_config.NumberColumn(format="%.3f")
+                       for c in ("p50 (ms)", "p95 (ms)", "p99 (ms)", "Max (ms)")},
+    )
+    col_download, col_reset = st.columns([3, 1])
+    with col_download:
+        st.download_button("Download Prometheus metrics", metrics.to_prometheus(),
+                           file_name="diabetes_app_metrics.prom", mime="text/plain")
+    with col_reset:
+        if st.button("Reset timings"):
+            metrics.reset()
+            st.rerun()
+
+
+def prediction_cache_section():
+    st.subheader("Prediction cache")
+    stats = prediction_cache.stats()
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Hits", stats["hits"])
+    col2.metric("Misses", stats["misses"])
+    col3.metric("Hit rate", f"{stats['hit_rate']:.0%}")
+    col4.metric("Entries", f"{stats['size']}/{stats['maxsize']}")
+    st.caption(f"{stats['evictions']} evicted, {stats['invalidations']} dropped after a model change")
+    if st.button("Clear cache"):
+        prediction_cache.clear()
+        st.rerun()
+
+
+def drift_section():
+    st.subheader("Input drift")
+    st.write("Logged predictions compared with the training data (diabetes.csv). "
+             f"PSI below {PSI_WARN} is stable; above {PSI_ALERT} the inputs have shifted.")
+
+    # The reference is only ever built here or by the CLI, never while logging
+    built = has_reference()
+    col_update, col_rebuild = st.columns([1, 1])
+    with col_update:
+        if st.button("Update now", disabled=not built):
+            update_drift()
+    with col_rebuild:
+        if st.button("Rebuild reference" if built else "Build reference"):
+            with st.spinner("Sketching the training data..."):
+                build_reference()
+            update_drift()
+            built = True
+
+    if not built:
+        st.info("No reference yet. Build one from the training data to start monitoring.")
+        return
+
+    report = drift_report()
+    if not report["columns"]:
+        st.info("No predictions folded in yet.")
+        return
+
+    status_icons = {"stable": "✅", "watch": "⚠️", "drift": "❌"}
+    st.dataframe(
+        [{"": status_icons[r["status"]], "Column": r["name"], "PSI": r["psi"], "KS": r["ks"],
+          "Shift (SD)": r["mean_shift_sd"], "Train mean": r["reference_mean"], "Live mean": r["live_mean"],
+          "Train median": r["reference_median"], "Live median": r["live_median"],
+          "Live p5-p95": f"{r['live_p05']:.2f} - {r['live_p95']:.2f}"}
+         for r in report["columns"]],
+        use_container_width=True,
+        column_config={c: st.column_config.NumberColumn(format="%.3f")
+                       for c in ("PSI", "KS", "Shift (SD)", "Train mean", "Live mean",
+                                 "Train median", "Live median")},
+    )
+    state = report["state"]
+    st.caption(f"{report['columns'][0]['live_rows']:,} predictions up to id {state.get('last_id')}, "
+               f"last updated {state.get('updated') or 'never'}; reference built {state.get('built')} "
+               f"from {state.get('reference_rows')} rows")
+
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def _calibration_png(curves):
+    """Calibration plot of {artifact: curve}; re-rendered only when a curve changes"""
+    from matplotlib.figure import Figure
+
+    from plot_utils import to_png
+
+    fig = Figure(figsize=(6, 5))
+    ax = fig.subplots()
+    ax.plot([0, 1], [0, 1], linestyle="--", color="grey", label="Perfectly calibrated")
+    for name, curve in curves.items():
+        ax.plot(curve["mean_predicted"], curve["fraction_positive"], marker="o", label=name)
+    ax.set_xlabel("Mean predicted probability")
+    ax.set_ylabel("Fraction of positives")
+    ax.legend(fontsize="small")
+    return to_png(fig)
+
+
+def model_comparison_section():
+    st.subheader("Model comparison")
+    st.write("Every model artifact scored on the same holdout (20% of diabetes.csv). "
+             "Results are cached per artifact content hash, so they are only recomputed "
+             "after a model file changes.")
+
+    with st.spinner("Evaluating models..."):
+        results = compare_models()
+    if not results:
+        st.info("No model artifacts found.")
+        return
+
+    st.dataframe(
+        [{"Artifact": name, "Model": r["model"], "Accuracy": r["accuracy"], "ROC-AUC": r["roc_auc"],
+          "Precision": r["precision"], "Recall": r["recall"], "Brier": r["brier"],
+          "Calibration error": r["calibration_error"],
+          "Batch (µs/row)": r["batch_us_per_row"], "Single row (ms)": r["single_row_ms"]}
+         for name, r in results.items()],
+        use_container_width=True,
+        column_config={c: st.column_config.NumberColumn(format="%.3f")
+                       for c in ("Accuracy", "ROC-AUC", "Precision", "Recall", "Brier",
+                                 "Calibration error", "Single row (ms)")}
+        | {"Batch (µs/row)": st.column_config.NumberColumn(format="%.1f")},
+    )
+    rows = next(iter(results.values()))["rows"]
+    st.caption(f"{rows} holdout rows; the threshold for precision/recall is 50%.")
+    with st.expander("Calibration curves"):
+        st.image(_calibration_png({name: r["calibration"] for name, r in results.items()}))
+
+
+def model_info_page():
+    st.title("Model Info and Retrain Page")
+    model_comparison_section()
+    training_jobs_section()
+    latency_metrics_section()
+    prediction_cache_section()
+    drift_section()
@@ -0,0 +1,163 @@
+# model_registry.py
+import hashlib
+import json
+import os
+import threading
+import time
+
+import joblib
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+MODEL_DIR = os.path.join(PROJECT_DIR, 'model')
+# sha256 of every artifact promoted together (training_jobs.promote)
+MANIFEST_PATH = os.path.join(MODEL_DIR, 'manifest.json')
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    """Return the sha256 hex digest of a file's content"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def read_manifest(path=MANIFEST_PATH):
+    """{file name: sha256} of the last promoted artifacts, {} before the first promotion"""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def write_manifest(hashes, path=MANIFEST_PATH):
+    """Merge {file name: sha256} into the manifest and swap it in with os.replace"""
+    manifest = read_manifest(path)
+    manifest.update(hashes)
+    tmp_path = f'{path}.tmp-{os.getpid()}'
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+class ArtifactEntry:
+    """A loaded artifact together with the file state it was loaded from"""
+
+    __slots__ = ('obj', 'path', 'mtime_ns', 'size', 'sha256', 'checked_at', 'derived')
+
+    def __init__(self, obj, path, mtime_ns, size, sha256):
+        self.obj = obj
+        self.path = path
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.sha256 = sha256
+        self.checked_at = time.monotonic()
+        # Objects built from obj (compiled predictors, ...), dropped on reload
+        self.derived = {}
+
+    @property
+    def version(self):
+        """Short content hash, used to key anything derived from the artifact"""
+        return self.sha256[:12]
+
+    def derive(self, name, build):
+        """Return build(obj), computed once for this entry"""
+        try:
+            return self.derived[name]
+        except KeyError:
+            value = build(self.obj)
+            return self.derived.setdefault(name, value)
+
+
+class ModelRegistry:
+    """Process-wide cache of unpickled model artifacts.
+
+    Each file is loaded once and kept until its mtime or size changes. A
+    changed file is re-hashed and only reloaded when its content differs;
+    the new entry is swapped in under the lock, so readers always see
+    either the old or the new artifact, never a half-loaded one.
+    """
+
+    def __init__(self, check_interval=1.0):
+        # Seconds between stat() calls for an already loaded file
+        self.check_interval = check_interval
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._load_locks = {}
+
+    def _load_lock(self, key):
+        with self._lock:
+            return self._load_locks.setdefault(key, threading.Lock())
+
+    def get_entry(self, path, loader=joblib.load):
+        """Return the ArtifactEntry for path, loading or reloading it if needed"""
+        key = os.path.abspath(path)
+        entry = self._entries.get(key)
+        now = time.monotonic()
+        if entry is not None and now - entry.checked_at < self.check_interval:
+            return entry
+
+        st = os.stat(key)  # raises FileNotFoundError like joblib/pickle would
+        if entry is not None and (st.st_mtime_ns, st.st_size) == (entry.mtime_ns, entry.size):
+            entry.checked_at = now
+            return entry
+
+        # Only one thread loads a given file; the others wait and reuse it
+        with self._load_lock(key):
+            entry = self._entries.get(key)
+            st = os.stat(key)
+            if entry is not None and (st.st_mtime_ns, st.st_size) == (entry.mtime_ns, entry.size):
+                entry.checked_at = time.monotonic()
+                return entry
+
+            sha256 = file_sha256(key)
+            if entry is not None and entry.sha256 == sha256:
+                # Touched but not changed (e.g. copied over with the same bytes)
+                new_entry = ArtifactEntry(entry.obj, key, st.st_mtime_ns, st.st_size, sha256)
+                new_entry.derived = entry.derived
+            else:
+                try:
+                    obj = loader(key)
+                except Exception:
+                    if entry is None:
+                        raise
+                    # Keep answering from the last good artifact, retry on the next check
+                    entry.checked_at = time.monotonic()
+                    return entry
+                new_entry = ArtifactEntry(obj, key, st.st_mtime_ns, st.st_size, sha256)
+
+            with self._lock:
+                self._entries[key] = new_entry
+            return new_entry
+
+    def get(self, path, loader=joblib.load):
+        """Return the loaded artifact stored at path"""
+        return self.get_entry(path, loader).obj
+
+    def get_first(self, paths, loader=joblib.load):
+        """Return the first artifact in paths that exists, or None"""
+        for path in paths:
+            if os.path.exists(path):
+                return self.get(path, loader)
+        return None
+
+    def get_derived(self, path, name, build, loader=joblib.load):
+        """Return build(artifact), computed once per artifact version"""
+        return self.get_entry(path, loader).derive(name, build)
+
+    def version(self, path, loader=joblib.load):
+        """Return the content version of the artifact at path"""
+        return self.get_entry(path, loader).version
+
+    def invalidate(self, path=None):
+        """Drop one cached artifact, or all of them when path is None"""
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(os.path.abspath(path), None)
+
+
+# Shared by every predict path in the process
+registry = ModelRegistry()
@@ -0,0 +1,41 @@
+# page_registry.py
+import importlib
+import importlib.util
+import threading
+
+
+class LazyPage:
+    """A sidebar entry whose module is imported on first navigation.
+
+    LazyPage("charts", "charts") imports charts and calls charts.charts().
+    Without attr the module is a script-style page (top-level Streamlit
+    calls, like predict.py): its code is compiled once and executed on
+    every visit, since a plain import would only run it the first time.
+    """
+
+    def __init__(self, module, attr=None):
+        self.module = module
+        self.attr = attr
+        self._target = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self.attr is not None:
+            return getattr(importlib.import_module(self.module), self.attr)
+
+        spec = importlib.util.find_spec(self.module)
+        if spec is None or spec.origin is None:
+            raise ImportError(f"No page module named {self.module!r}")
+        with open(spec.origin, encoding='utf-8') as f:
+            code = compile(f.read(), spec.origin, 'exec')
+
+        def run_script():
+            exec(code, {'__name__': f'__page__.{self.module}', '__file__': spec.origin})
+        return run_script
+
+    def __call__(self):
+        if self._target is None:
+            with self._lock:
+                if self._target is None:
+                    self._target = self._load()
+        return self._target()
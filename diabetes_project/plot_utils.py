@@ -0,0 +1,14 @@
+# plot_utils.py
+# Figure helpers shared by charts.py and model_info.py. Kept out of charts.py
+# because the root app imports model_info, and there "charts" is its own page.
+import io
+
+
+def to_png(fig):
+    """Render a figure to PNG bytes and release it"""
+    buf = io.BytesIO()
+    try:
+        fig.savefig(buf, format="png", bbox_inches="tight")
+    finally:
+        fig.clear()
+    return buf.getvalue()
@@ -1,6 +1,4 @@
 import streamlit as st
-import joblib
-import numpy as np
 
 st.title("🩺 Predict Diabetes")
 
@@ -16,18 +14,48 @@ bmi = st.number_input("BMI", min_value=0.0, format="%.2f")
 dpf = st.number_input("Diabetes Pedigree Function", min_value=0.0, format="%.3f")
 age = st.number_input("Age", min_value=0)
 
+# Ensemble mode: score with every model in model/ and combine the results
+use_ensemble = st.checkbox("Use all models (ensemble)")
+if use_ensemble:
+    voting = st.radio("Combine models by", ["soft", "hard"],
+                      format_func=lambda m: "Average probability" if m == "soft" else "Majority vote")
+
 if st.button("Predict"):
-    try:
-        # Load the trained model
-        model = joblib.load("model.pkl")
-
-        # Make prediction
-        features = np.array([[pregnancies, glucose, blood_pressure, skin_thickness, insulin, bmi, dpf, age]])
-        prediction = model.predict(features)[0]
-
-        if prediction == 1:
-            st.error("🚨 The model predicts that this person **has diabetes**.")
-        else:
-            st.success("✅ The model predicts that this person **does NOT have diabetes**.")
-    except Exception as e:
-        st.error(f"Model loading failed: {e}")
+    if use_ensemble:
+        try:
+            from ensemble import ensemble_predict
+
+            features = [pregnancies, glucose, blood_pressure, skin_thickness, insulin, bmi, dpf, age]
+            result = ensemble_predict(features, method=voting)
+            if st.session_state.get("username"):
+                from prediction_logger import log_prediction
+                log_prediction(st.session_state["username"], features, result["prediction"], result["probability"])
+
+            if result["prediction"] == 1:
+                st.error(f"🚨 The ensemble predicts that this person **has diabetes** ({result['probability']}%).")
+            else:
+                st.success(f"✅ The ensemble predicts that this person **does NOT have diabetes** ({result['probability']}%).")
+
+            # Per-model breakdown with timings
+            st.dataframe([
+                {"Model": name, "Prediction": r["prediction"], "Probability (%)": r["probability"],
+                 "Time (ms)": round(r["seconds"] * 1000, 2)}
+                for name, r in result["models"].items()
+            ])
+            st.caption(f"Total ensemble time: {result['seconds'] * 1000:.1f} ms")
+        except Exception as e:
+            st.error(f"Ensemble prediction failed: {e}")
+    else:
+        try:
+            from utils import predict_diabetes
+
+            # Make prediction (and log it to the user's history)
+            features = [pregnancies, glucose, blood_pressure, skin_thickness, insulin, bmi, dpf, age]
+            prediction, probability = predict_diabetes(features, username=st.session_state.get("username"))
+
+            if prediction == 1:
+                st.error(f"🚨 The model predicts that this person **has diabetes** ({probability}%).")
+            else:
+                st.success(f"✅ The model predicts that this person **does NOT have diabetes** ({probability}%).")
+        except Exception as e:
+            st.error(f"Model loading failed: {e}")
@@ -0,0 +1,96 @@
+# prediction_cache.py
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+
+CACHE_SIZE = int(os.environ.get('PREDICTION_CACHE_SIZE', 4096))
+CACHE_TTL = float(os.environ.get('PREDICTION_CACHE_TTL', 3600))
+
+
+def canonical_features(features):
+    """Hashable form of a feature vector: floats, with -0.0 and NaN normalised"""
+    out = []
+    for v in features:
+        v = float(v) + 0.0  # -0.0 -> 0.0
+        out.append('nan' if math.isnan(v) else v)
+    return tuple(out)
+
+
+class PredictionCache:
+    """Bounded LRU cache of prediction results with a per-entry TTL.
+
+    Keys are (namespace, model version, canonical features). When a
+    namespace is first seen with a new model version, its old entries are
+    dropped, so a retrained or swapped model never answers from the
+    previous model's results. All access is under one lock; the prediction
+    itself runs outside it, so concurrent sessions only contend briefly.
+    """
+
+    def __init__(self, maxsize=CACHE_SIZE, ttl=CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._versions = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _check_version(self, namespace, version):
+        if self._versions.get(namespace) == version:
+            return
+        old = [k for k in self._entries if k[0] == namespace]
+        for key in old:
+            del self._entries[key]
+        self.invalidations += len(old)
+        self._versions[namespace] = version
+
+    def get_or_compute(self, namespace, version, features, compute):
+        """Return the cached result for features under version, or compute() and store it"""
+        key = (namespace, version, canonical_features(features))
+        now = time.monotonic()
+        with self._lock:
+            self._check_version(namespace, version)
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        value = compute()
+
+        with self._lock:
+            # Skip the store if the model changed while we were computing
+            if self._versions.get(namespace) == version and self.maxsize > 0:
+                self._entries[key] = (now + self.ttl, value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+            }
+
+
+# Shared by predict.predict and utils.predict_diabetes (separate namespaces)
+prediction_cache = PredictionCache()
@@ -0,0 +1,227 @@
+# prediction_logger.py
+import argparse
+import atexit
+import csv
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime
+
+from db_pool import DB_PATH, get_connection
+from drift_monitor import update as update_drift
+from model_registry import PROJECT_DIR, file_sha256
+
+INSERT_SQL = '''
+    INSERT INTO predictions (username, pregnancies, glucose, blood_pressure, skin_thickness,
+                             insulin, bmi, dpf, age, prediction, probability, date)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+HISTORY_CSVS = [
+    os.path.join(os.path.dirname(PROJECT_DIR), 'prediction_history.csv'),
+    os.path.join(PROJECT_DIR, 'data', 'prediction_history.csv'),
+]
+
+
+class PredictionLogger:
+    """Write-behind logger for the predictions table.
+
+    log() only puts a tuple on an in-process queue. A daemon thread drains
+    the queue and writes each batch with one executemany() in a single
+    transaction, whenever batch_size records are waiting or flush_interval
+    seconds have passed, so no commit ever runs on the caller's thread.
+    """
+
+    def __init__(self, db_path=DB_PATH, batch_size=100, flush_interval=1.0):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self.written = 0
+        self.failed = 0
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._run, name='prediction-logger', daemon=True)
+                    self._thread.start()
+
+    def log(self, username, features, prediction, probability=None, date=None):
+        """Queue one prediction; features are the 8 inputs in FEATURE_NAMES order"""
+        date = date or datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        probability = None if probability is None else float(probability)
+        self._queue.put((username, *(float(f) for f in features), int(prediction), probability, date))
+        self._ensure_thread()
+
+    def _drain(self, first):
+        batch = [first]
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch):
+        try:
+            with get_connection(self.db_path) as conn:
+                conn.executemany(INSERT_SQL, batch)
+            written = len(batch)
+        except sqlite3.IntegrityError:
+            # One bad row (e.g. an unknown username) aborts the whole executemany
+            written = self._write_rows(batch)
+        except Exception as e:
+            self.failed += len(batch)
+            print(f"prediction_logger: dropped {len(batch)} record(s): {e}", file=sys.stderr)
+            return
+        self.written += written
+        if not written:
+            return
+        # Fold the new rows into the drift sketches; a failure here never loses predictions
+        try:
+            update_drift(self.db_path)
+        except Exception as e:
+            print(f"prediction_logger: drift update failed: {e}", file=sys.stderr)
+
+    def _write_rows(self, batch):
+        """Insert a batch row by row, skipping the rows the schema rejects"""
+        written, error = 0, None
+        try:
+            with get_connection(self.db_path) as conn:
+                for row in batch:
+                    try:
+                        conn.execute(INSERT_SQL, row)
+                        written += 1
+                    except sqlite3.IntegrityError as e:
+                        error = e
+        except Exception as e:
+            self.failed += len(batch)
+            print(f"prediction_logger: dropped {len(batch)} record(s): {e}", file=sys.stderr)
+            return 0
+        self.failed += len(batch) - written
+        print(f"prediction_logger: rejected {len(batch) - written} record(s): {error}", file=sys.stderr)
+        return written
+
+    def _run(self):
+        while not (self._stop.is_set() and self._queue.empty()):
+            try:
+                first = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            # Flush when the batch is full or flush_interval has passed
+            deadline = time.monotonic() + self.flush_interval
+            while (self._queue.qsize() < self.batch_size - 1 and time.monotonic() < deadline
+                   and not self._stop.is_set()):
+                time.sleep(min(0.05, self.flush_interval))
+            batch = self._drain(first)
+            self._write(batch)
+            for _ in batch:
+                self._queue.task_done()
+
+    def flush(self, timeout=5.0):
+        """Block until everything queued so far has been written (for shutdown and tests)"""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def close(self):
+        """Write whatever is still queued and stop the flusher thread"""
+        self._stop.set()
+        if self._thread is not None and self._thread.is_alive():
+            self._thread.join(timeout=5.0)
+
+
+_logger = PredictionLogger()
+atexit.register(_logger.close)
+
+
+def log_prediction(username, features, prediction, probability=None):
+    """Queue a prediction for the shared logger (never blocks on the database)"""
+    _logger.log(username, features, prediction, probability)
+
+
+def get_logger():
+    return _logger
+
+
+def is_known_user(username, db_path=DB_PATH):
+    """True if username has a users row, i.e. its predictions can be logged"""
+    with get_connection(db_path) as conn:
+        return conn.execute("SELECT 1 FROM users WHERE username=?", (username,)).fetchone() is not None
+
+
+def _create_imports_table(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS history_imports (
+            sha256 TEXT PRIMARY KEY,
+            path TEXT NOT NULL,
+            username TEXT NOT NULL,
+            rows INTEGER NOT NULL,
+            imported_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+
+def import_history_csv(path, username, chunk_size=5000, db_path=DB_PATH):
+    """Bulk-load a prediction_history.csv file into predictions for username.
+
+    Each file is imported once: its content hash is recorded in
+    history_imports and a second import of the same content is skipped.
+    Returns the number of rows inserted; username must already have an account.
+    """
+    if not is_known_user(username, db_path):
+        raise ValueError(f"No user named {username!r}; create the account before importing")
+    digest = file_sha256(path)
+    with get_connection(db_path) as conn:
+        _create_imports_table(conn)
+        if conn.execute("SELECT 1 FROM history_imports WHERE sha256=?", (digest,)).fetchone():
+            print(f"{path}: already imported, skipping")
+            return 0
+
+        # The CSV has no timestamps; stamp the rows with the file's mtime
+        date = datetime.fromtimestamp(os.path.getmtime(path)).strftime('%Y-%m-%d %H:%M:%S')
+        total = 0
+        with open(path, newline='') as f:
+            reader = csv.DictReader(f)
+            chunk = []
+            for row in reader:
+                chunk.append((
+                    username,
+                    row['Pregnancies'], row['Glucose'], row['BloodPressure'], row['SkinThickness'],
+                    row['Insulin'], row['BMI'], row['DiabetesPedigreeFunction'], row['Age'],
+                    int(row['Prediction']), row.get('Probability') or None, date,
+                ))
+                if len(chunk) >= chunk_size:
+                    conn.executemany(INSERT_SQL, chunk)
+                    total += len(chunk)
+                    chunk = []
+            if chunk:
+                conn.executemany(INSERT_SQL, chunk)
+                total += len(chunk)
+
+        conn.execute("INSERT INTO history_imports (sha256, path, username, rows) VALUES (?, ?, ?, ?)",
+                     (digest, os.path.abspath(path), username, total))
+    print(f"{path}: imported {total} rows for {username}")
+    return total
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import prediction_history.csv files into the predictions table.")
+    parser.add_argument('paths', nargs='*', default=HISTORY_CSVS, help="CSV files (default: the known history files)")
+    parser.add_argument('--username', required=True, help="user the imported predictions belong to")
+    args = parser.parse_args()
+
+    if not is_known_user(args.username):
+        parser.error(f"no user named {args.username!r}; sign up first")
+    for csv_path in args.paths:
+        if os.path.exists(csv_path) and os.path.getsize(csv_path) > 0:
+            import_history_csv(csv_path, args.username)
+        else:
+            print(f"{csv_path}: missing or empty, skipping")
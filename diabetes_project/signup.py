@@ -1,6 +1,8 @@
 import streamlit as st
 import sqlite3
-import bcrypt
+
+from auth import AuthBusyError, hash_password
+from db_pool import get_connection
 
 
 def signup():
@@ -26,22 +28,26 @@ def signup():
                 st.error("Password must be at least 6 characters long")
                 return
 
-            conn = sqlite3.connect('db/diabetes_app.db')
-            c = conn.cursor()
-
             try:
-                c.execute("SELECT * FROM users WHERE username=?", (username,))
-                if c.fetchone():
+                with get_connection() as conn:
+                    taken = conn.execute("SELECT 1 FROM users WHERE username=?", (username,)).fetchone()
+                if taken:
                     st.error("Username already exists")
                     return
 
-                hashed_pw = bcrypt.hashpw(password.encode(), bcrypt.gensalt())
-                c.execute("INSERT INTO users (username, password) VALUES (?, ?)",
-                          (username, hashed_pw))
-                conn.commit()
+                # Only hash once the name is known to be free, and without
+                # holding a pooled connection while bcrypt runs
+                hashed_pw = hash_password(password)
+
+                with get_connection() as conn:
+                    conn.execute("INSERT INTO users (username, password) VALUES (?, ?)",
+                                 (username, hashed_pw))
                 st.success("Account created successfully! Please login.")
 
+            except AuthBusyError as e:
+                st.warning(str(e))
+            except sqlite3.IntegrityError:
+                # Taken by another signup between the check and the insert
+                st.error("Username already exists")
             except sqlite3.Error as e:
-                st.error(f"Database error: {e}")
-            finally:
-                conn.close()
\ No newline at end of file
+                st.error(f"Database error: {e}")
\ No newline at end of file
@@ -0,0 +1,215 @@
+# synthetic_data.py
+import argparse
+import contextlib
+import io
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from db_pool import get_connection, get_pool
+
+FEATURE_NAMES = ['Pregnancies', 'Glucose', 'BloodPressure', 'SkinThickness', 'Insulin',
+                 'BMI', 'DiabetesPedigreeFunction', 'Age']
+
+CHUNK_SIZE = 100_000
+SEED = 42
+# Every generated user can log in with this password
+LOADTEST_PASSWORD = 'loadtest'
+START_DATE = np.datetime64('2020-01-01T00:00:00')
+ROW_INTERVAL = np.timedelta64(30, 's')
+
+
+def generate_chunk(index, chunk_size=CHUNK_SIZE, seed=SEED, n_rows=None):
+    """Rows [index * chunk_size, ...) of the dataset identified by seed.
+
+    Each chunk draws from its own Generator seeded with (seed, index), so
+    any chunk can be produced on its own, in any process or order, and
+    always comes out the same. Distributions and the outcome rule follow
+    train_model.create_synthetic_data.
+    """
+    start = index * chunk_size
+    n = chunk_size if n_rows is None else max(0, min(chunk_size, n_rows - start))
+    rng = np.random.Generator(np.random.PCG64(np.random.SeedSequence(seed, spawn_key=(index,))))
+
+    df = pd.DataFrame({
+        'Pregnancies': rng.integers(0, 17, n),
+        'Glucose': rng.normal(120, 30, n),
+        'BloodPressure': rng.normal(70, 20, n),
+        'SkinThickness': rng.normal(20, 15, n),
+        'Insulin': rng.normal(80, 100, n),
+        'BMI': rng.normal(25, 7, n),
+        'DiabetesPedigreeFunction': rng.normal(0.5, 0.3, n),
+        'Age': rng.integers(21, 81, n),
+    })
+    risk_score = (
+        (df['Glucose'] > 140) * 0.3 +
+        (df['BMI'] > 30) * 0.2 +
+        (df['Age'] > 50) * 0.2 +
+        (df['BloodPressure'] > 90) * 0.1 +
+        (df['Pregnancies'] > 5) * 0.1 +
+        rng.random(n) * 0.1
+    )
+    df['Outcome'] = (risk_score > 0.5).astype(int)
+    df['_risk'] = risk_score
+    df['_row'] = np.arange(start, start + n)
+    return df
+
+
+def _chunk_count(n_rows, chunk_size):
+    return -(-n_rows // chunk_size)
+
+
+def iter_chunks(n_rows, chunk_size=CHUNK_SIZE, seed=SEED, workers=1, transform=None):
+    """Yield the dataset's chunks in order, generating up to workers of them in parallel
+
+    transform, a module-level function, is applied to each chunk in the
+    worker (e.g. CSV formatting) so that work is parallel too. At most
+    2 * workers chunks are in flight, so memory stays bounded no matter
+    how many rows are requested.
+    """
+    n_chunks = _chunk_count(n_rows, chunk_size)
+    if workers <= 1:
+        for i in range(n_chunks):
+            yield _make_chunk(i, chunk_size, seed, n_rows, transform)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = []
+        next_index = 0
+        while next_index < n_chunks or pending:
+            while next_index < n_chunks and len(pending) < 2 * workers:
+                pending.append(pool.submit(_make_chunk, next_index, chunk_size, seed, n_rows, transform))
+                next_index += 1
+            yield pending.pop(0).result()
+
+
+def _make_chunk(index, chunk_size, seed, n_rows, transform):
+    chunk = generate_chunk(index, chunk_size, seed, n_rows)
+    return chunk if transform is None else transform(chunk)
+
+
+def _training_frame(chunk):
+    return chunk[FEATURE_NAMES + ['Outcome']]
+
+
+def _csv_rows(chunk):
+    return len(chunk), _training_frame(chunk).to_csv(header=False, index=False)
+
+
+def write_csv(path, n_rows, chunk_size=CHUNK_SIZE, seed=SEED, workers=1, progress=None):
+    """Stream n_rows training rows (diabetes.csv columns) to a CSV file"""
+    done = 0
+    with open(path, 'w', newline='') as f:
+        f.write(','.join(FEATURE_NAMES + ['Outcome']) + '\n')
+        for n, text in iter_chunks(n_rows, chunk_size, seed, workers, transform=_csv_rows):
+            f.write(text)
+            done += n
+            if progress:
+                progress(done)
+    return done
+
+
+def write_parquet(path, n_rows, chunk_size=CHUNK_SIZE, seed=SEED, workers=1, progress=None):
+    """Stream n_rows training rows to a Parquet file, one row group per chunk"""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Parquet output needs pyarrow (pip install pyarrow)") from None
+
+    writer = None
+    done = 0
+    try:
+        for chunk in iter_chunks(n_rows, chunk_size, seed, workers):
+            table = pa.Table.from_pandas(_training_frame(chunk), preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            writer.write_table(table)
+            done += len(chunk)
+            if progress:
+                progress(done)
+    finally:
+        if writer is not None:
+            writer.close()
+    return done
+
+
+def write_sqlite(path, n_rows, n_users=100, usernames=None, chunk_size=CHUNK_SIZE, seed=SEED,
+                 workers=1, progress=None):
+    """Seed the users and predictions tables of the app database at path.
+
+    Users are named user000000, user000001, ... (or taken from usernames)
+    and all share LOADTEST_PASSWORD. Rows are spread over the users
+    round-robin, dated ROW_INTERVAL apart from START_DATE; each chunk is
+    inserted in its own transaction.
+    """
+    import bcrypt
+    from init_db import init_database
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        init_database(path)
+
+    usernames = list(usernames or (f'user{i:06d}' for i in range(n_users)))
+    # One cheap hash shared by every generated user
+    password = bcrypt.hashpw(LOADTEST_PASSWORD.encode(), bcrypt.gensalt(rounds=4))
+    with get_connection(path) as conn:
+        conn.executemany("INSERT OR IGNORE INTO users (username, password) VALUES (?, ?)",
+                         [(u, password) for u in usernames])
+
+    names = np.array(usernames, dtype=object)
+    done = 0
+    for chunk in iter_chunks(n_rows, chunk_size, seed, workers):
+        rows = chunk['_row'].to_numpy()
+        dates = np.char.replace(np.datetime_as_string(START_DATE + rows * ROW_INTERVAL, unit='s'), 'T', ' ')
+        probability = np.round(np.minimum(chunk['_risk'].to_numpy(), 1.0) * 100, 2)
+        columns = [names[rows % len(names)]] + [chunk[c].to_numpy() for c in FEATURE_NAMES]
+        columns += [chunk['Outcome'].to_numpy(), probability, dates]
+        with get_connection(path) as conn:
+            conn.executemany('''
+                INSERT INTO predictions (username, pregnancies, glucose, blood_pressure,
+                    skin_thickness, insulin, bmi, dpf, age, prediction, probability, date)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', zip(*(c.tolist() for c in columns)))
+        done += len(chunk)
+        if progress:
+            progress(done)
+
+    with get_connection(path) as conn:
+        conn.execute("ANALYZE")
+    return done
+
+
+WRITERS = {'csv': write_csv, 'parquet': write_parquet, 'sqlite': write_sqlite}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a large, reproducible synthetic diabetes dataset.")
+    parser.add_argument('out', help="output file (.csv, .parquet or .db)")
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--format', choices=sorted(WRITERS),
+                        help="output format (default: from the file extension)")
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    parser.add_argument('--seed', type=int, default=SEED)
+    parser.add_argument('--workers', type=int, default=1, help="processes generating chunks in parallel")
+    parser.add_argument('--users', type=int, default=100, help="users to create (sqlite output only)")
+    args = parser.parse_args()
+
+    fmt = args.format or {'.csv': 'csv', '.parquet': 'parquet', '.db': 'sqlite'}.get(
+        os.path.splitext(args.out)[1].lower())
+    if fmt is None:
+        parser.error("cannot tell the format from the file name; pass --format")
+
+    kwargs = dict(chunk_size=args.chunk_size, seed=args.seed, workers=args.workers,
+                  progress=lambda done: print(f"\r{done:,}/{args.rows:,} rows", end='', flush=True))
+    if fmt == 'sqlite':
+        kwargs['n_users'] = args.users
+
+    start = time.perf_counter()
+    n = WRITERS[fmt](args.out, args.rows, **kwargs)
+    elapsed = time.perf_counter() - start
+    if fmt == 'sqlite':
+        get_pool(args.out).close()
+    print(f"\nWrote {n:,} rows to {args.out} in {elapsed:.1f}s ({n / elapsed:,.0f} rows/s)")
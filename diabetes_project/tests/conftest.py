@@ -0,0 +1,8 @@
+# conftest.py
+import os
+import sys
+
+# The project's modules import each other as top-level names (run from diabetes_project/)
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_DIR not in sys.path:
+    sys.path.insert(0, PROJECT_DIR)
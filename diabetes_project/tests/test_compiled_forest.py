@@ -0,0 +1,113 @@
+# test_compiled_forest.py
+import os
+import warnings
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import ExtraTreesClassifier, RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+
+from compiled_forest import COMPILED_MAX_ROWS, CompiledForest, check_equivalence, compile_forest, is_forest
+from model_registry import MODEL_DIR, PROJECT_DIR
+
+DATA_PATH = os.path.join(PROJECT_DIR, 'diabetes.csv')
+SHIPPED_FORESTS = [
+    os.path.join(MODEL_DIR, 'random_forest.pkl'),
+    os.path.join(MODEL_DIR, 'diabetes_model.pkl'),
+    os.path.join(os.path.dirname(PROJECT_DIR), 'model.pkl'),
+]
+
+
+@pytest.fixture(scope='module')
+def data():
+    df = pd.read_csv(DATA_PATH)
+    return df.drop(columns='Outcome').to_numpy(dtype=np.float64), df['Outcome'].to_numpy()
+
+
+def _probe(X, n=2000, seed=0):
+    """Rows around the data, plus exact copies so thresholds are hit on the nose"""
+    rng = np.random.default_rng(seed)
+    noisy = X[rng.integers(0, len(X), n)] * rng.normal(1, 0.2, (n, X.shape[1]))
+    return np.vstack([X, noisy])
+
+
+@pytest.mark.parametrize('cls', [RandomForestClassifier, ExtraTreesClassifier])
+def test_matches_sklearn_bit_for_bit(cls, data):
+    X, y = data
+    model = cls(n_estimators=25, random_state=0).fit(X, y)
+    compiled = compile_forest(model)
+    X_check = _probe(X)
+    assert np.array_equal(compiled.predict_proba(X_check), model.predict_proba(X_check))
+    assert np.array_equal(compiled.predict(X_check), model.predict(X_check))
+
+
+def test_single_row(data):
+    X, y = data
+    model = RandomForestClassifier(n_estimators=10, random_state=1).fit(X, y)
+    compiled = compile_forest(model)
+    for row in X[:20]:
+        assert np.array_equal(compiled.predict_proba(row), model.predict_proba(row.reshape(1, -1)))
+
+
+def test_missing_values(data):
+    X, y = data
+    X = X.copy()
+    rng = np.random.default_rng(2)
+    X[rng.random(X.shape) < 0.1] = np.nan
+    model = RandomForestClassifier(n_estimators=10, random_state=2).fit(X, y)
+    check_equivalence(model, compile_forest(model), X)
+
+
+def test_save_load_roundtrip(data, tmp_path):
+    X, y = data
+    compiled = compile_forest(RandomForestClassifier(n_estimators=5, random_state=3).fit(X, y))
+    path = tmp_path / 'forest.npz'
+    compiled.save(path)
+    loaded = CompiledForest.load(path)
+    assert loaded.depth == compiled.depth
+    assert np.array_equal(loaded.predict_proba(X), compiled.predict_proba(X))
+
+
+def test_rejects_non_forest(data):
+    X, y = data
+    model = LogisticRegression(max_iter=1000).fit(X, y)
+    assert not is_forest(model)
+    with pytest.raises(TypeError):
+        compile_forest(model)
+
+
+@pytest.mark.parametrize('path', SHIPPED_FORESTS, ids=os.path.basename)
+def test_shipped_forests(path, data):
+    if not os.path.exists(path):
+        pytest.skip(f"{path} not present")
+    with warnings.catch_warnings():
+        # Pickled with an older scikit-learn
+        warnings.simplefilter('ignore')
+        model = joblib.load(path)
+    X, _ = data
+    # Artifacts fitted on a DataFrame are scored on one, the others on the raw array
+    X_check = _probe(X)
+    if hasattr(model, 'feature_names_in_'):
+        expected = model.predict_proba(pd.DataFrame(X_check, columns=model.feature_names_in_))
+    else:
+        expected = model.predict_proba(X_check)
+    assert np.array_equal(compile_forest(model).predict_proba(X_check), expected)
+
+
+def test_root_predict_batch_agrees_across_size_cutoff(data, monkeypatch):
+    from benchmark import ROOT_DIR, _root_predict
+
+    if not os.path.exists(os.path.join(ROOT_DIR, 'model.pkl')):
+        pytest.skip("model.pkl not present")
+    monkeypatch.chdir(ROOT_DIR)
+    root_predict = _root_predict()
+    X = _probe(data[0], n=COMPILED_MAX_ROWS)[:3 * COMPILED_MAX_ROWS]
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        large = root_predict.predict_batch(X)  # past the cutoff: sklearn
+        small = [root_predict.predict_batch(X[i:i + COMPILED_MAX_ROWS])
+                 for i in range(0, len(X), COMPILED_MAX_ROWS)]  # compiled
+    assert np.array_equal(large['proba'], np.concatenate([s['proba'] for s in small]))
+    assert np.array_equal(large['labels'], np.concatenate([s['labels'] for s in small]))
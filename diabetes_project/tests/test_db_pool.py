@@ -0,0 +1,18 @@
+# test_db_pool.py
+import sqlite3
+
+import pytest
+
+from db_pool import ConnectionPool
+from load_test import _classify
+
+
+def test_exhausted_pool_raises_operational_error(tmp_path):
+    pool = ConnectionPool(str(tmp_path / 'pool.db'), size=1, timeout=0.05)
+    conn = pool.acquire()
+    with pytest.raises(sqlite3.OperationalError, match='pool exhausted') as exc:
+        pool.acquire()
+    assert _classify(f"exception: {exc.value}") == 'db_lock'
+    pool.release(conn)
+    assert pool.acquire() is conn
+    pool.close()
@@ -0,0 +1,54 @@
+# test_history_export.py
+import csv
+import io
+
+import pytest
+from streamlit.runtime.download_data_util import convert_data_to_bytes_and_infer_mime
+
+from db_pool import get_connection, get_pool
+from history_export import HEADERS, export_file
+from init_db import init_database
+
+
+@pytest.fixture
+def db(tmp_path):
+    path = str(tmp_path / 'diabetes_app.db')
+    init_database(path)
+    with get_connection(path) as conn:
+        conn.executemany("INSERT INTO users (username, password) VALUES (?, 'x')", [('alice',), ('bob',)])
+        conn.executemany(
+            "INSERT INTO predictions (username, glucose, prediction, probability, date) VALUES (?, ?, ?, ?, ?)",
+            [('alice', 100 + i, i % 2, 10.0 * i, f'2026-01-{1 + i:02d} 08:00:00') for i in range(5)]
+            + [('bob', 150, 1, 80.0, '2026-01-02 09:00:00')]
+        )
+    yield path
+    get_pool(path).close()
+
+
+def _download(data):
+    """What st.download_button does with a deferred data callable's result"""
+    content, _ = convert_data_to_bytes_and_infer_mime(data, RuntimeError(f"unsupported {type(data)}"))
+    return content
+
+
+def test_csv_export_is_downloadable(db):
+    with export_file('csv', 'alice', path=db) as f:
+        content = _download(f)
+    rows = list(csv.reader(io.StringIO(content.decode('utf-8'))))
+    assert rows[0] == HEADERS
+    assert [r[1] for r in rows[1:]] == ['alice'] * 5
+
+
+def test_csv_date_range_is_inclusive(db):
+    with export_file('csv', 'alice', '2026-01-02', '2026-01-04', path=db) as f:
+        rows = list(csv.reader(io.StringIO(_download(f).decode('utf-8'))))
+    assert [r[2][:10] for r in rows[1:]] == ['2026-01-02', '2026-01-03', '2026-01-04']
+
+
+def test_parquet_export_is_downloadable(db):
+    pq = pytest.importorskip('pyarrow.parquet')
+    with export_file('parquet', path=db) as f:
+        content = _download(f)
+    table = pq.read_table(io.BytesIO(content))
+    assert table.column_names == HEADERS
+    assert table.num_rows == 6
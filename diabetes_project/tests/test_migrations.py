@@ -0,0 +1,152 @@
+# test_migrations.py
+import sqlite3
+
+import pytest
+
+from charts import get_data_version
+from db_pool import get_connection, get_pool
+from history import get_page, get_summary
+from init_db import MIGRATIONS, init_database, migrate
+
+USERS = ('alice', 'bob')
+# predictions as created before any migration existed
+OLD_PREDICTIONS = '''
+    CREATE TABLE predictions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, username TEXT NOT NULL, pregnancies INTEGER,
+        glucose REAL, blood_pressure REAL, skin_thickness REAL, insulin REAL, bmi REAL, dpf REAL,
+        age INTEGER, prediction INTEGER, probability REAL, date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+'''
+
+
+@pytest.fixture
+def db(tmp_path):
+    path = str(tmp_path / 'diabetes_app.db')
+    init_database(path)
+    with get_connection(path) as conn:
+        conn.executemany("INSERT INTO users (username, password) VALUES (?, 'x')", [(u,) for u in USERS])
+    yield path
+    get_pool(path).close()
+
+
+def _insert(conn, username, prediction, date='2026-01-01 00:00:00'):
+    return conn.execute(
+        "INSERT INTO predictions (username, glucose, prediction, probability, date) VALUES (?, 120, ?, 50, ?)",
+        (username, prediction, date)
+    ).lastrowid
+
+
+def _summary(conn, username):
+    return conn.execute(
+        "SELECT total, high_risk FROM prediction_summary WHERE username=?", (username,)
+    ).fetchone()
+
+
+def _recount(conn, username):
+    return conn.execute(
+        "SELECT COUNT(*), COALESCE(SUM(prediction IS 1), 0) FROM predictions WHERE username=?", (username,)
+    ).fetchone()
+
+
+def test_fresh_database_is_fully_migrated(db):
+    with get_connection(db) as conn:
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == len(MIGRATIONS)
+        assert migrate(conn) == 0
+        indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='index'")}
+    assert {'idx_predictions_user_date', 'idx_predictions_user_charts'} <= indexes
+
+
+def test_summary_backfilled_from_existing_rows(tmp_path):
+    path = str(tmp_path / 'old.db')
+    conn = sqlite3.connect(path)
+    conn.execute(OLD_PREDICTIONS)
+    for prediction in (1, 0, 1, None):
+        _insert(conn, 'alice', prediction)
+    _insert(conn, 'bob', 0)
+    conn.commit()
+
+    assert migrate(conn) == len(MIGRATIONS)
+    assert _summary(conn, 'alice') == (4, 2)
+    assert _summary(conn, 'bob') == (1, 0)
+    conn.close()
+
+
+def test_triggers_track_insert_update_delete(db):
+    with get_connection(db) as conn:
+        ids = [_insert(conn, 'alice', p) for p in (1, 1, 0)]
+        _insert(conn, 'bob', 1)
+        assert _summary(conn, 'alice') == (3, 2)
+
+        conn.execute("UPDATE predictions SET prediction=0 WHERE id=?", (ids[0],))
+        assert _summary(conn, 'alice') == (3, 1)
+
+        conn.execute("UPDATE predictions SET username='bob' WHERE id=?", (ids[1],))
+        assert _summary(conn, 'alice') == (2, 0)
+        assert _summary(conn, 'bob') == (2, 2)
+
+        conn.execute("DELETE FROM predictions WHERE id=?", (ids[2],))
+        for username in USERS:
+            assert _summary(conn, username) == _recount(conn, username)
+            assert tuple(get_summary(conn, username)) == _recount(conn, username)
+
+
+def test_summary_without_migrations_falls_back_to_count(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / 'old.db'))
+    conn.execute(OLD_PREDICTIONS)
+    _insert(conn, 'alice', 1)
+    _insert(conn, 'alice', 0)
+    assert tuple(get_summary(conn, 'alice')) == (2, 1)
+    conn.close()
+
+
+def test_keyset_pages_cover_history_once(db):
+    with get_connection(db) as conn:
+        # Shared timestamps make the id tie-break matter
+        for i in range(23):
+            _insert(conn, 'alice', i % 2, f'2026-01-{1 + i // 3:02d} 00:00:00')
+        _insert(conn, 'bob', 1)
+        expected = [row[0] for row in conn.execute(
+            "SELECT id FROM predictions WHERE username='alice' ORDER BY date DESC, id DESC")]
+
+        seen, after = [], None
+        while page := get_page(conn, 'alice', after, limit=5):
+            seen += [row[-1] for row in page]
+            after = (page[-1][-2], page[-1][-1])
+    assert seen == expected
+    assert len(expected) == 23
+
+
+def test_data_version_changes_on_every_write(db):
+    with get_connection(db) as conn:
+        versions = [get_data_version(conn, 'alice')]
+        row_id = _insert(conn, 'alice', 0)
+        versions.append(get_data_version(conn, 'alice'))
+        # Same totals as before, but the rows changed
+        conn.execute("UPDATE predictions SET probability=75 WHERE id=?", (row_id,))
+        versions.append(get_data_version(conn, 'alice'))
+        conn.execute("DELETE FROM predictions WHERE id=?", (row_id,))
+        versions.append(get_data_version(conn, 'alice'))
+        bob = get_data_version(conn, 'bob')
+    assert len(set(versions)) == len(versions)
+    assert bob == 0
+
+
+def test_version_column_backfilled(tmp_path, monkeypatch):
+    path = str(tmp_path / 'v3.db')
+    conn = sqlite3.connect(path)
+    conn.execute(OLD_PREDICTIONS)
+    for p in (1, 0, 0):
+        _insert(conn, 'alice', p)
+    conn.commit()
+    # Stop at migration 3, add a row under its triggers, then run migration 4
+    with monkeypatch.context() as m:
+        m.setattr('init_db.MIGRATIONS', MIGRATIONS[:3])
+        migrate(conn)
+    _insert(conn, 'alice', 1)
+    conn.commit()
+    migrate(conn)
+    assert conn.execute("SELECT version FROM prediction_summary WHERE username='alice'").fetchone()[0] == 4
+    before = get_data_version(conn, 'alice')
+    _insert(conn, 'alice', 0)
+    assert get_data_version(conn, 'alice') == before + 1
+    conn.close()
@@ -0,0 +1,51 @@
+# test_model_pairing.py
+import os
+
+import joblib
+import pytest
+
+import utils
+from model_registry import file_sha256, registry, write_manifest
+
+
+@pytest.fixture
+def model_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(utils, 'MODEL_PATH', str(tmp_path / 'diabetes_model.pkl'))
+    monkeypatch.setattr(utils, 'SCALER_PATH', str(tmp_path / 'scaler.pkl'))
+    monkeypatch.setattr(utils, 'MANIFEST_PATH', str(tmp_path / 'manifest.json'))
+    monkeypatch.setattr(utils, 'PAIR_GRACE', 0.2)
+    monkeypatch.setattr(utils, '_served_pair', None)
+    monkeypatch.setattr(utils, '_mismatch', None)
+    monkeypatch.setattr(registry, 'check_interval', 0)
+    yield tmp_path
+    registry.invalidate()
+
+
+def _write(model_dir, name, obj, promote=False):
+    path = os.path.join(model_dir, name)
+    joblib.dump(obj, path)
+    if promote:
+        write_manifest({name: file_sha256(path)}, utils.MANIFEST_PATH)
+
+
+def _served():
+    model_entry, scaler_entry = utils._artifact_entries()
+    return model_entry.obj, scaler_entry.obj
+
+
+def test_grace_restarts_for_each_new_mismatch(model_dir):
+    # Each version has a different length, so the registry sees every rewrite by size
+    _write(model_dir, 'diabetes_model.pkl', 'model-a', promote=True)
+    _write(model_dir, 'scaler.pkl', 'scaler-a', promote=True)
+    assert _served() == ('model-a', 'scaler-a')
+
+    # Copied in by hand: the last promoted pair is served until the grace runs out
+    _write(model_dir, 'diabetes_model.pkl', 'model-bb')
+    _write(model_dir, 'scaler.pkl', 'scaler-bb')
+    assert _served() == ('model-a', 'scaler-a')
+    utils._mismatch = (utils._mismatch[0], utils._mismatch[1] - 1)
+    assert _served() == ('model-bb', 'scaler-bb')
+
+    # A later promotion caught half done is not served, however old the first mismatch is
+    _write(model_dir, 'diabetes_model.pkl', 'model-ccc')
+    assert _served() == ('model-a', 'scaler-a')
@@ -0,0 +1,55 @@
+# test_prediction_logger.py
+import sqlite3
+
+import pytest
+
+from db_pool import get_connection, get_pool
+from init_db import init_database
+from prediction_logger import INSERT_SQL, PredictionLogger, import_history_csv, is_known_user
+
+
+@pytest.fixture
+def db(tmp_path):
+    path = str(tmp_path / 'diabetes_app.db')
+    init_database(path)
+    with get_connection(path) as conn:
+        conn.executemany("INSERT INTO users (username, password) VALUES (?, 'x')", [('alice',), ('bob',)])
+    yield path
+    get_pool(path).close()
+
+
+def test_unknown_username_does_not_drop_the_batch(db):
+    logger = PredictionLogger(db_path=db, batch_size=10, flush_interval=0.05)
+    for i, username in enumerate(['alice', 'admin', 'bob', 'ghost', 'alice']):
+        logger.log(username, [1, 100 + i, 70, 20, 80, 30.0, 0.5, 40], i % 2, 50.0)
+    logger.flush()
+    logger.close()
+
+    assert (logger.written, logger.failed) == (3, 2)
+    with get_connection(db) as conn:
+        rows = conn.execute("SELECT username, glucose FROM predictions ORDER BY id").fetchall()
+    assert rows == [('alice', 100.0), ('bob', 102.0), ('alice', 104.0)]
+
+
+def test_is_known_user(db):
+    assert is_known_user('alice', db_path=db)
+    assert not is_known_user('admin', db_path=db)
+
+
+def test_import_rejects_unknown_user(db, tmp_path):
+    path = tmp_path / 'prediction_history.csv'
+    path.write_text("Pregnancies,Glucose,BloodPressure,SkinThickness,Insulin,BMI,DiabetesPedigreeFunction,Age,"
+                    "Prediction,Probability\n1,120,70,20,80,30.0,0.5,40,1,75.0\n")
+    with pytest.raises(ValueError, match='ghost'):
+        import_history_csv(str(path), 'ghost', db_path=db)
+    assert import_history_csv(str(path), 'alice', db_path=db) == 1
+    with get_connection(db) as conn:
+        assert conn.execute("SELECT username FROM predictions").fetchall() == [('alice',)]
+
+
+def test_foreign_keys_reject_unknown_user(db):
+    with pytest.raises(sqlite3.IntegrityError):
+        with get_connection(db) as conn:
+            conn.execute(INSERT_SQL, ('ghost', 1, 120, 70, 20, 80, 30.0, 0.5, 40, 1, 75.0, '2026-01-01 00:00:00'))
+    with get_connection(db) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM predictions").fetchone()[0] == 0
@@ -7,6 +7,11 @@ from sklearn.preprocessing import StandardScaler
 from sklearn.metrics import accuracy_score, classification_report
 import joblib
 import os
+import shutil
+import tempfile
+
+from model_registry import MODEL_DIR
+from training_jobs import promote
 
 
 def create_synthetic_data():
@@ -76,14 +81,37 @@ def train_and_save_model():
     print(f"Training accuracy: {train_accuracy:.3f}")
     print(f"Test accuracy: {test_accuracy:.3f}")
 
-    # Save model and scaler
-    os.makedirs('model', exist_ok=True)
-    joblib.dump(model, 'model/diabetes_model.pkl')
-    joblib.dump(scaler, 'model/scaler.pkl')
+    # Stage model and scaler, then swap them in (promote updates the manifest)
+    os.makedirs(MODEL_DIR, exist_ok=True)
+    staging_dir = tempfile.mkdtemp(prefix='.staging-', dir=MODEL_DIR)
+    try:
+        joblib.dump(model, os.path.join(staging_dir, 'diabetes_model.pkl'))
+        joblib.dump(scaler, os.path.join(staging_dir, 'scaler.pkl'))
+        promote(staging_dir, MODEL_DIR)
+    finally:
+        shutil.rmtree(staging_dir, ignore_errors=True)
 
     print("\nModel and scaler saved successfully!")
     return model, scaler
 
 
 if __name__ == "__main__":
-    train_and_save_model()
\ No newline at end of file
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Train the diabetes model.")
+    parser.add_argument('--stream', metavar='CSV',
+                        help="train out-of-core on a large CSV (see incremental_training.py)")
+    parser.add_argument('--epochs', type=int, default=1)
+    parser.add_argument('--warm-start', action='store_true')
+    args = parser.parse_args()
+
+    if args.stream:
+        from incremental_training import train_incremental
+
+        result = train_incremental(args.stream, epochs=args.epochs, warm_start=args.warm_start,
+                                   progress=lambda fraction, message: print(message))
+        accuracy = result['holdout_accuracy']
+        print(f"Holdout accuracy: {'n/a' if accuracy is None else f'{accuracy:.3f}'} "
+              f"({result['rows_trained']:,} rows trained, {result['seconds']:.1f}s)")
+    else:
+        train_and_save_model()
\ No newline at end of file
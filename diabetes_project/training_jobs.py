@@ -0,0 +1,185 @@
+# training_jobs.py
+import multiprocessing
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import traceback
+from datetime import datetime
+
+from db_pool import get_connection
+from model_registry import MANIFEST_PATH, MODEL_DIR, file_sha256, write_manifest
+
+STATUSES = ('queued', 'running', 'done', 'failed')
+
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def create_jobs_table(c):
+    """Create the training_jobs table on a cursor/connection"""
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS training_jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            status TEXT NOT NULL DEFAULT 'queued',
+            progress REAL NOT NULL DEFAULT 0,
+            message TEXT,
+            error TEXT,
+            pid INTEGER,
+            created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            started_date TIMESTAMP,
+            finished_date TIMESTAMP
+        )
+    ''')
+
+
+def _now():
+    return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _update(job_id, **fields):
+    assignments = ', '.join(f"{name}=?" for name in fields)
+    with get_connection() as conn:
+        conn.execute(f"UPDATE training_jobs SET {assignments} WHERE id=?", (*fields.values(), job_id))
+
+
+def _claim_next_job():
+    """Atomically move the oldest queued job to running and return its id"""
+    with get_connection() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        row = conn.execute(
+            "SELECT id FROM training_jobs WHERE status='queued' ORDER BY id LIMIT 1"
+        ).fetchone()
+        if row is None:
+            return None
+        conn.execute(
+            "UPDATE training_jobs SET status='running', pid=?, started_date=?, message=? WHERE id=?",
+            (os.getpid(), _now(), 'Starting', row[0])
+        )
+        return row[0]
+
+
+def promote(staging_dir, model_dir=MODEL_DIR):
+    """Move every artifact from staging_dir into model_dir, then record them in the manifest.
+
+    Each file is swapped atomically with os.replace, so the registry only
+    ever loads complete artifacts, but the set is not: between two replaces
+    the directory holds a new file next to an old one. The manifest (the
+    sha256 of every promoted file) is replaced last, and utils.load_model
+    only serves a model and scaler that both match it.
+    """
+    names = sorted(os.listdir(staging_dir))
+    hashes = {name: file_sha256(os.path.join(staging_dir, name)) for name in names}
+    for name in names:
+        os.replace(os.path.join(staging_dir, name), os.path.join(model_dir, name))
+    write_manifest(hashes, os.path.join(model_dir, os.path.basename(MANIFEST_PATH)))
+
+
+def _run_job(job_id):
+    # Imported here so the web process does not pay for sklearn on import
+    from utils import train_model
+
+    os.makedirs(MODEL_DIR, exist_ok=True)
+    # Stage inside MODEL_DIR so os.replace never crosses a filesystem boundary
+    staging_dir = tempfile.mkdtemp(prefix='.staging-', dir=MODEL_DIR)
+    try:
+        train_model(out_dir=staging_dir,
+                    progress=lambda fraction, message: _update(job_id, progress=fraction, message=message))
+        promote(staging_dir)
+        _update(job_id, status='done', progress=1.0, message='Model promoted', finished_date=_now())
+    except Exception as e:
+        _update(job_id, status='failed', message=str(e), error=traceback.format_exc(), finished_date=_now())
+    finally:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+
+
+def _worker_main():
+    """Run queued jobs one after another until the queue is empty"""
+    while True:
+        job_id = _claim_next_job()
+        if job_id is None:
+            return
+        _run_job(job_id)
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Exists, owned by another user
+        return True
+    return True
+
+
+def _fail_orphaned_jobs(conn):
+    """Mark running jobs whose worker process no longer exists as failed"""
+    running = conn.execute("SELECT id, pid FROM training_jobs WHERE status='running'").fetchall()
+    orphaned = [(_now(), job_id) for job_id, pid in running if not pid or not _pid_alive(pid)]
+    conn.executemany(
+        "UPDATE training_jobs SET status='failed', message='Worker process exited', finished_date=? "
+        "WHERE id=? AND status='running'", orphaned
+    )
+
+
+def _ensure_worker():
+    global _worker
+    with _worker_lock:
+        if _worker is not None and _worker.is_alive():
+            return
+        if _worker is not None:
+            # The previous worker died mid-job (killed, OOM, ...)
+            with get_connection() as conn:
+                conn.execute(
+                    "UPDATE training_jobs SET status='failed', message='Worker process exited', finished_date=? "
+                    "WHERE status='running' AND pid=?", (_now(), _worker.pid)
+                )
+        # spawn: never fork the Streamlit server's threads
+        _worker = multiprocessing.get_context('spawn').Process(target=_worker_main, daemon=True)
+        _worker.start()
+
+
+def submit_job():
+    """Queue a training job, start the worker process if needed and return the job id"""
+    with get_connection() as conn:
+        create_jobs_table(conn)
+        cur = conn.execute("INSERT INTO training_jobs (status, message) VALUES ('queued', 'Waiting for worker')")
+        job_id = cur.lastrowid
+    _ensure_worker()
+    return job_id
+
+
+def list_jobs(limit=10):
+    """Most recent jobs first, as dicts"""
+    with get_connection() as conn:
+        create_jobs_table(conn)
+        c = conn.cursor()
+        c.row_factory = sqlite3.Row
+        rows = c.execute("SELECT * FROM training_jobs ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+        return [dict(row) for row in rows]
+
+
+def active_job():
+    """The queued or running job, if any.
+
+    Jobs left behind by a server that was killed or restarted are dealt
+    with first: a running job whose worker is gone is marked failed, and a
+    worker is started for a job still queued, so neither blocks retraining.
+    """
+    with get_connection() as conn:
+        create_jobs_table(conn)
+        _fail_orphaned_jobs(conn)
+    for job in list_jobs(limit=5):
+        if job['status'] in ('queued', 'running'):
+            if job['status'] == 'queued':
+                _ensure_worker()
+            return job
+    return None
+
+
+if __name__ == "__main__":
+    print(f"Submitted training job #{submit_job()}")
+    _worker.join()
+    print(list_jobs(limit=1)[0])
@@ -6,10 +6,29 @@ from sklearn.preprocessing import StandardScaler
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score
 import os
+import threading
+import time
 
+from compiled_forest import COMPILED_MAX_ROWS, CompiledForest, compile_forest, is_forest
+from fused_model import compile_fused
+from metrics import timed
+from mmap_model import load_artifact
+from prediction_cache import prediction_cache
+from model_registry import MANIFEST_PATH, MODEL_DIR, read_manifest, registry
 
-def train_model():
-    """Train the diabetes prediction model"""
+FEATURE_NAMES = ['Pregnancies', 'Glucose', 'BloodPressure', 'SkinThickness', 'Insulin',
+                 'BMI', 'DiabetesPedigreeFunction', 'Age']
+
+MODEL_PATH = os.path.join(MODEL_DIR, 'diabetes_model.pkl')
+SCALER_PATH = os.path.join(MODEL_DIR, 'scaler.pkl')
+
+
+def train_model(out_dir=MODEL_DIR, progress=None):
+    """Train the diabetes prediction model
+
+    progress, if given, is called as progress(fraction, message) between steps.
+    """
+    progress = progress or (lambda fraction, message: None)
     # Create synthetic diabetes dataset for demo
     np.random.seed(42)
     n_samples = 1000
@@ -38,6 +57,7 @@ def train_model():
     data['Outcome'] = (risk_score > 0.5).astype(int)
 
     df = pd.DataFrame(data)
+    progress(0.2, "Generated dataset")
 
     # Prepare features and target
     X = df.drop('Outcome', axis=1)
@@ -50,38 +70,196 @@ def train_model():
     scaler = StandardScaler()
     X_train_scaled = scaler.fit_transform(X_train)
     X_test_scaled = scaler.transform(X_test)
+    progress(0.3, "Fitted scaler")
 
     # Train model
     model = RandomForestClassifier(n_estimators=100, random_state=42)
     model.fit(X_train_scaled, y_train)
+    progress(0.8, "Fitted model")
 
     # Evaluate model
     accuracy = accuracy_score(y_test, model.predict(X_test_scaled))
     print(f"Model accuracy: {accuracy:.2f}")
+    progress(0.9, f"Test accuracy {accuracy:.3f}")
 
     # Save model and scaler
-    os.makedirs('model', exist_ok=True)
-    joblib.dump(model, 'model/diabetes_model.pkl')
-    joblib.dump(scaler, 'model/scaler.pkl')
+    os.makedirs(out_dir, exist_ok=True)
+    joblib.dump(model, os.path.join(out_dir, os.path.basename(MODEL_PATH)))
+    joblib.dump(scaler, os.path.join(out_dir, os.path.basename(SCALER_PATH)))
 
     return model, scaler
 
 
-def load_model():
-    """Load the trained model and scaler"""
+# Longest a model/scaler pair that disagrees with the manifest is waited out:
+# a promotion takes microseconds, plus up to the registry's check_interval
+# (1s) before every reader has re-stat'ed both files. A mismatch that lasts
+# longer means the files were copied in by hand, and they are then served
+# as they are.
+PAIR_GRACE = 2.0
+
+# Last (model entry, scaler entry) that matched the manifest, served while
+# a promotion is half done. The grace period runs per mismatch: a change to
+# the manifest or either file starts it again.
+_served_pair = None
+_mismatch = None  # ((manifest version, model sha256, scaler sha256), first seen)
+_pair_lock = threading.Lock()
+
+
+def _manifest():
+    """(manifest, version), ({}, None) before the first promotion"""
+    try:
+        entry = registry.get_entry(MANIFEST_PATH, loader=read_manifest)
+    except FileNotFoundError:
+        return {}, None
+    return entry.obj, entry.version
+
+
+def _artifact_entries():
+    """Registry entries of the model and scaler, always a pair promoted together
+
+    training_jobs.promote replaces the files one by one and the manifest
+    last. A pair whose hashes do not both match the manifest is mid-swap
+    (or one side has not been re-stat'ed yet), so the last matching pair
+    is served instead; with none yet, wait for the swap to finish.
+    """
+    global _served_pair, _mismatch
+    while True:
+        model_entry = registry.get_entry(MODEL_PATH, loader=load_artifact)
+        scaler_entry = registry.get_entry(SCALER_PATH, loader=load_artifact)
+        manifest, manifest_version = _manifest()
+        now = time.monotonic()
+        with _pair_lock:
+            if all(manifest.get(os.path.basename(e.path), e.sha256) == e.sha256
+                   for e in (model_entry, scaler_entry)):
+                _served_pair, _mismatch = (model_entry, scaler_entry), None
+                return model_entry, scaler_entry
+
+            key = (manifest_version, model_entry.sha256, scaler_entry.sha256)
+            if _mismatch is None or _mismatch[0] != key:
+                _mismatch = (key, now)
+            if now - _mismatch[1] >= PAIR_GRACE:
+                return model_entry, scaler_entry
+            if _served_pair is not None:
+                return _served_pair
+        time.sleep(0.05)
+
+
+def load_model_entries():
+    """Registry entries of the served model and scaler, always a matching pair (see _artifact_entries)"""
     try:
-        model = joblib.load('model/diabetes_model.pkl')
-        scaler = joblib.load('model/scaler.pkl')
-        return model, scaler
+        # Memory-mapped exports (mmap_model.py) are used when they match the pickles
+        return _artifact_entries()
     except FileNotFoundError:
-        print("Model not found. Training new model...")
-        return train_model()
+        from training_jobs import active_job, submit_job
+
+        # active_job() also fails jobs orphaned by a restart and restarts the worker for a queued one
+        job = active_job()
+        job_id = job['id'] if job else submit_job()
+        raise FileNotFoundError(f"Model not trained yet - training job #{job_id} is in progress")
+
+
+def load_model():
+    """Load the trained model and scaler (cached per process by the registry)
+
+    Training never runs in the request path: if no model has been trained
+    yet, a background training job is queued and FileNotFoundError is raised.
+    """
+    model_entry, scaler_entry = load_model_entries()
+    return model_entry.obj, scaler_entry.obj
+
+
+def _model_version():
+    """Content versions of the model and scaler, e.g. '3f2a9c01b7d4:81c0e5a2f913'"""
+    model_entry, scaler_entry = load_model_entries()  # queues training and raises if there is no model yet
+    return f"{model_entry.version}:{scaler_entry.version}"
+
+
+def fused_model(model_entry, scaler_entry=None):
+    """Model with scaler folded in (fused_model.py), or None if it cannot be fused
+
+    Takes raw features as a plain array. Without a scaler entry the model
+    itself is compiled, which still skips sklearn's per-call validation.
+    Built once per model and scaler version; a fused predictor that fails
+    its equivalence check is never served.
+    """
+    def build(model):
+        try:
+            return compile_fused(model, None if scaler_entry is None else scaler_entry.obj)
+        except AssertionError as e:
+            print(f"Not serving fused {os.path.basename(model_entry.path)}: {e}")
+            return None
+
+    return model_entry.derive(f"fused:{'raw' if scaler_entry is None else scaler_entry.version}", build)
+
+
+def _served_predictor(model_entry, scaler_entry):
+    """(predictor, takes raw features) for the served pair
+
+    A forest is served compiled to flat arrays (compiled once per model
+    version, or mapped as one); a linear or kernel model with the scaler
+    folded in; anything else as the model itself, behind the scaler.
+    """
+    model = model_entry.obj
+    if isinstance(model, CompiledForest) or is_forest(model):
+        compiled = model if isinstance(model, CompiledForest) else model_entry.derive(
+            'compiled_forest', compile_forest)
+        return compiled, False
+    fused = fused_model(model_entry, scaler_entry)
+    if fused is not None:
+        return fused, True
+    return model, False
+
+
+def _predict_uncached(input_data):
+    """(prediction, positive-class probability) straight from the model"""
+    with timed('predict_diabetes.model_load'):
+        model_entry, scaler_entry = load_model_entries()
+        predictor, takes_raw = _served_predictor(model_entry, scaler_entry)
+    raw = np.asarray(input_data, dtype=np.float64).reshape(1, -1)
+    if takes_raw:
+        # Linear / kernel model with the scaler folded in: no transform step
+        with timed('predict_diabetes.fused'):
+            return predictor.predict(raw)[0], predictor.predict_proba(raw)[0][1]
+    with timed('predict_diabetes.transform'):
+        scaled_data = scaler_entry.obj.transform(raw)
+    if isinstance(predictor, CompiledForest):
+        with timed('predict_diabetes.compiled'):
+            proba = predictor.predict_proba(scaled_data)[0]
+        return predictor.classes_[proba.argmax()], proba[1]
+    with timed('predict_diabetes.predict'):
+        prediction = predictor.predict(scaled_data)[0]
+        probability = predictor.predict_proba(scaled_data)[0][1]  # % chance of diabetes
+    return prediction, probability
+
+
+def predict_proba_batch(X):
+    """Positive-class probabilities (0-1) for an (N, 8) raw feature array
+
+    Goes through the same compiled / fused / scaled predictor as
+    predict_diabetes, so the numbers match what users are shown. Batches
+    over COMPILED_MAX_ROWS use the fitted forest (same probabilities, faster).
+    """
+    model_entry, scaler_entry = load_model_entries()
+    predictor, takes_raw = _served_predictor(model_entry, scaler_entry)
+    X = np.asarray(X, dtype=np.float64)
+    if isinstance(predictor, CompiledForest) and len(X) > COMPILED_MAX_ROWS and is_forest(model_entry.obj):
+        predictor = model_entry.obj
+    return predictor.predict_proba(X if takes_raw else scaler_entry.obj.transform(X))[:, 1]
+
 
+@timed('predict_diabetes.total')
+def predict_diabetes(input_data, username=None):
+    """Make diabetes prediction
 
-def predict_diabetes(input_data):
-    """Make diabetes prediction"""
-    model, scaler = load_model()
-    scaled_data = scaler.transform(np.array(input_data).reshape(1, -1))
-    prediction = model.predict(scaled_data)[0]
-    probability = model.predict_proba(scaled_data)[0][1]  # % chance of diabetes
-    return prediction, round(probability * 100, 2)
\ No newline at end of file
+    Results are memoized per model version (see prediction_cache.py).
+    When username is given the prediction is queued for the predictions
+    table (written in the background by prediction_logger).
+    """
+    # The version is read before the model is used, so a model swapped in
+    # meanwhile is cached under the old key, which the next lookup drops
+    prediction, probability = prediction_cache.get_or_compute(
+        'predict_diabetes', _model_version(), input_data, lambda: _predict_uncached(input_data))
+    if username:
+        from prediction_logger import log_prediction
+        log_prediction(username, input_data, prediction, probability * 100)
+    return prediction, round(probability * 100, 2)
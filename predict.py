@@ -4,62 +4,119 @@ import os
 import numpy as np
 import pandas as pd
 
+import project_path  # noqa: F401
+from model_registry import registry
+from compiled_forest import COMPILED_MAX_ROWS, CompiledForest, compile_forest, is_forest
+from metrics import timed
+from mmap_model import load_artifact
+from prediction_cache import prediction_cache
+from prediction_logger import is_known_user, log_prediction
+
 # --- Adjust these to match your training feature names and order ---
 FEATURE_NAMES = ["Pregnancies","Glucose","BloodPressure","SkinThickness","Insulin","BMI","DiabetesPedigreeFunction","Age"]
 
 MODEL_PATH = "model.pkl"
 SCALER_PATHS = ["scaler.pkl","preprocessor.pkl"]  # common names we try to load
 
+def _unpickle(path):
+    with open(path,"rb") as f:
+        return pickle.load(f)
+
+def _load(path):
+    # memory-mapped export (<name>.mmap/, see mmap_model.py) when it matches the pickle
+    return load_artifact(path, fallback=_unpickle)
+
 def load_model(path=MODEL_PATH):
+    # unpickled once per process; reloaded by the registry when the file changes
     if not os.path.exists(path):
         st.error(f"Model file not found: {path}")
         raise FileNotFoundError(path)
-    with open(path,"rb") as f:
-        return pickle.load(f)
+    return registry.get(path, loader=_load)
+
+def model_version(path=MODEL_PATH):
+    # short content hash of the served model; changes when the file is replaced
+    return registry.version(path, loader=_load)
+
+def load_compiled_model(path=MODEL_PATH):
+    # forests are served from flat NumPy arrays (same probabilities as sklearn)
+    model = load_model(path)
+    if isinstance(model, CompiledForest):
+        return model
+    if not is_forest(model):
+        return None
+    return registry.get_derived(path, "compiled_forest", compile_forest, loader=_load)
 
 def load_scaler():
-    for p in SCALER_PATHS:
-        if os.path.exists(p):
-            with open(p,"rb") as f:
-                return pickle.load(f)
-    return None
+    return registry.get_first(SCALER_PATHS, loader=_load)
+
+def _serving_version():
+    # model + scaler content hashes; cached predictions are keyed on them
+    load_model()  # reports a missing model file the same way predict always has
+    scaler_path = next((p for p in SCALER_PATHS if os.path.exists(p)), None)
+    scaler_version = registry.version(scaler_path, loader=_load) if scaler_path else "-"
+    return f"{model_version()}:{scaler_version}"
 
 def predict(features_list):
     """
     features_list: list or 1D array of length len(FEATURE_NAMES)
     returns dict with label, proba (if available).
+    Each stage is timed under "predict.*" (see metrics.py / Model Info page).
+    Results are memoized per model version (see prediction_cache.py).
     """
+    with timed("predict.total"):
+        result = prediction_cache.get_or_compute(
+            "predict", _serving_version(), features_list, lambda: _predict(features_list))
+        # callers get their own DataFrame; the cached one stays untouched
+        return dict(result, features_df=result["features_df"].copy())
+
+def _predict(features_list):
     # validate length
     if len(features_list) != len(FEATURE_NAMES):
         raise ValueError(f"Expected {len(FEATURE_NAMES)} features in order {FEATURE_NAMES}, got {len(features_list)}")
 
     # create DataFrame with column names so model sees correct feature names
-    X = pd.DataFrame([features_list], columns=FEATURE_NAMES, dtype=float)
+    with timed("predict.dataframe"):
+        X = pd.DataFrame([features_list], columns=FEATURE_NAMES, dtype=float)
 
     # load model
-    model = load_model()
+    with timed("predict.model_load"):
+        model = load_model()
 
     # load and apply scaler/preprocessor if present
-    scaler = load_scaler()
+    with timed("predict.scaler_load"):
+        scaler = load_scaler()
     if scaler is not None:
         try:
-            X_trans = scaler.transform(X)
+            with timed("predict.transform"):
+                X_trans = scaler.transform(X)
         except Exception:
             # if the scaler is a ColumnTransformer or expects DataFrame, try passing DataFrame
-            X_trans = scaler.transform(X)
+            with timed("predict.transform_fallback"):
+                X_trans = scaler.transform(X)
         # X_trans may be numpy array
         X_for_model = X_trans
     else:
         # no scaler saved  use the DataFrame (model may accept df or numpy)
         X_for_model = X
 
+    with timed("predict.compiled_load"):
+        compiled = load_compiled_model()
+    if compiled is not None:
+        with timed("predict.compiled"):
+            proba = compiled.predict_proba(np.asarray(X_for_model, dtype=float))
+        label = int(compiled.classes_[proba[0].argmax()])
+        result_text = "Diabetes" if label == 1 else "No Diabetes"
+        return {"label": label, "text": result_text, "proba": float(proba[0][-1]), "features_df": X}
+
     # get prediction
     try:
-        pred = model.predict(X_for_model)
+        with timed("predict.predict"):
+            pred = model.predict(X_for_model)
     except Exception as e:
         # Last attempt: if model was trained with DataFrame feature names, pass the DataFrame
         try:
-            pred = model.predict(X)
+            with timed("predict.predict_fallback"):
+                pred = model.predict(X)
         except Exception:
             raise
 
@@ -69,13 +126,15 @@ def predict(features_list):
     proba = None
     if hasattr(model, "predict_proba"):
         try:
-            proba = model.predict_proba(X_for_model)
+            with timed("predict.predict_proba"):
+                proba = model.predict_proba(X_for_model)
             # probability of positive class (class 1)
             positive_proba = float(proba[0][:,].flatten()[-1]) if proba is not None else None
         except Exception:
             # try with original DataFrame
             try:
-                proba = model.predict_proba(X)
+                with timed("predict.predict_proba_fallback"):
+                    proba = model.predict_proba(X)
                 positive_proba = float(proba[0][:,].flatten()[-1])
             except Exception:
                 positive_proba = None
@@ -84,6 +143,50 @@ def predict(features_list):
 
     return {"label": label, "text": result_text, "proba": positive_proba, "features_df": X}
 
+def _labels_from_proba(model):
+    # argmax of predict_proba matches predict() for trees, forests and linear
+    # models; SVC calibrates probabilities separately from its decision function
+    return hasattr(model, "predict_proba") and not hasattr(model, "support_vectors_")
+
+def predict_batch(X):
+    """
+    X: (N, len(FEATURE_NAMES)) array or DataFrame, columns in FEATURE_NAMES order
+    returns dict with labels (int array) and proba (positive-class array or None),
+    computed in one vectorized pass over all N rows.
+    """
+    if isinstance(X, pd.DataFrame):
+        missing = [c for c in FEATURE_NAMES if c not in X.columns]
+        if missing:
+            raise ValueError(f"Missing feature columns: {missing}")
+        X = X[FEATURE_NAMES].astype(float)
+    else:
+        X = np.asarray(X, dtype=float)
+        if X.ndim != 2 or X.shape[1] != len(FEATURE_NAMES):
+            raise ValueError(f"Expected an (N, {len(FEATURE_NAMES)}) array in order {FEATURE_NAMES}, got shape {X.shape}")
+        X = pd.DataFrame(X, columns=FEATURE_NAMES)
+
+    model = load_model()
+    scaler = load_scaler()
+    X_for_model = scaler.transform(X) if scaler is not None else X
+
+    # compiled arrays win on small batches; past COMPILED_MAX_ROWS sklearn is faster
+    compiled = load_compiled_model()
+    if compiled is not None and (len(X) <= COMPILED_MAX_ROWS or isinstance(model, CompiledForest)):
+        proba = compiled.predict_proba(np.asarray(X_for_model, dtype=float))
+        labels = compiled.classes_.take(proba.argmax(axis=1))
+        return {"labels": labels.astype(int), "proba": proba[:, -1]}
+
+    positive_proba = None
+    if hasattr(model, "predict_proba"):
+        proba = model.predict_proba(X_for_model)
+        positive_proba = proba[:, -1]
+        if _labels_from_proba(model):
+            labels = np.asarray(model.classes_).take(proba.argmax(axis=1))
+            return {"labels": labels.astype(int), "proba": positive_proba}
+
+    labels = model.predict(X_for_model)
+    return {"labels": np.asarray(labels).astype(int), "proba": positive_proba}
+
 # --- Streamlit UI example: adapt to your existing page layout ---
 def predict_page():
     st.header("Diabetes Prediction (fixed input handling)")
@@ -102,6 +205,11 @@ def predict_page():
         try:
             features = [pregnancies, glucose, bp, skt, insulin, bmi, dpf, age]
             res = predict(features)
+            # The demo admin login has no users row, so its predictions are not logged
+            if st.session_state.get("username") and is_known_user(st.session_state.username):
+                # queued; written to the predictions table in the background
+                proba_pct = None if res["proba"] is None else res["proba"] * 100
+                log_prediction(st.session_state.username, features, res["label"], proba_pct)
             st.write("Prediction:", res["text"])
             if res["proba"] is not None:
                 st.write(f"Probability of diabetes: {res['proba']*100:.1f}%")
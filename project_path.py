@@ -0,0 +1,12 @@
+# project_path.py
+# The shared helpers (model registry, database pool, ...) live in
+# diabetes_project/. Importing this module makes them importable from the
+# root app. The directory is appended, so root pages with the same name
+# (predict, charts, ...) still win.
+import os
+import sys
+
+PROJECT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "diabetes_project")
+
+if PROJECT_DIR not in sys.path:
+    sys.path.append(PROJECT_DIR)
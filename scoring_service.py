@@ -0,0 +1,286 @@
+import argparse
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+
+import numpy as np
+
+import project_path  # noqa: F401
+from predict import FEATURE_NAMES, MODEL_PATH, model_version, predict_batch
+
+MAX_BATCH_SIZE = 64
+MAX_WAIT_MS = 5.0
+MAX_BODY_BYTES = 10 * 1024 * 1024
+
+
+def _row(features):
+    """One feature vector from a list (FEATURE_NAMES order) or a {name: value} dict"""
+    if isinstance(features, dict):
+        missing = [c for c in FEATURE_NAMES if c not in features]
+        if missing:
+            raise ValueError(f"Missing features: {missing}")
+        features = [features[c] for c in FEATURE_NAMES]
+    if not isinstance(features, list) or len(features) != len(FEATURE_NAMES):
+        raise ValueError(f"Expected {len(FEATURE_NAMES)} features in order {FEATURE_NAMES}")
+    return [float(v) for v in features]
+
+
+def _result(label, proba):
+    return {
+        "label": int(label),
+        "text": "Diabetes" if label == 1 else "No Diabetes",
+        "proba": None if proba is None else float(proba),
+    }
+
+
+def _content_length(headers):
+    """Declared body size in bytes, or None unless the header is a non-negative integer"""
+    value = headers.get("content-length", "") or "0"
+    return int(value) if value.isascii() and value.isdigit() else None
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent single-row requests into one predict_batch call.
+    A batch is sent when it reaches max_batch_size rows or when its first
+    row has waited max_wait_ms, whichever comes first. Scoring runs on one
+    worker thread so the event loop keeps accepting requests meanwhile.
+    """
+
+    def __init__(self, max_batch_size=MAX_BATCH_SIZE, max_wait_ms=MAX_WAIT_MS):
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue = None
+        self._task = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="scoring")
+        self.batches = 0
+        self.rows = 0
+
+    def start(self):
+        self._queue = asyncio.Queue()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        self._task.cancel()
+        self._executor.shutdown(wait=False)
+
+    async def submit(self, row):
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((row, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            # Anything already queued rides along without waiting further
+            while len(batch) < self.max_batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            rows = np.array([row for row, _ in batch])
+            try:
+                res = await loop.run_in_executor(self._executor, predict_batch, rows)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            self.batches += 1
+            self.rows += len(batch)
+            proba = res["proba"]
+            for i, (_, future) in enumerate(batch):
+                if not future.done():
+                    future.set_result(_result(res["labels"][i], None if proba is None else proba[i]))
+
+
+class ScoringService:
+    """
+    Minimal HTTP/1.1 JSON service (keep-alive, no framework):
+
+      GET  /health          -> {"status": "ok", ...}
+      GET  /model-version   -> model path and content hash
+      POST /predict         -> {"features": [...] or {...}}       (micro-batched)
+                               {"instances": [[...], {...}, ...]} (scored directly)
+    """
+
+    def __init__(self, batcher):
+        self.batcher = batcher
+        self.started = time.time()
+
+    async def handle_request(self, method, path, body):
+        if method == "GET" and path == "/health":
+            return HTTPStatus.OK, {
+                "status": "ok",
+                "uptime_seconds": round(time.time() - self.started, 1),
+                "batches": self.batcher.batches,
+                "rows": self.batcher.rows,
+            }
+        if method == "GET" and path == "/model-version":
+            return HTTPStatus.OK, {"model": os.path.basename(MODEL_PATH), "version": model_version()}
+        if path == "/predict":
+            if method != "POST":
+                return HTTPStatus.METHOD_NOT_ALLOWED, {"error": "use POST"}
+            try:
+                payload = json.loads(body)
+                if "instances" in payload:
+                    rows = np.array([_row(r) for r in payload["instances"]]).reshape(-1, len(FEATURE_NAMES))
+                    res = await asyncio.get_running_loop().run_in_executor(None, predict_batch, rows)
+                    proba = res["proba"]
+                    return HTTPStatus.OK, {"predictions": [
+                        _result(label, None if proba is None else proba[i]) for i, label in enumerate(res["labels"])
+                    ]}
+                return HTTPStatus.OK, await self.batcher.submit(_row(payload["features"]))
+            except (ValueError, KeyError, TypeError) as e:
+                return HTTPStatus.BAD_REQUEST, {"error": str(e) or "invalid request"}
+        return HTTPStatus.NOT_FOUND, {"error": f"no route for {method} {path}"}
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                length = _content_length(headers)
+                if length is None:
+                    # Without a usable length the rest of the stream cannot be framed
+                    status, payload = HTTPStatus.BAD_REQUEST, {"error": "invalid Content-Length"}
+                    keep_alive = False
+                elif length > MAX_BODY_BYTES:
+                    status, payload = HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {"error": "body too large"}
+                    keep_alive = False
+                else:
+                    body = await reader.readexactly(length) if length else b""
+                    try:
+                        status, payload = await self.handle_request(method, target.split("?")[0], body)
+                    except Exception as e:
+                        status, payload = HTTPStatus.INTERNAL_SERVER_ERROR, {"error": str(e)}
+                    keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+
+                data = json.dumps(payload).encode()
+                writer.write(
+                    f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + data
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+async def serve(host="127.0.0.1", port=8600, max_batch_size=MAX_BATCH_SIZE, max_wait_ms=MAX_WAIT_MS):
+    # Load (and compile) the model before accepting traffic
+    predict_batch(np.zeros((1, len(FEATURE_NAMES))))
+    batcher = MicroBatcher(max_batch_size, max_wait_ms)
+    batcher.start()
+    service = ScoringService(batcher)
+    server = await asyncio.start_server(service.handle_connection, host, port)
+    print(f"Scoring service on http://{host}:{port} (batch <= {max_batch_size}, wait <= {max_wait_ms} ms)")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await batcher.stop()
+
+
+async def load_test(host="127.0.0.1", port=8600, concurrency=32, requests=2000):
+    """
+    Fire `requests` single-row /predict calls over `concurrency` keep-alive
+    connections and report throughput and latency percentiles.
+    """
+    rng = np.random.default_rng(0)
+    sample = [2, 140, 70, 30, 100, 32.5, 0.5, 45]
+    latencies = []
+    errors = 0
+    per_client = [requests // concurrency + (i < requests % concurrency) for i in range(concurrency)]
+
+    async def client(n):
+        nonlocal errors
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            for _ in range(n):
+                features = (np.array(sample) * rng.uniform(0.8, 1.2, len(sample))).round(3).tolist()
+                body = json.dumps({"features": features}).encode()
+                start = time.perf_counter()
+                writer.write(b"POST /predict HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+                             b"Content-Length: " + str(len(body)).encode() + b"\r\n\r\n" + body)
+                await writer.drain()
+                status = int((await reader.readline()).split()[1])
+                length = 0
+                while (line := await reader.readline()) not in (b"\r\n", b""):
+                    if line.lower().startswith(b"content-length:"):
+                        length = int(line.split(b":")[1])
+                await reader.readexactly(length)
+                latencies.append(time.perf_counter() - start)
+                errors += status != 200
+        finally:
+            writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(n) for n in per_client if n))
+    elapsed = time.perf_counter() - start
+    ms = np.array(latencies) * 1000
+    return {
+        "requests": len(ms),
+        "errors": errors,
+        "seconds": elapsed,
+        "requests_per_second": len(ms) / elapsed,
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p95_ms": float(np.percentile(ms, 95)),
+        "p99_ms": float(np.percentile(ms, 99)),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Micro-batching HTTP scoring service for the diabetes model.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = sub.add_parser("serve", help="run the service")
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8600)
+    serve_parser.add_argument("--max-batch-size", type=int, default=MAX_BATCH_SIZE)
+    serve_parser.add_argument("--max-wait-ms", type=float, default=MAX_WAIT_MS,
+                              help="longest a request waits for its batch to fill")
+
+    load_parser = sub.add_parser("loadtest", help="load-test a running service")
+    load_parser.add_argument("--host", default="127.0.0.1")
+    load_parser.add_argument("--port", type=int, default=8600)
+    load_parser.add_argument("--concurrency", type=int, default=32)
+    load_parser.add_argument("--requests", type=int, default=2000)
+
+    args = parser.parse_args()
+    if args.command == "serve":
+        try:
+            asyncio.run(serve(args.host, args.port, args.max_batch_size, args.max_wait_ms))
+        except KeyboardInterrupt:
+            pass
+    else:
+        print(json.dumps(asyncio.run(load_test(args.host, args.port, args.concurrency, args.requests)), indent=2))
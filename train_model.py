@@ -1,5 +1,2 @@
-import streamlit as st
-
-def model_info_page():
-    st.title("Model Info and Retrain Page")
-    st.write("Details about the model and retraining options will go here.")
+import project_path  # noqa: F401
+from model_info import model_info_page  # noqa: F401  (shared with diabetes_project/app.py)